@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""Benchmarks of the time of arrival analysis hot paths.
+
+Each case is timed on a matrix of TOA counts, grid oversampling and numbers
+of simulations, after a first call to compile its kernels. The best of a few
+repeats is reported with the simulations per second, and the peak memory of
+one call as seen by `tracemalloc`, which includes numpy but not numba
+allocations. The pruned search also records the fraction of the grid it
+evaluated, which sets its speed-up over the full search. Results are
+compared against a stored baseline, and the run fails when any case is
+slower than the baseline by more than a threshold.
+
+Example
+-------
+    python benchmarks/benchmark.py --compare benchmarks/baseline.json
+    python benchmarks/benchmark.py --save benchmarks/baseline.json
+"""
+import json
+import platform
+import tempfile
+import timeit
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import click
+import numpy as np
+
+from subpulse.analysis import toa
+
+# Default slowdown relative to the baseline that fails a comparison.
+THRESHOLD: float = 1.25
+# Number of timed repeats of each case, the best is kept.
+REPEATS: int = 3
+
+
+def arrivals(toas: int) -> list:
+    """Evenly spaced times of arrival in ms, like those of a periodic burst."""
+    return list(np.arange(toas) * 216.0)
+
+
+def inputs(toas: int, simulations: int, oversample: int = 5):
+    """Simulated times of arrival and the frequency grid of a case."""
+    _, _, differences, minimum, maximum = toa.parameters(arrivals(toas), 0.2, 1)
+    toas_mc = toa.simulate(simulations, differences, minimum, maximum, seed=0)
+    return toas_mc, toa.frequency_grid(oversample=oversample)
+
+
+def cases() -> Iterator[Tuple[str, int, Callable[[], object], Dict[str, float]]]:
+    """
+    Benchmark cases.
+
+    Yields
+    ------
+    Iterator[Tuple[str, int, Callable[[], object], Dict[str, float]]]
+        Name, number of simulations per call, the callable to time and the
+        fields recorded with its results.
+    """
+    for oversample in (1, 5, 10):
+        function = partial(toa.frequency_grid, oversample=oversample)
+        yield f"frequency_grid[oversample={oversample}]", 0, function, {}
+    for toas in (12, 100, 1000):
+        times = inputs(toas, 1)[0][0]
+        function = partial(toa.pulse_phase, times, 1.7)
+        yield f"pulse_phase[toas={toas}]", 0, function, {}
+        phase = toa.pulse_phase(times, 1.7)
+        for n in (1, 2):
+            yield f"z_n[toas={toas},n={n}]", 0, partial(toa.z_n, phase, n=n), {}
+    for toas in (12, 100):
+        for oversample in (1, 5):
+            toas_mc, grid = inputs(toas, 1, oversample)
+            function = partial(toa.z2search, toas_mc[0], np.zeros(toas), grid)
+            yield f"z2search[toas={toas},oversample={oversample}]", 1, function, {}
+    for toas in (12, 100):
+        _, _, differences, minimum, maximum = toa.parameters(arrivals(toas), 0.2, 1)
+        for simulations in (toa.BLOCK, 16 * toa.BLOCK):
+            function = partial(
+                toa.simulate, simulations, differences, minimum, maximum, seed=0
+            )
+            name = f"simulate[toas={toas},simulations={simulations}]"
+            yield name, simulations, function, {}
+    for toas in (12, 100):
+        toas_mc, grid = inputs(toas, 256)
+        for kernel in toa.KERNELS[1:]:
+            function = partial(toa.search, toas_mc, grid, kernel)
+            fields = {}
+            if kernel == "pruned":
+                evaluated = toa.z2search_pruned(toas_mc, grid)[2]
+                fields["evaluated"] = float(evaluated.mean() / grid.size)
+            yield f"search[kernel={kernel},toas={toas}]", 256, function, fields
+    savepath = Path(tempfile.mkdtemp()) / "benchmark.npz"
+    for simulations in (toa.BLOCK, 4 * toa.BLOCK):
+        function = partial(
+            toa.execute, arrivals(12), 0.2, simulations, savepath, seed=0, interval=0
+        )
+        name = f"execute[toas=12,simulations={simulations}]"
+        yield name, simulations, function, {}
+
+
+def measure(function: Callable[[], object], repeats: int = REPEATS) -> Dict:
+    """
+    Time a case and measure its peak memory.
+
+    Parameters
+    ----------
+    function : Callable[[], object]
+    repeats : int, optional
+        Number of timed repeats, by default `REPEATS`.
+
+    Returns
+    -------
+    Dict
+        Best seconds per call and peak traced memory in bytes.
+    """
+    # Compile, or load from the cache, before timing.
+    function()
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeats, number=number)) / number
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dict(seconds=seconds, peak=peak)
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float = THRESHOLD
+) -> Dict[str, float]:
+    """
+    Cases slower than their baseline by more than a threshold.
+
+    Parameters
+    ----------
+    results : Dict[str, Dict]
+        Results of `measure` by case.
+    baseline : Dict[str, Dict]
+        Stored results by case, cases missing from either are skipped.
+    threshold : float, optional
+        Largest allowed ratio of seconds to the baseline, by default
+        `THRESHOLD`.
+
+    Returns
+    -------
+    Dict[str, float]
+        Ratio of seconds to the baseline of each regressed case.
+    """
+    ratios = {
+        name: result["seconds"] / baseline[name]["seconds"]
+        for name, result in results.items()
+        if name in baseline
+    }
+    return {name: ratio for name, ratio in ratios.items() if ratio > threshold}
+
+
+@click.command()
+@click.option("-k", "--select", help="Only run cases containing this text.")
+@click.option("--repeats", help="Timed repeats per case.", default=REPEATS)
+@click.option("--processors", help="Threads of the batched kernels.", default=1)
+@click.option(
+    "--compare",
+    "baseline",
+    help="Baseline to compare against.",
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--threshold",
+    help="Slowdown relative to the baseline that fails the run.",
+    default=THRESHOLD,
+    show_default=True,
+)
+@click.option("--save", help="Save the results as a baseline.", type=click.Path())
+def benchmark(
+    select: Optional[str],
+    repeats: int,
+    processors: int,
+    baseline: Optional[str],
+    threshold: float,
+    save: Optional[str],
+) -> None:
+    """Benchmark the time of arrival analysis."""
+    toa.threads(processors)
+    stored = json.loads(Path(baseline).read_text())["results"] if baseline else {}
+    results = {}
+    click.echo(f"{'case':<48} {'time (s)':>10} {'sims/s':>10} {'peak (MB)':>10}")
+    for name, simulations, function, fields in cases():
+        if select and select not in name:
+            continue
+        results[name] = measure(function, repeats)
+        seconds = results[name]["seconds"]
+        rate = simulations / seconds if simulations else None
+        results[name]["rate"] = rate
+        results[name].update(fields)
+        line = f"{name:<48} {seconds:>10.2e} "
+        line += f"{rate:>10.0f} " if rate else f"{'-':>10} "
+        line += f"{results[name]['peak'] / 2**20:>10.2f}"
+        if name in stored:
+            line += f"  x{seconds / stored[name]['seconds']:.2f}"
+        if "evaluated" in fields:
+            line += f"  evaluated {fields['evaluated']:.1%}"
+        click.echo(line)
+    if save:
+        machine = dict(
+            processor=platform.processor() or platform.machine(),
+            python=platform.python_version(),
+            numpy=np.__version__,
+            processors=processors,
+        )
+        document = dict(machine=machine, results=results)
+        Path(save).write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+    regressions = compare(results, stored, threshold)
+    for name, ratio in regressions.items():
+        click.echo(f"Regression: {name} is {ratio:.2f}x slower than the baseline")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,229 @@
+"""
+Non-uniform FFT evaluation of Z^2_1 periodograms.
+
+Note
+----
+On a uniform grid f_k = f_0 + k df, the phasor sums of a lightcurve search,
+
+    S(f_k) = sum_j exp(2 pi i f_k t_j),
+
+are a type-1 non-uniform discrete Fourier transform with strengths
+c_j = exp(2 pi i f_0 t_j) at the points x_j = 2 pi df t_j. They are evaluated
+for the whole grid at once by spreading each point onto an oversampled
+uniform grid with a Gaussian kernel, taking an FFT and deconvolving the
+kernel (Greengard & Lee 2004, SIAM Review, 46, 443). The cost is
+O(N Msp + M log M) rather than the O(N M) of a direct sum, for N TOAs and M
+frequencies.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from numba import jit
+
+# Oversampling ratio of the spreading grid.
+OVERSAMPLING: int = 2
+# Half-width of the Gaussian spreading kernel in grid cells, ~1e-12 accuracy.
+SPREAD: int = 12
+# Number of realizations transformed together in `z2search_batch`.
+ROWS: int = 256
+# Estimated costs of a search, in units of one phasor update of the
+# recurrence kernel, used by `select`: a fixed overhead, spreading one TOA,
+# and the FFT per cell and doubling of the oversampled grid.
+OVERHEAD_COST: float = 30000.0
+SPREAD_COST: float = 14.0 * 2 * SPREAD
+FFT_COST: float = 1.5
+# Cost of each further harmonic in the recurrence kernel, per phasor update.
+HARMONIC_COST: float = 0.5
+
+
+@jit(nopython=True, cache=True)
+def weights(errors: np.ndarray) -> np.ndarray:
+    """
+    Inverse-variance weights of the times of arrival.
+
+    The weighted Z^2_n is 2 / sum(w^2) sum_k |sum_j w_j exp(2 pi i k f t_j)|^2,
+    which remains chi^2 distributed with 2n degrees of freedom for random
+    phases, and is Z^2_n for equal weights.
+
+    Parameters
+    ----------
+    errors : np.ndarray
+        Uncertainties on the times of arrival.
+
+    Returns
+    -------
+    np.ndarray
+        Weights 1 / errors^2, scaled to at most 1, or an empty array, meaning
+        unweighted, when every uncertainty is zero.
+
+    Raises
+    ------
+    ValueError
+        When some, but not all, uncertainties are zero or negative.
+    """
+    if not np.any(errors):
+        return np.empty(0)
+    if np.any(errors <= 0):
+        raise ValueError("uncertainties must all be positive to weight the TOAs")
+    return (np.min(errors) / errors) ** 2
+
+
+def transform(
+    toas: np.ndarray, grid: np.ndarray, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Phasor sums over a uniform frequency grid via a type-1 NUFFT.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival, shape (toas,) or (realizations, toas).
+    grid : np.ndarray
+        Uniformly spaced frequency grid.
+    weights : Optional[np.ndarray], optional
+        Weight of each time of arrival, which scales its strength, shape
+        (toas,), by default None.
+
+    Returns
+    -------
+    np.ndarray
+        Complex sums w exp(2 pi i f t) over the TOAs at each frequency, shape
+        (grid,) or (realizations, grid).
+    """
+    # Phases are reduced in double precision, whatever the precision of the TOAs.
+    times = np.atleast_2d(toas).astype(np.float64, copy=False)
+    rows, ntoas = times.shape
+    size = grid.size
+    spacing = (grid[-1] - grid[0]) / max(size - 1, 1)
+    cells = max(OVERSAMPLING * size, 2 * SPREAD)
+    tau = np.pi * SPREAD / (size**2 * OVERSAMPLING * (OVERSAMPLING - 0.5))
+
+    # Strengths at the first frequency, shifted so that the grid is centred.
+    cycles = times * spacing
+    x = 2 * np.pi * (cycles - np.floor(cycles))
+    cycles = times * grid[0]
+    phase = 2 * np.pi * (cycles - np.floor(cycles)) + (size // 2) * x
+    strengths = np.exp(1j * phase)
+    if weights is not None:
+        strengths *= weights
+
+    # Spread onto the oversampled grid with a Gaussian kernel.
+    step = 2 * np.pi / cells
+    nearest = (x // step).astype(np.int64) + 1
+    offsets = np.arange(-SPREAD, SPREAD)
+    cell = nearest[..., np.newaxis] + offsets
+    weights = strengths[..., np.newaxis] * np.exp(
+        -0.25 * (x[..., np.newaxis] - step * cell) ** 2 / tau
+    )
+    index = (cell % cells + cells * np.arange(rows)[:, np.newaxis, np.newaxis]).ravel()
+    spread = np.bincount(index, weights.real.ravel(), minlength=rows * cells)
+    spread = spread + 1j * np.bincount(
+        index, weights.imag.ravel(), minlength=rows * cells
+    )
+    spread = np.fft.ifft(spread.reshape(rows, cells), axis=1)
+
+    # Keep the frequencies of the grid and deconvolve the kernel.
+    modes = np.arange(size) - size // 2
+    sums = np.roll(spread, size // 2, axis=1)[:, :size]
+    sums *= np.sqrt(np.pi / tau) * np.exp(tau * modes**2)
+    return sums.reshape(grid.shape) if np.ndim(toas) == 1 else sums
+
+
+def z2search(toas: np.ndarray, errors: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """
+    Lightcurve search via a type-1 NUFFT, see `toa.z2search`.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival.
+    errors : np.ndarray
+        Uncertainties on the times of arrival, which weight them when any is
+        non-zero, see `weights`.
+    grid : np.ndarray
+        Uniformly spaced frequency grid.
+
+    Returns
+    -------
+    np.ndarray
+        Z^2_1 power at each frequency of the grid.
+    """
+    weight = weights(errors)
+    if weight.size:
+        sums = transform(toas, grid, weight)
+        return 2.0 / np.sum(weight**2) * (sums.real**2 + sums.imag**2)
+    sums = transform(toas, grid)
+    return 2.0 / toas.size * (sums.real**2 + sums.imag**2)
+
+
+def z2search_batch(
+    toas_mc: np.ndarray,
+    grid: np.ndarray,
+    harmonics: int = 1,
+    weights: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, ...]:
+    """
+    Batched lightcurve search via a type-1 NUFFT, see `toa.z2search_batch`.
+
+    The phasor sums of harmonic k are those of the fundamental for the times
+    k t, so each harmonic costs one more transform.
+
+    Parameters
+    ----------
+    toas_mc : np.ndarray
+        Simulated times of arrival, shape (simulations, toas).
+    grid : np.ndarray
+        Uniformly spaced frequency grid.
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+    weights : Optional[np.ndarray], optional
+        Weight of each time of arrival, see `weights`, by default None.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Maximum Z^2_m power and its grid index for each realization and
+        number of harmonics m, shape (simulations, harmonics).
+    """
+    simulations, ntoas = toas_mc.shape
+    # Variance of the phasor sums for random phases.
+    variance = ntoas if weights is None else np.sum(weights**2)
+    max_power = np.zeros((simulations, harmonics), dtype=np.float64)
+    max_index = np.zeros((simulations, harmonics), dtype=np.int64)
+    for first in range(0, simulations, ROWS):
+        last = min(first + ROWS, simulations)
+        rows = np.arange(last - first)
+        powers = np.zeros((last - first, grid.size))
+        # Scaled to the harmonics in double precision, whatever that of the TOAs.
+        times = toas_mc[first:last].astype(np.float64)
+        for k in range(harmonics):
+            sums = transform((k + 1) * times, grid, weights)
+            powers += 2.0 / variance * (sums.real**2 + sums.imag**2)
+            max_index[first:last, k] = np.argmax(powers, axis=1)
+            max_power[first:last, k] = powers[rows, max_index[first:last, k]]
+    return max_power, max_index
+
+
+def select(toas: int, frequencies: int, harmonics: int = 1) -> str:
+    """
+    Choose between the recurrence and NUFFT kernels by problem size.
+
+    Parameters
+    ----------
+    toas : int
+        Number of times of arrival per realization.
+    frequencies : int
+        Number of frequencies in the grid.
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+
+    Returns
+    -------
+    str
+        "nufft" when its estimated cost is lower, "recurrence" otherwise.
+    """
+    cells = max(OVERSAMPLING * frequencies, 2 * SPREAD)
+    fft = FFT_COST * cells * np.log2(cells)
+    nufft = harmonics * (OVERHEAD_COST + SPREAD_COST * toas + fft)
+    recurrence = toas * frequencies * (1 + HARMONIC_COST * (harmonics - 1))
+    return "nufft" if nufft < recurrence else "recurrence"
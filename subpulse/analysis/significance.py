@@ -0,0 +1,111 @@
+"""Significance of an observed statistic against simulated maxima."""
+import math
+from typing import Optional, Tuple
+
+
+def normal_quantile(confidence: float) -> float:
+    """
+    Two-sided standard normal quantile for a confidence level.
+
+    Parameters
+    ----------
+    confidence : float
+        Confidence level, e.g. 0.95.
+
+    Returns
+    -------
+    float
+        z such that P(-z < Z < z) = confidence, e.g. 1.96 for 0.95.
+
+    Raises
+    ------
+    ValueError
+        When confidence is not within (0, 1).
+    """
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be within (0, 1), got {confidence}")
+    lower, upper = 0.0, 40.0
+    for _ in range(100):
+        middle = 0.5 * (lower + upper)
+        if math.erf(middle / math.sqrt(2.0)) < confidence:
+            lower = middle
+        else:
+            upper = middle
+    return 0.5 * (lower + upper)
+
+
+def false_alarm_probability(
+    exceedances: int, trials: int, confidence: float = 0.95
+) -> Tuple[float, float, float]:
+    """
+    False alarm probability with a Wilson score confidence interval.
+
+    Parameters
+    ----------
+    exceedances : int
+        Number of simulations at least as significant as the observation.
+    trials : int
+        Total number of simulations.
+    confidence : float, optional
+        Confidence level of the interval, by default 0.95.
+
+    Returns
+    -------
+    Tuple[float, float, float]
+        False alarm probability, and the lower and upper interval bounds.
+
+    Raises
+    ------
+    ValueError
+        When there are no trials, or more exceedances than trials.
+    """
+    if trials <= 0 or not 0 <= exceedances <= trials:
+        raise ValueError(f"invalid {exceedances} exceedances in {trials} trials")
+    z = normal_quantile(confidence)
+    probability = exceedances / trials
+    scale = 1.0 + z**2 / trials
+    center = (probability + z**2 / (2.0 * trials)) / scale
+    variance = probability * (1.0 - probability) / trials + z**2 / (4.0 * trials**2)
+    spread = z * math.sqrt(variance) / scale
+    return probability, max(0.0, center - spread), min(1.0, center + spread)
+
+
+def converged(
+    exceedances: int,
+    trials: int,
+    precision: Optional[float] = None,
+    threshold: Optional[float] = None,
+    confidence: float = 0.95,
+) -> bool:
+    """
+    Whether a running false alarm probability estimate can stop.
+
+    Parameters
+    ----------
+    exceedances : int
+        Number of simulations at least as significant as the observation.
+    trials : int
+        Number of simulations so far.
+    precision : Optional[float], optional
+        Stop once the half-width of the interval is at most this fraction of
+        the estimate, by default None.
+    threshold : Optional[float], optional
+        Stop once the lower bound of the interval exceeds this probability,
+        i.e. the observation is clearly not significant, by default None.
+    confidence : float, optional
+        Confidence level of the interval, by default 0.95.
+
+    Returns
+    -------
+    bool
+    """
+    if not trials:
+        return False
+    fap, lower, upper = false_alarm_probability(exceedances, trials, confidence)
+    if threshold is not None and lower > threshold:
+        return True
+    return (
+        precision is not None
+        and exceedances > 0
+        and upper - lower <= 2 * precision * fap
+    )
@@ -0,0 +1,260 @@
+"""Constant-memory, mergeable summary of simulated Z^2 maxima."""
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+
+from subpulse.utilities.atomic import atomic
+
+# Default number of fixed histogram bins.
+BINS: int = 4096
+# Default number of largest values kept exactly.
+TOP: int = 1000
+# Default relative accuracy of the quantile sketch.
+ACCURACY: float = 0.005
+# Smallest value resolved by the quantile sketch, smaller values share a bucket.
+MINIMUM: float = 1e-6
+
+
+class Summary:
+    """Histogram, quantile sketch and exact tail of a stream of values.
+
+    The histogram has fixed bins over [0, upper], the quantile sketch uses
+    logarithmic buckets with a bounded relative error (as in DDSketch), and
+    the tail keeps the `top` largest values exactly. All three are updated
+    online and merged by addition, so the memory used is independent of the
+    number of values.
+
+    Example
+    -------
+    >>> from subpulse.analysis.summary import Summary
+    >>> summary = Summary(upper=12.0)
+    >>> summary.update(values)
+    >>> print(summary.quantile(0.99), summary.exceedances(17.96))
+    """
+
+    def __init__(
+        self,
+        upper: float,
+        bins: int = BINS,
+        top: int = TOP,
+        accuracy: float = ACCURACY,
+        minimum: float = MINIMUM,
+    ):
+        """Initialization.
+
+        Parameters
+        ----------
+        upper : float
+            Upper bound on the values, e.g. 2N for the Z^2_1 of N TOAs.
+        bins : int, optional
+            Number of histogram bins, by default `BINS`.
+        top : int, optional
+            Number of largest values kept exactly, by default `TOP`.
+        accuracy : float, optional
+            Relative accuracy of the quantile sketch, by default `ACCURACY`.
+        minimum : float, optional
+            Smallest value resolved by the sketch, by default `MINIMUM`.
+        """
+        self.upper = float(upper)
+        self.bins = int(bins)
+        self.top = int(top)
+        self.accuracy = float(accuracy)
+        self.minimum = float(minimum)
+        self.gamma = (1.0 + accuracy) / (1.0 - accuracy)
+        self.offset = int(np.floor(np.log(minimum) / np.log(self.gamma)))
+        buckets = int(np.ceil(np.log(upper) / np.log(self.gamma))) - self.offset
+        self.edges = np.linspace(0.0, self.upper, self.bins + 1)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        # Bucket 0 holds every value below the minimum.
+        self.sketch = np.zeros(buckets + 1, dtype=np.int64)
+        self.tail = np.empty(0, dtype=np.float64)
+        self.count = 0
+
+    @property
+    def config(self) -> Dict[str, Union[int, float]]:
+        """Parameters that must agree for two summaries to be merged."""
+        return dict(
+            upper=self.upper,
+            bins=self.bins,
+            top=self.top,
+            accuracy=self.accuracy,
+            minimum=self.minimum,
+        )
+
+    def update(self, values: np.ndarray) -> None:
+        """Add values to the summary.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Values within [0, upper].
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not values.size:
+            return
+        self.count += values.size
+        bins = (values * (self.bins / self.upper)).astype(np.int64)
+        np.clip(bins, 0, self.bins - 1, out=bins)
+        self.counts += np.bincount(bins, minlength=self.bins)
+        with np.errstate(divide="ignore"):
+            buckets = np.ceil(np.log(values) / np.log(self.gamma)) - self.offset
+        buckets[values < self.minimum] = 0
+        buckets = np.clip(buckets, 0, self.sketch.size - 1).astype(np.int64)
+        self.sketch += np.bincount(buckets, minlength=self.sketch.size)
+        if self.tail.size == self.top:
+            values = values[values > self.tail[-1]]
+        self.keep(values)
+
+    def keep(self, values: np.ndarray) -> None:
+        """Merge values into the exact tail, keeping the `top` largest.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Candidate values for the tail.
+        """
+        tail = np.concatenate((self.tail, values))
+        self.tail = np.sort(tail)[::-1][: self.top]
+
+    def merge(self, other: "Summary") -> None:
+        """Merge another summary into this one.
+
+        Parameters
+        ----------
+        other : Summary
+
+        Raises
+        ------
+        ValueError
+            When the summaries were configured differently.
+        """
+        if self.config != other.config:
+            raise ValueError(f"cannot merge {other.config} into {self.config}")
+        self.count += other.count
+        self.counts += other.counts
+        self.sketch += other.sketch
+        self.keep(other.tail)
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile, within the relative accuracy of the sketch.
+
+        Parameters
+        ----------
+        q : float
+            Quantile within [0, 1].
+
+        Returns
+        -------
+        float
+        """
+        rank = q * (self.count - 1)
+        if self.tail.size and self.count - 1 - rank < self.tail.size:
+            return float(self.tail[int(np.floor(self.count - 1 - rank))])
+        bucket = int(np.searchsorted(np.cumsum(self.sketch), rank, side="right"))
+        if bucket == 0:
+            return 0.0
+        return float(2.0 * self.gamma ** (bucket + self.offset) / (self.gamma + 1.0))
+
+    def exceedances(self, value: float) -> int:
+        """Number of values at least as large as a given value.
+
+        The count is exact when the value falls within the exact tail, and
+        interpolated from the histogram otherwise.
+
+        Parameters
+        ----------
+        value : float
+
+        Returns
+        -------
+        int
+        """
+        if self.tail.size and (self.tail.size == self.count or value > self.tail[-1]):
+            return int(np.count_nonzero(self.tail >= value))
+        position = value * self.bins / self.upper
+        index = int(np.clip(np.floor(position), 0, self.bins - 1))
+        fraction = np.clip(index + 1 - position, 0.0, 1.0)
+        partial = (1.0 - fraction) * self.counts[index]
+        return int(round(self.counts[index:].sum() - partial))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays describing the summary, see `from_arrays`."""
+        arrays = {key: np.asarray(value) for key, value in self.config.items()}
+        arrays.update(
+            edges=self.edges,
+            counts=self.counts,
+            sketch=self.sketch,
+            tail=self.tail,
+            count=np.asarray(self.count),
+        )
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "Summary":
+        """Rebuild a summary from its arrays, see `arrays`.
+
+        Parameters
+        ----------
+        arrays : Mapping[str, np.ndarray]
+            e.g. the contents of a file written by `save`.
+
+        Returns
+        -------
+        Summary
+        """
+        summary = cls(
+            upper=float(arrays["upper"]),
+            bins=int(arrays["bins"]),
+            top=int(arrays["top"]),
+            accuracy=float(arrays["accuracy"]),
+            minimum=float(arrays["minimum"]),
+        )
+        summary.counts = np.array(arrays["counts"], dtype=np.int64)
+        summary.sketch = np.array(arrays["sketch"], dtype=np.int64)
+        summary.tail = np.array(arrays["tail"], dtype=np.float64)
+        summary.count = int(arrays["count"])
+        return summary
+
+    def save(self, savepath: Path, **metadata) -> None:
+        """Atomically save the summary.
+
+        Parameters
+        ----------
+        savepath : Path
+        **metadata
+            Additional arrays to store alongside the summary.
+        """
+        with atomic(savepath, mode=0o100666) as temporary:
+            with open(temporary, "wb") as handle:
+                np.savez(handle, **self.arrays(), **metadata)
+
+    @classmethod
+    def load(cls, path: Path) -> "Summary":
+        """Load a summary saved with `save`.
+
+        Parameters
+        ----------
+        path : Path
+
+        Returns
+        -------
+        Summary
+        """
+        with np.load(path) as arrays:
+            return cls.from_arrays(arrays)
+
+
+def is_summary(path: Path) -> bool:
+    """Whether an output file holds a summary rather than every value.
+
+    Parameters
+    ----------
+    path : Path
+
+    Returns
+    -------
+    bool
+    """
+    with np.load(path) as arrays:
+        return "sketch" in arrays.files
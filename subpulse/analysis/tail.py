@@ -0,0 +1,202 @@
+"""
+Extreme-value modelling of the tail of simulated Z^2 maxima.
+
+Note
+----
+Above a high threshold u, the excesses of the simulated maxima follow a
+generalized Pareto distribution (GPD), so the false alarm probability of an
+observed statistic x > u is extrapolated as
+
+    P(X >= x) = (n_u / N) * S(x - u)
+
+where n_u of the N simulations exceed u and S is the GPD survival function.
+The "gumbel" model fixes the GPD shape at zero, i.e. exponential excesses,
+which is the tail of any distribution in the Gumbel domain of attraction.
+Parameters are estimated with probability-weighted moments (Hosking & Wallis
+1987, Technometrics, 29, 339), which need no numerical optimization.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+MODELS: List[str] = ["gpd", "gumbel"]
+
+
+class Fit(NamedTuple):
+    """Tail model fitted above a threshold."""
+
+    model: str
+    threshold: float
+    shape: float
+    scale: float
+    exceedances: int
+    total: int
+
+
+def largest(values: np.ndarray, fraction: float = 0.01) -> np.ndarray:
+    """
+    Largest values, to fit the tail model to.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Simulated maxima.
+    fraction : float, optional
+        Fraction of the values to keep, by default 0.01.
+
+    Returns
+    -------
+    np.ndarray
+        Largest values, in descending order.
+    """
+    count = max(2, int(np.ceil(fraction * values.size)))
+    return np.sort(values)[::-1][:count]
+
+
+def fit(tail: np.ndarray, total: int, model: str = "gpd") -> Fit:
+    """
+    Fit a tail model to the largest simulated maxima.
+
+    Parameters
+    ----------
+    tail : np.ndarray
+        Largest values of the simulated maxima, e.g. `largest` or the tail of
+        a `summary.Summary`. The smallest of them is used as the threshold.
+    total : int
+        Total number of simulations the tail was taken from.
+    model : str, optional
+        One of `MODELS`, by default "gpd".
+
+    Returns
+    -------
+    Fit
+
+    Raises
+    ------
+    ValueError
+        When the model is not supported, or too few values exceed the
+        threshold.
+    """
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}, got {model}")
+    threshold = float(np.min(tail))
+    excesses = np.sort(tail[tail > threshold] - threshold)
+    count = excesses.size
+    if count < 2:
+        raise ValueError("at least two values must exceed the threshold")
+    first = excesses.mean()
+    if model == "gumbel":
+        return Fit(model, threshold, 0.0, float(first), count, int(total))
+    # Probability-weighted moment a_1 = E[X (1 - F(X))].
+    weights = (count - 1 - np.arange(count)) / (count - 1)
+    second = np.mean(weights * excesses)
+    # Hosking & Wallis estimate k, with shape = -k in the usual convention.
+    k = first / (first - 2.0 * second) - 2.0
+    scale = 2.0 * first * second / (first - 2.0 * second)
+    return Fit(model, threshold, float(-k), float(scale), count, int(total))
+
+
+def survival(result: Fit, values: np.ndarray) -> np.ndarray:
+    """
+    False alarm probability of values above the threshold of a fit.
+
+    Parameters
+    ----------
+    result : Fit
+    values : np.ndarray
+        Statistics at or above the threshold.
+
+    Returns
+    -------
+    np.ndarray
+        Extrapolated probability of a simulated maximum at least as large.
+    """
+    excess = np.maximum(np.asarray(values, dtype=np.float64) - result.threshold, 0)
+    rate = result.exceedances / result.total
+    if abs(result.shape) < 1e-9:
+        return rate * np.exp(-excess / result.scale)
+    base = np.maximum(1.0 + result.shape * excess / result.scale, 0.0)
+    with np.errstate(divide="ignore"):
+        return rate * base ** (-1.0 / result.shape)
+
+
+def extrapolate(
+    tail: np.ndarray,
+    total: int,
+    observed: float,
+    model: str = "gpd",
+    resamples: int = 500,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> Tuple[float, float, float]:
+    """
+    Extrapolated false alarm probability with a bootstrap interval.
+
+    The interval resamples the values above the threshold with replacement,
+    and their number from a binomial, and refits the model each time.
+
+    Parameters
+    ----------
+    tail : np.ndarray
+        Largest values of the simulated maxima.
+    total : int
+        Total number of simulations the tail was taken from.
+    observed : float
+        Observed statistic, above the smallest value of the tail.
+    model : str, optional
+        One of `MODELS`, by default "gpd".
+    resamples : int, optional
+        Number of bootstrap resamples, by default 500.
+    confidence : float, optional
+        Confidence level of the interval, by default 0.95.
+    seed : Optional[int], optional
+        Seed of the bootstrap, by default None.
+
+    Returns
+    -------
+    Tuple[float, float, float]
+        False alarm probability, and the lower and upper interval bounds.
+    """
+    result = fit(tail, total, model)
+    estimate = float(survival(result, observed))
+    rng = np.random.default_rng(seed)
+    above = tail[tail > result.threshold]
+    estimates = np.empty(resamples)
+    for index in range(resamples):
+        count = max(2, rng.binomial(total, result.exceedances / total))
+        sample = rng.choice(above, size=count, replace=True)
+        resampled = fit(np.append(sample, result.threshold), total, model)
+        estimates[index] = survival(resampled, observed)
+    alpha = 0.5 * (1.0 - confidence)
+    lower, upper = np.quantile(estimates, [alpha, 1.0 - alpha])
+    return estimate, float(lower), float(upper)
+
+
+def diagnostic(result: Fit, tail: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compare a fitted tail model against the empirical tail.
+
+    Parameters
+    ----------
+    result : Fit
+    tail : np.ndarray
+        Largest values of the simulated maxima the model was fitted to.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The tail values in descending order, their empirical and modelled
+        false alarm probabilities, and the largest absolute log10 ratio of
+        the two.
+    """
+    values = np.sort(tail)[::-1]
+    empirical = np.arange(1, values.size + 1) / result.total
+    modelled = survival(result, values)
+    with np.errstate(divide="ignore"):
+        deviation = np.max(np.abs(np.log10(modelled / empirical)))
+    return dict(
+        values=values,
+        empirical=empirical,
+        modelled=modelled,
+        deviation=np.asarray(deviation),
+    )
@@ -2,14 +2,22 @@
 
 import logging
 import random
+import time
 import warnings
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
-from numba import jit
+from numba import config, jit, prange, set_num_threads
 from numba.core.errors import NumbaPendingDeprecationWarning
-from tqdm import tqdm
+
+from subpulse.analysis import nufft, significance, summary
+from subpulse.analysis.nufft import weights
+from subpulse.utilities.atomic import atomic
+from subpulse.utilities.cache import BUDGET, Cache, digest
+from subpulse.utilities.chunked import Chunked, is_chunked
+from subpulse.utilities.metrics import Metrics
 
 LOG_FORMAT: str = "[%(asctime)s] %(levelname)s "
 LOG_FORMAT += "%(module)s::%(funcName)s():l%(lineno)d: "
@@ -47,6 +55,58 @@ FACTORIAL_LOOKUP_TABLE = np.array(
     ],
     dtype="int64",
 )
+# Number of grid frequencies between direct evaluations in recurrence_search.
+ANCHOR: int = 64
+KERNELS: List[str] = ["auto", "direct", "recurrence", "nufft", "pruned"]
+# Number of grid frequencies between coarse evaluations in pruned_search.
+STRIDE: int = 4
+# Number of consecutive simulations drawn from each random substream.
+BLOCK: int = 4096
+# Random substream of the jitter of each block of simulations, see `jitter`.
+JITTER: int = 1
+# Default memory budget in MB for each chunk of simulations.
+MEMORY: float = 256.0
+# Default number of seconds between checkpoints of a run.
+INTERVAL: float = 600.0
+# Maximum number of simulations between checks for early stopping.
+CHECK: int = 16 * BLOCK
+# Settings of `Options` supported by `sweep`.
+SWEEP: List[str] = [
+    "debug",
+    "kernel",
+    "memory",
+    "processors",
+    "seed",
+    "start",
+    "summarize",
+    "observed",
+    "confidence",
+    "harmonics",
+    "dtype",
+    "metrics",
+    "uncertainties",
+    "jitter",
+    "weighted",
+    "heartbeat",
+]
+# Floating point precisions of the simulated times of arrival.
+DTYPES: List[str] = ["float64", "float32"]
+# Signatures of the per-realization kernels, for each precision of the times
+# of arrival, compiled eagerly and cached on disk, see `warmup`. Arrays are C
+# contiguous.
+SEARCH_SIGNATURES: List[str] = [
+    f"void({dtype}[::1], float64[::1], float64[::1], float64[:, ::1], float64[::1], "
+    "int64[::1])"
+    for dtype in DTYPES
+]
+PHASOR_SIGNATURES: List[str] = [
+    f"void({dtype}[::1], float64, float64, float64[::1], float64[::1], float64[::1])"
+    for dtype in DTYPES
+]
+PRUNED_SIGNATURES: List[str] = [
+    f"int64({dtype}[::1], float64[::1], int64, float64[::1], int64[::1])"
+    for dtype in DTYPES
+]
 
 
 def frequency_grid(
@@ -80,11 +140,12 @@ def frequency_grid(
     )
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def parameters(
     arrivals: List[float],
     chi: float,
     simulations: int = int(1e6),
+    uncertainties: Optional[List[float]] = None,
 ):
     """
     Calculate the parameters for the workload .
@@ -95,10 +156,10 @@ def parameters(
         [description]
     chi : float
         [description]
-    processors : int
-        [description]
     simulations : int, optional
         [description], by default int(1e6)
+    uncertainties : Optional[List[float]], optional
+        Uncertainties on the arrivals in ms, by default None, exact.
 
     Returns
     -------
@@ -107,8 +168,10 @@ def parameters(
     """
     # Convert
     toas = np.array(arrivals) * 0.001
-    # np.empty is ~100x faster than np.zeros
-    errors = np.zeros(len(toas)) * 0.001
+    if uncertainties is None:
+        errors = np.zeros(len(toas))
+    else:
+        errors = np.array(uncertainties) * 0.001
     differences = np.zeros(len(toas) - 1)
 
     for index in np.arange(0, len(toas) - 1, 1):
@@ -119,7 +182,7 @@ def parameters(
     return toas, errors, differences, minimum, maximum
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def z2search(toas: np.ndarray, errors: np.ndarray, grid: np.ndarray) -> np.ndarray:
     """
     Lightcurve search.
@@ -129,7 +192,8 @@ def z2search(toas: np.ndarray, errors: np.ndarray, grid: np.ndarray) -> np.ndarr
     toas : np.ndarray
         [description]
     errors : np.ndarray
-        [description]
+        Uncertainties on the times of arrival, which weight them when any is
+        non-zero, see `weights`.
     grid : np.ndarray
         [description]
 
@@ -139,13 +203,612 @@ def z2search(toas: np.ndarray, errors: np.ndarray, grid: np.ndarray) -> np.ndarr
         [description]
     """
     z1 = np.zeros(grid.size, dtype=np.float64)
+    weight = weights(errors)
+    if weight.size:
+        # z_n normalizes by the sum of the weights, rather than by the sum of
+        # their squares, the variance of the weighted phasor sums.
+        norm = weight
+        scale = np.sum(weight) / np.sum(weight**2)
+    else:
+        norm = np.ones(toas.size)
+        scale = 1.0
     for index in np.arange(0, len(grid), 1):
         phase = pulse_phase(toas, grid[index])
-        z1[index] = z_n(phase, n=1)
+        z1[index] = z_n(phase, n=1, norm=norm) * scale
     return z1
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
+def z2search_recurrence(
+    toas: np.ndarray, errors: np.ndarray, grid: np.ndarray
+) -> np.ndarray:
+    """
+    Lightcurve search, using a trigonometric recurrence over the grid.
+
+    Drop-in replacement for `z2search` on uniformly spaced grids, such as
+    those returned by `frequency_grid`.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival.
+    errors : np.ndarray
+        Uncertainties on the times of arrival, which weight them when any is
+        non-zero, see `weights`.
+    grid : np.ndarray
+        Uniformly spaced frequency grid.
+
+    Returns
+    -------
+    np.ndarray
+        Z^2_1 power at each frequency of the grid.
+    """
+    powers = np.zeros((grid.size, 1), dtype=np.float64)
+    recurrence_search(
+        np.ascontiguousarray(toas),
+        np.ascontiguousarray(grid),
+        weights(errors),
+        powers,
+        np.empty(1),
+        np.empty(1, dtype=np.int64),
+    )
+    return powers[:, 0]
+
+
+@jit(SEARCH_SIGNATURES, nopython=True, cache=True)
+def direct_search(
+    toas: np.ndarray,
+    grid: np.ndarray,
+    weights: np.ndarray,
+    powers: np.ndarray,
+    best: np.ndarray,
+    best_index: np.ndarray,
+):
+    """
+    Evaluate Z^2_1 ... Z^2_n at every frequency of the grid directly.
+
+    The phasors of the harmonics k > 1 are powers of the fundamental phasor
+    exp(2 pi i f t), obtained by complex multiplication rather than by
+    evaluating cos(k phase) and sin(k phase).
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival.
+    grid : np.ndarray
+        Frequency grid.
+    weights : np.ndarray
+        Weight of each time of arrival, see `weights`, or an empty array for
+        the unweighted Z^2_n.
+    powers : np.ndarray
+        Output array for Z^2_m at each frequency, shape (grid, harmonics),
+        or shape (0, harmonics) when only the maxima are required.
+    best : np.ndarray
+        Output array for the maximum of Z^2_m over the grid, for m = 1 to
+        the number of harmonics.
+    best_index : np.ndarray
+        Output array for the grid index of each maximum.
+    """
+    harmonics = best.size
+    ntoas = toas.size
+    weighted = weights.size > 0
+    norm = 2.0 / (np.sum(weights**2) if weighted else ntoas)
+    cosines = np.empty(harmonics)
+    sines = np.empty(harmonics)
+    best[:] = -1.0
+    best_index[:] = 0
+    for index in range(grid.size):
+        cosines[:] = 0.0
+        sines[:] = 0.0
+        for toa in range(ntoas):
+            phase = toas[toa] * grid[index]
+            phase = (phase - np.floor(phase)) * 2 * np.pi
+            cosine = np.cos(phase)
+            sine = np.sin(phase)
+            weight = weights[toa] if weighted else 1.0
+            cosines[0] += weight * cosine
+            sines[0] += weight * sine
+            harmonic_cosine = cosine
+            harmonic_sine = sine
+            for k in range(1, harmonics):
+                harmonic_cosine, harmonic_sine = (
+                    harmonic_cosine * cosine - harmonic_sine * sine,
+                    harmonic_sine * cosine + harmonic_cosine * sine,
+                )
+                cosines[k] += weight * harmonic_cosine
+                sines[k] += weight * harmonic_sine
+        power = 0.0
+        for k in range(harmonics):
+            power += norm * (cosines[k] ** 2 + sines[k] ** 2)
+            if powers.shape[0]:
+                powers[index, k] = power
+            if power > best[k]:
+                best[k] = power
+                best_index[k] = index
+
+
+@jit(SEARCH_SIGNATURES, nopython=True, cache=True)
+def recurrence_search(
+    toas: np.ndarray,
+    grid: np.ndarray,
+    weights: np.ndarray,
+    powers: np.ndarray,
+    best: np.ndarray,
+    best_index: np.ndarray,
+):
+    """
+    Evaluate Z^2_1 ... Z^2_n over a uniform grid with a trigonometric recurrence.
+
+    The phasor exp(2 pi i f t) of every TOA is advanced between adjacent
+    frequencies by a fixed rotation exp(2 pi i df t), and re-anchored with a
+    direct evaluation every `ANCHOR` frequencies to bound the rounding drift.
+    The phasors of the harmonics k > 1 are its powers, by complex
+    multiplication.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival.
+    grid : np.ndarray
+        Uniformly spaced frequency grid.
+    weights : np.ndarray
+        Weight of each time of arrival, see `weights`, or an empty array for
+        the unweighted Z^2_n.
+    powers : np.ndarray
+        Output array for Z^2_m at each frequency, shape (grid, harmonics),
+        or shape (0, harmonics) when only the maxima are required.
+    best : np.ndarray
+        Output array for the maximum of Z^2_m over the grid, for m = 1 to
+        the number of harmonics.
+    best_index : np.ndarray
+        Output array for the grid index of each maximum.
+    """
+    harmonics = best.size
+    ntoas = toas.size
+    weighted = weights.size > 0
+    norm = 2.0 / (np.sum(weights**2) if weighted else ntoas)
+    spacing = (grid[-1] - grid[0]) / max(grid.size - 1, 1)
+    # Phasors are kept in the precision of the TOAs, phases are always reduced
+    # in double precision.
+    cosines = np.empty(ntoas, dtype=toas.dtype)
+    sines = np.empty(ntoas, dtype=toas.dtype)
+    rotation_cosines = np.empty(ntoas, dtype=toas.dtype)
+    rotation_sines = np.empty(ntoas, dtype=toas.dtype)
+    for toa in range(ntoas):
+        phase = toas[toa] * spacing
+        phase = (phase - np.floor(phase)) * 2 * np.pi
+        rotation_cosines[toa] = np.cos(phase)
+        rotation_sines[toa] = np.sin(phase)
+
+    # The phasors of the fundamental carry the weights, which the rotations
+    # preserve, so only the harmonics need the unit phasors.
+    if weighted:
+        inverses = 1.0 / weights
+        unit_cosines = np.empty(ntoas, dtype=toas.dtype)
+        unit_sines = np.empty(ntoas, dtype=toas.dtype)
+    else:
+        inverses = weights
+        unit_cosines = cosines
+        unit_sines = sines
+    # Phasors of the current harmonic, and the sums over the TOAs.
+    powers_cosines = np.empty(ntoas, dtype=toas.dtype)
+    powers_sines = np.empty(ntoas, dtype=toas.dtype)
+    harmonic_cosines = np.empty(harmonics)
+    harmonic_sines = np.empty(harmonics)
+    best[:] = -1.0
+    best_index[:] = 0
+    for index in range(grid.size):
+        total_cosine = 0.0
+        total_sine = 0.0
+        if index % ANCHOR == 0:
+            for toa in range(ntoas):
+                phase = toas[toa] * grid[index]
+                phase = (phase - np.floor(phase)) * 2 * np.pi
+                weight = weights[toa] if weighted else 1.0
+                cosines[toa] = weight * np.cos(phase)
+                sines[toa] = weight * np.sin(phase)
+                total_cosine += cosines[toa]
+                total_sine += sines[toa]
+        else:
+            for toa in range(ntoas):
+                cosine = cosines[toa]
+                sine = sines[toa]
+                cosines[toa] = (
+                    cosine * rotation_cosines[toa] - sine * rotation_sines[toa]
+                )
+                sines[toa] = sine * rotation_cosines[toa] + cosine * rotation_sines[toa]
+                total_cosine += cosines[toa]
+                total_sine += sines[toa]
+        if weighted and harmonics > 1:
+            for toa in range(ntoas):
+                unit_cosines[toa] = cosines[toa] * inverses[toa]
+                unit_sines[toa] = sines[toa] * inverses[toa]
+        for k in range(1, harmonics):
+            harmonic_cosine = 0.0
+            harmonic_sine = 0.0
+            for toa in range(ntoas):
+                if k == 1:
+                    cosine = cosines[toa]
+                    sine = sines[toa]
+                else:
+                    cosine = powers_cosines[toa]
+                    sine = powers_sines[toa]
+                powers_cosines[toa] = (
+                    cosine * unit_cosines[toa] - sine * unit_sines[toa]
+                )
+                powers_sines[toa] = sine * unit_cosines[toa] + cosine * unit_sines[toa]
+                harmonic_cosine += powers_cosines[toa]
+                harmonic_sine += powers_sines[toa]
+            harmonic_cosines[k] = harmonic_cosine
+            harmonic_sines[k] = harmonic_sine
+        harmonic_cosines[0] = total_cosine
+        harmonic_sines[0] = total_sine
+        power = 0.0
+        for k in range(harmonics):
+            power += norm * (harmonic_cosines[k] ** 2 + harmonic_sines[k] ** 2)
+            if powers.shape[0]:
+                powers[index, k] = power
+            if power > best[k]:
+                best[k] = power
+                best_index[k] = index
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def z2search_batch(
+    toas_mc: np.ndarray,
+    grid: np.ndarray,
+    recurrence: bool = True,
+    harmonics: int = 1,
+    weights: Optional[np.ndarray] = None,
+):
+    """
+    Batched lightcurve search over all simulated realizations.
+
+    Each row of `toas_mc` is searched over the full frequency grid, keeping
+    only the maximum Z^2_m power and the grid index where it occurs, for each
+    number of harmonics m. Rows are distributed across threads with `prange`,
+    and the phase and phasor sums are fused into a single pass, so no
+    temporary arrays are allocated per frequency.
+
+    Parameters
+    ----------
+    toas_mc : np.ndarray
+        Simulated times of arrival, shape (simulations, toas).
+    grid : np.ndarray
+        Frequency grid, see `frequency_grid`.
+    recurrence : bool, optional
+        Use `recurrence_search` rather than `direct_search`, by default True.
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+    weights : Optional[np.ndarray], optional
+        Weight of each time of arrival, shared by every realization, see
+        `weights`, by default None, unweighted.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Maximum Z^2_m power and its grid index for each realization, shape
+        (simulations, harmonics).
+    """
+    toas_mc = np.ascontiguousarray(toas_mc)
+    grid = np.ascontiguousarray(grid)
+    if weights is None:
+        weight = np.empty(0)
+    else:
+        weight = np.ascontiguousarray(weights)
+    simulations = toas_mc.shape[0]
+    max_power = np.zeros((simulations, harmonics), dtype=np.float64)
+    max_index = np.zeros((simulations, harmonics), dtype=np.int64)
+    empty = np.empty((0, harmonics), dtype=np.float64)
+    for row in prange(simulations):
+        toas = toas_mc[row]
+        if recurrence:
+            recurrence_search(toas, grid, weight, empty, max_power[row], max_index[row])
+        else:
+            direct_search(toas, grid, weight, empty, max_power[row], max_index[row])
+    return max_power, max_index
+
+
+@jit(PHASOR_SIGNATURES, nopython=True, cache=True)
+def phasor(
+    toas: np.ndarray,
+    centre: float,
+    frequency: float,
+    powers: np.ndarray,
+    magnitudes: np.ndarray,
+    slopes: np.ndarray,
+):
+    """
+    Phasor sums of the harmonics and their derivatives with respect to frequency.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival.
+    centre : float
+        Reference time for the derivatives, which leaves |S_k| unchanged.
+    frequency : float
+    powers : np.ndarray
+        Output array for Z^2_m at the frequency, for m = 1 to the number of
+        harmonics.
+    magnitudes : np.ndarray
+        Output array for |S_k|, the phasor sum of harmonic k.
+    slopes : np.ndarray
+        Output array for |dS_k/df|.
+    """
+    harmonics = powers.size
+    cosines = np.zeros(harmonics)
+    sines = np.zeros(harmonics)
+    cosine_slopes = np.zeros(harmonics)
+    sine_slopes = np.zeros(harmonics)
+    for toa in range(toas.size):
+        phase = toas[toa] * frequency
+        phase = (phase - np.floor(phase)) * 2 * np.pi
+        cosine = np.cos(phase)
+        sine = np.sin(phase)
+        harmonic_cosine = cosine
+        harmonic_sine = sine
+        for k in range(harmonics):
+            if k:
+                harmonic_cosine, harmonic_sine = (
+                    harmonic_cosine * cosine - harmonic_sine * sine,
+                    harmonic_sine * cosine + harmonic_cosine * sine,
+                )
+            cosines[k] += harmonic_cosine
+            sines[k] += harmonic_sine
+            cosine_slopes[k] += (toas[toa] - centre) * harmonic_cosine
+            sine_slopes[k] += (toas[toa] - centre) * harmonic_sine
+    power = 0.0
+    for k in range(harmonics):
+        power += 2.0 / toas.size * (cosines[k] ** 2 + sines[k] ** 2)
+        powers[k] = power
+        magnitudes[k] = np.sqrt(cosines[k] ** 2 + sines[k] ** 2)
+        # |dS_k/df| with S_k referred to the centre, up to the factor 2 pi k.
+        slopes[k] = (
+            2 * np.pi * (k + 1) * np.sqrt(cosine_slopes[k] ** 2 + sine_slopes[k] ** 2)
+        )
+
+
+@jit(PRUNED_SIGNATURES, nopython=True, cache=True)
+def pruned_search(
+    toas: np.ndarray,
+    grid: np.ndarray,
+    stride: int,
+    best: np.ndarray,
+    best_index: np.ndarray,
+) -> int:
+    """
+    Maximum Z^2_m over the grid, skipping frequencies that cannot reach it.
+
+    The grid is first evaluated every `stride` frequencies. Referring the
+    times to their centre t_c, which leaves |S_k| unchanged, the second
+    derivative of S_k(f) = sum_j exp(2 pi i k f t_j) is bounded by
+    k^2 L with L = 4 pi^2 sum_j (t_j - t_c)^2, so within an interval of width
+    h between two coarse frequencies |S_k| is at most
+    max(|S_k| + |S_k'| h / 2) + k^2 L h^2 / 8 over its ends. Only intervals
+    whose bound on some Z^2_m could beat the best power so far are evaluated,
+    in order of decreasing bound on the largest number of harmonics, and the
+    returned maxima and indices are those of `direct_search`.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Times of arrival.
+    grid : np.ndarray
+        Frequency grid.
+    stride : int
+        Number of frequencies between coarse evaluations.
+    best : np.ndarray
+        Output array for the maximum of Z^2_m over the grid, for m = 1 to
+        the number of harmonics.
+    best_index : np.ndarray
+        Output array for the grid index of each maximum.
+
+    Returns
+    -------
+    int
+        Number of frequencies evaluated.
+    """
+    harmonics = best.size
+    ntoas = toas.size
+    centre = 0.5 * (toas.min() + toas.max())
+    curvature = 0.0
+    for toa in range(ntoas):
+        curvature += (toas[toa] - centre) ** 2
+    curvature *= 4 * np.pi**2
+
+    coarse = np.arange(0, grid.size, stride)
+    if coarse[-1] != grid.size - 1:
+        coarse = np.append(coarse, grid.size - 1)
+    powers = np.empty(harmonics)
+    scratch = np.empty(harmonics)
+    magnitudes = np.empty((coarse.size, harmonics))
+    slopes = np.empty((coarse.size, harmonics))
+    best[:] = -1.0
+    best_index[:] = 0
+    for point in range(coarse.size):
+        phasor(
+            toas, centre, grid[coarse[point]], powers, magnitudes[point], slopes[point]
+        )
+        for k in range(harmonics):
+            if powers[k] > best[k]:
+                best[k] = powers[k]
+                best_index[k] = coarse[point]
+
+    bounds = np.empty((coarse.size - 1, harmonics))
+    for interval in range(coarse.size - 1):
+        width = 0.5 * (grid[coarse[interval + 1]] - grid[coarse[interval]])
+        bound = 0.0
+        for k in range(harmonics):
+            left = magnitudes[interval, k] + slopes[interval, k] * width
+            right = magnitudes[interval + 1, k] + slopes[interval + 1, k] * width
+            extent = max(left, right) + 0.5 * (k + 1) ** 2 * curvature * width**2
+            bound += 2.0 / ntoas * min(extent, ntoas) ** 2
+            # Slack for rounding, so that no maximum is ever pruned.
+            bounds[interval, k] = bound * (1 + 1e-9) + 1e-12
+
+    evaluated = coarse.size
+    for interval in np.argsort(-bounds[:, harmonics - 1]):
+        if not np.any(bounds[interval] >= best):
+            if harmonics == 1:
+                break
+            continue
+        for index in range(coarse[interval] + 1, coarse[interval + 1]):
+            phasor(toas, centre, grid[index], powers, scratch, scratch)
+            evaluated += 1
+            for k in range(harmonics):
+                if powers[k] > best[k] or (
+                    powers[k] == best[k] and index < best_index[k]
+                ):
+                    best[k] = powers[k]
+                    best_index[k] = index
+    return evaluated
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def z2search_pruned(
+    toas_mc: np.ndarray, grid: np.ndarray, stride: int = STRIDE, harmonics: int = 1
+):
+    """
+    Batched lightcurve search with coarse-to-fine pruning, see `pruned_search`.
+
+    Parameters
+    ----------
+    toas_mc : np.ndarray
+        Simulated times of arrival, shape (simulations, toas).
+    grid : np.ndarray
+        Frequency grid, see `frequency_grid`.
+    stride : int, optional
+        Number of frequencies between coarse evaluations, by default `STRIDE`.
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Maximum Z^2_m power and its grid index, shape (simulations,
+        harmonics), and the number of frequencies evaluated for each
+        realization.
+    """
+    toas_mc = np.ascontiguousarray(toas_mc)
+    grid = np.ascontiguousarray(grid)
+    simulations = toas_mc.shape[0]
+    max_power = np.zeros((simulations, harmonics), dtype=np.float64)
+    max_index = np.zeros((simulations, harmonics), dtype=np.int64)
+    evaluated = np.zeros(simulations, dtype=np.int64)
+    for row in prange(simulations):
+        evaluated[row] = pruned_search(
+            toas_mc[row], grid, stride, max_power[row], max_index[row]
+        )
+    return max_power, max_index, evaluated
+
+
+def search(
+    toas_mc: np.ndarray,
+    grid: np.ndarray,
+    kernel: str = "auto",
+    harmonics: int = 1,
+    weights: Optional[np.ndarray] = None,
+):
+    """
+    Batched lightcurve search with the chosen kernel.
+
+    Parameters
+    ----------
+    toas_mc : np.ndarray
+        Simulated times of arrival, shape (simulations, toas).
+    grid : np.ndarray
+        Frequency grid, see `frequency_grid`.
+    kernel : str, optional
+        One of `KERNELS`, by default "auto", which picks the recurrence or
+        NUFFT kernel by problem size, see `nufft.select`.
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+    weights : Optional[np.ndarray], optional
+        Weight of each time of arrival, see `weights`, by default None,
+        unweighted. An empty array is also unweighted.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Maximum Z^2_m power and its grid index for each realization and
+        number of harmonics m, shape (simulations, harmonics).
+
+    Raises
+    ------
+    ValueError
+        When weights are given to the pruned kernel, whose bounds assume
+        equal weights.
+    """
+    if weights is not None and not weights.size:
+        weights = None
+    if kernel == "auto":
+        kernel = nufft.select(toas_mc.shape[1], grid.size, harmonics)
+    if kernel == "nufft":
+        return nufft.z2search_batch(toas_mc, grid, harmonics, weights)
+    if kernel == "pruned":
+        if weights is not None:
+            raise ValueError("the pruned kernel does not support weights")
+        max_power, max_index, evaluated = z2search_pruned(
+            toas_mc, grid, STRIDE, harmonics
+        )
+        log.debug(f"Pruned: {evaluated.sum() / (grid.size * evaluated.size):.1%}")
+        return max_power, max_index
+    return z2search_batch(toas_mc, grid, kernel == "recurrence", harmonics, weights)
+
+
+def observe(
+    toas: np.ndarray,
+    grid: np.ndarray,
+    harmonics: int = 1,
+    weights: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Periodogram of the observed times of arrival and its best period.
+
+    The periodogram is evaluated with `recurrence_search`, which every kernel
+    of `search` agrees with, so the best statistic is directly comparable
+    with the simulated maxima.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Observed times of arrival in s, see `parameters`.
+    grid : np.ndarray
+        Uniformly spaced frequency grid.
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+    weights : Optional[np.ndarray], optional
+        Weight of each time of arrival, see `weights`, by default None,
+        unweighted.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Z^2_m at every frequency of the grid as `periodogram`, shape (grid,
+        harmonics), the grid as `frequencies`, and the largest Z^2_n, n =
+        `harmonics`, as `statistic`, at `frequency` in Hz and `period` in ms.
+    """
+    periodogram = np.zeros((grid.size, harmonics))
+    recurrence_search(
+        np.ascontiguousarray(toas, dtype=np.float64),
+        np.ascontiguousarray(grid),
+        np.empty(0) if weights is None else np.ascontiguousarray(weights),
+        periodogram,
+        np.empty(harmonics),
+        np.empty(harmonics, dtype=np.int64),
+    )
+    index = int(np.argmax(periodogram[:, -1]))
+    return dict(
+        periodogram=periodogram,
+        frequencies=grid,
+        statistic=float(periodogram[index, -1]),
+        frequency=float(grid[index]),
+        period=float(1e3 / grid[index]),
+    )
+
+
+@jit(nopython=True, cache=True)
 def pulse_phase(times, *frequency_derivatives):
     """
     Calculate pulse phase from the frequency and its derivatives.
@@ -170,7 +833,7 @@ def pulse_phase(times, *frequency_derivatives):
     return phase
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def fast_factorial(value: np.int64) -> np.int64:
     """
     Factorial.
@@ -194,7 +857,7 @@ def fast_factorial(value: np.int64) -> np.int64:
     return FACTORIAL_LOOKUP_TABLE[value]
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def z_n(phase: np.ndarray, n: int = 2, norm: float = 1.0):
     """Z^2_n statistics, a` la Buccheri+03, A&A, 128, 245, eq. 2.
 
@@ -215,16 +878,16 @@ def z_n(phase: np.ndarray, n: int = 2, norm: float = 1.0):
     nbin = len(phase)
     if nbin == 0:
         return 0
-    normalization = np.array(norm)
+    normalization = np.asarray(norm)
     if normalization.size == 1:
-        total_norm = nbin * normalization
+        total_norm = nbin * np.sum(normalization)
     else:
         total_norm = np.sum(normalization)
     phase = phase * 2 * np.pi
     return 2.0 / total_norm * statistic(n, phase, normalization)
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def statistic(n, phase, norm):
     """Calculate Z^2 Statistic."""
     stat = np.zeros(n + 1, dtype=np.float64)
@@ -236,52 +899,831 @@ def statistic(n, phase, norm):
     return np.sum(stat)
 
 
-@jit(nopython=True)
-def simulate(simulations: int, differences: np.ndarray, minimum: int, maximum: int):
+def generator(seed: int, block: int, stream: int = 0) -> np.random.Generator:
+    """
+    Random number generator for one block of simulations.
+
+    Each block of `BLOCK` consecutive simulations draws from its own
+    counter-based Philox substream of the root seed, so any range of
+    simulations can be regenerated independently of how the work is split.
+
+    Parameters
+    ----------
+    seed : int
+        Root seed of the run.
+    block : int
+        Index of the block of simulations.
+    stream : int, optional
+        Independent stream of the block, e.g. `JITTER`, by default 0, the
+        uniforms of `draw`.
+
+    Returns
+    -------
+    np.random.Generator
+    """
+    key = (block, stream) if stream else (block,)
+    sequence = np.random.SeedSequence(seed, spawn_key=key)
+    return np.random.Generator(np.random.Philox(sequence))
+
+
+def draw(simulations: int, columns: int, seed: int, start: int = 0) -> np.ndarray:
+    """
+    Uniform draws underlying simulated observations.
+
+    Simulation `start + i` is always drawn from the same substream of `seed`
+    (see `generator`), so splitting a run into chunks or jobs reproduces the
+    same draws bit-for-bit.
+
+    Parameters
+    ----------
+    simulations : int
+        Number of simulations.
+    columns : int
+        Number of draws per simulation, one per difference of the arrivals.
+    seed : int
+        Root seed of the run.
+    start : int, optional
+        Index of the first simulation, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        Uniforms in [0, 1), shape (simulations, columns), in double precision.
+    """
+    simulations = int(simulations)
+    uniforms = np.empty((simulations, columns))
+    index = start
+    while index < start + simulations:
+        block, offset = divmod(index, BLOCK)
+        count = min(BLOCK - offset, start + simulations - index)
+        rng = generator(seed, block)
+        if offset:
+            rng.random((offset, columns))
+        first = index - start
+        last = first + count
+        rng.random(out=uniforms[first:last])
+        index += count
+    return uniforms
+
+
+def realize(
+    uniforms: np.ndarray,
+    minimum: float,
+    maximum: float,
+    dtype: str = "float64",
+    overwrite: bool = False,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Simulated observations from uniform draws.
+
+    Each draw is mapped affinely to a difference between consecutive arrivals
+    within [minimum, maximum), and the differences are accumulated into
+    times of arrival. Unless overwritten, the draws are left untouched, so
+    the same draws can be realized for several chi, see `sweep`.
+
+    Parameters
+    ----------
+    uniforms : np.ndarray
+        Draws of `draw`, shape (simulations, toas - 1).
+    minimum : float
+        Smallest difference between consecutive arrivals.
+    maximum : float
+        Largest difference between consecutive arrivals.
+    dtype : str, optional
+        Precision of the simulated TOAs, one of `DTYPES`, by default float64.
+    overwrite : bool, optional
+        Map the draws to differences in place, which saves a copy of them,
+        by default False.
+    out : Optional[np.ndarray], optional
+        Array of zeros to write the TOAs to, whose precision then replaces
+        `dtype`, by default a new one.
+
+    Returns
+    -------
+    np.ndarray
+        Simulated times of arrival, shape (simulations, toas).
+    """
+    if out is None:
+        out = np.zeros((len(uniforms), uniforms.shape[1] + 1), dtype=dtype)
+    # Differences are accumulated in double precision, so single precision
+    # TOAs are rounded only once, in the draws themselves or else a block at
+    # a time in scratch.
+    size = len(uniforms) if overwrite else BLOCK
+    for first, count in chunks(len(uniforms), size):
+        last = first + count
+        block = uniforms[first:last]
+        differences_mc = block if overwrite else np.empty_like(block)
+        np.multiply(block, maximum - minimum, out=differences_mc)
+        differences_mc += minimum
+        if out.dtype == np.float64:
+            np.cumsum(differences_mc, axis=1, out=out[first:last, 1:])
+        else:
+            np.cumsum(differences_mc, axis=1, out=differences_mc)
+            out[first:last, 1:] = differences_mc
+    return out
+
+
+def simulate(
+    simulations: int,
+    differences: np.ndarray,
+    minimum: float,
+    maximum: float,
+    seed: int,
+    start: int = 0,
+    dtype: str = "float64",
+):
     """
     Generate simulated observations.
 
+    The observations are the `realize`d uniforms of `draw`, so splitting a
+    run into chunks or jobs reproduces the same realizations bit-for-bit.
+    Uniforms are drawn in double precision whatever the `dtype`, so single
+    precision runs share the random streams of double precision ones.
+
     Parameters
     ----------
     simulations : int
         [description]
     differences : np.ndarray
         [description]
-    minimum : int
+    minimum : float
         [description]
-    maximum : int
+    maximum : float
         [description]
+    seed : int
+        Root seed of the run.
+    start : int, optional
+        Index of the first simulation, by default 0.
+    dtype : str, optional
+        Precision of the simulated TOAs, one of `DTYPES`, by default float64.
 
     Returns
     -------
-    [type]
+    np.ndarray
+        Simulated times of arrival, shape (simulations, toas).
+    """
+    simulations = int(simulations)
+    if np.dtype(dtype) == np.float64:
+        uniforms = draw(simulations, len(differences), seed, start)
+        return realize(uniforms, minimum, maximum, overwrite=True)
+    # Uniforms are drawn a block at a time, so only the single precision TOAs
+    # are held whole.
+    toas_mc = np.zeros((simulations, len(differences) + 1), dtype=dtype)
+    for first, count in chunks(simulations, BLOCK):
+        uniforms = draw(count, len(differences), seed, start + first)
+        out = toas_mc[first:][:count]
+        realize(uniforms, minimum, maximum, overwrite=True, out=out)
+    return toas_mc
+
+
+def perturb(
+    toas_mc: np.ndarray, errors: np.ndarray, seed: int, start: int = 0
+) -> np.ndarray:
+    """
+    Offset simulated observations by their timing uncertainties, in place.
+
+    Each time of arrival is offset by a normal deviate with the standard
+    deviation of its uncertainty. The deviates of simulation `start + i` are
+    drawn from the `JITTER` stream of its block, see `generator`, so they do
+    not change the simulated observations themselves, and are reproduced
+    however the run is split. They are drawn a block at a time into a single
+    buffer, so no array of deviates the size of `toas_mc` is allocated.
+
+    Parameters
+    ----------
+    toas_mc : np.ndarray
+        Simulated times of arrival, shape (simulations, toas), see `simulate`.
+    errors : np.ndarray
+        Uncertainty on each time of arrival in s.
+    seed : int
+        Root seed of the run.
+    start : int, optional
+        Index of the first simulation, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        The jittered `toas_mc`.
+    """
+    simulations, columns = toas_mc.shape
+    deviates = np.empty((min(simulations, BLOCK), columns))
+    index = start
+    while index < start + simulations:
+        block, offset = divmod(index, BLOCK)
+        count = min(BLOCK - offset, start + simulations - index)
+        rng = generator(seed, block, JITTER)
+        if offset:
+            rng.standard_normal((offset, columns))
+        buffer = deviates[:count]
+        rng.standard_normal(out=buffer)
+        buffer *= errors
+        first = index - start
+        toas_mc[first:][:count] += buffer
+        index += count
+    return toas_mc
+
+
+def warmup(harmonics: int = 1) -> Dict[str, Tuple[float, float]]:
+    """
+    Compile, or load from the on-disk cache, the kernels used by `execute`.
+
+    Each kernel is called twice on a small problem with the argument types of
+    `execute`, so the first call includes compiling or loading it and the
+    second is the run time alone. Baking the cache into an image, with
+    `NUMBA_CACHE_DIR` set, removes the compile time from every job.
+
+    Parameters
+    ----------
+    harmonics : int, optional
+        Largest number of harmonics, by default 1; the compiled kernels do not
+        depend on its value.
+
+    Returns
+    -------
+    Dict[str, Tuple[float, float]]
+        First and second call times in seconds for each kernel.
+    """
+    timings = {}
+
+    def measure(name, function, *args):
+        times = []
+        for _ in range(2):
+            begin = time.perf_counter()
+            result = function(*args)
+            times.append(time.perf_counter() - begin)
+        timings[name] = (times[0], times[1])
+        log.debug(f"Warmup {name}: {times[0]:.3f}s first, {times[1]:.3f}s after")
+        return result
+
+    arrivals = [0.000, 439.018, 653.038, 1080.966, 1304.422, 1517.858]
+    grid = frequency_grid()[: 2 * ANCHOR]
+    toas, errors, differences, minimum, maximum = measure(
+        "parameters", parameters, arrivals, 0.2, 2
+    )
+    toas_mc = simulate(2, differences, minimum, maximum, seed=0)
+    measure("z2search", z2search, toas, errors, grid)
+    measure("z2search_recurrence", z2search_recurrence, toas, errors, grid)
+    for kernel in KERNELS[1:]:
+        measure(kernel, search, toas_mc, grid, kernel, harmonics)
+    # Weights are a distinct specialization of the batched kernel.
+    weight = np.ones(toas.size)
+    measure("weighted", search, toas_mc, grid, "recurrence", harmonics, weight)
+    return timings
+
+
+def accuracy(
+    arrivals: List[float],
+    chi: float,
+    simulations: int = BLOCK,
+    seed: int = 0,
+    kernel: str = "auto",
+    harmonics: int = 1,
+    dtype: str = "float32",
+) -> Dict[str, float]:
+    """
+    Deviation of the maxima searched in a lower precision from float64.
+
+    Both precisions search the same random streams, see `simulate`.
+
+    Parameters
+    ----------
+    arrivals : List[float]
+        Observed times of arrival.
+    chi : float
         [description]
+    simulations : int, optional
+        Number of simulations to compare, by default `BLOCK`.
+    seed : int, optional
+        Root seed of the random streams, by default 0.
+    kernel : str, optional
+        One of `KERNELS`, by default "auto".
+    harmonics : int, optional
+        Largest number of harmonics, by default 1.
+    dtype : str, optional
+        Precision to compare, one of `DTYPES`, by default float32.
+
+    Returns
+    -------
+    Dict[str, float]
+        Largest absolute and relative deviation of the maximum Z^2_n, the
+        fraction of maxima found at another frequency, and the bin width of
+        a default `summary.Summary` of the maxima for comparison.
+    """
+    _, _, differences, minimum, maximum = parameters(arrivals, chi, simulations)
+    grid = frequency_grid()
+    reference, reference_index = search(
+        simulate(simulations, differences, minimum, maximum, seed),
+        grid,
+        kernel,
+        harmonics,
+    )
+    power, index = search(
+        simulate(simulations, differences, minimum, maximum, seed, dtype=dtype),
+        grid,
+        kernel,
+        harmonics,
+    )
+    deviation = np.abs(power[:, -1] - reference[:, -1])
+    report = dict(
+        absolute=float(deviation.max()),
+        relative=float(np.max(deviation / reference[:, -1])),
+        moved=float(np.mean(index[:, -1] != reference_index[:, -1])),
+        bin=2.0 * len(arrivals) * harmonics / summary.BINS,
+    )
+    log.debug(f"Accuracy of {dtype}: {report}")
+    return report
+
+
+def threads(processors: int = 1) -> int:
+    """
+    Set the number of threads used by the batched search kernels.
+
+    The count is capped at `NUMBA_NUM_THREADS`, so several jobs sharing a node
+    can each be limited to their share of cores through either the argument
+    or the environment.
+
+    Parameters
+    ----------
+    processors : int, optional
+        Number of threads to use, by default 1.
+
+    Returns
+    -------
+    int
+        Number of threads in use.
+
+    Raises
+    ------
+    ValueError
+        When processors is less than one.
+    """
+    if processors < 1:
+        raise ValueError(f"processors must be at least 1, got {processors}")
+    count = min(processors, config.NUMBA_NUM_THREADS)
+    set_num_threads(count)
+    return count
+
+
+def chunksize(toas: int, memory: float = MEMORY, dtype: str = "float64") -> int:
+    """
+    Number of simulations per chunk that fit in a memory budget.
+
+    Parameters
+    ----------
+    toas : int
+        Number of times of arrival per simulation.
+    memory : float, optional
+        Memory budget for a chunk in MB, by default `MEMORY`.
+    dtype : str, optional
+        Precision of the simulated TOAs, one of `DTYPES`, by default float64.
+
+    Returns
+    -------
+    int
+        Simulations per chunk, at least one and a multiple of `BLOCK` when
+        the budget allows.
     """
-    differences_mc = np.zeros((int(simulations), len(differences)))
-    toas_mc = np.zeros((int(simulations), len(differences) + 1))
-    errors_mc = np.zeros((int(simulations), len(differences) + 1))
+    # Simulated TOAs and, in double precision, differences, plus the maximum
+    # power and grid index.
+    arrays = 2 if np.dtype(dtype) == np.float64 else 1
+    row = np.dtype(dtype).itemsize * (arrays * toas) + np.dtype(np.int64).itemsize
+    size = max(1, int(memory * 2**20) // row)
+    # Align chunks with the random substreams, see `generator`.
+    if size > BLOCK:
+        size -= size % BLOCK
+    return size
 
-    for index in np.arange(0, int(simulations), 1):
-        differences_mc[index] = np.random.uniform(minimum, maximum, len(differences))
 
-    for index in np.arange(0, len(differences_mc), 1):
-        toas_mc[index, 1:] = np.cumsum(differences_mc[index, :])
+def chunks(simulations: int, size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+    """
+    Split the simulations into consecutive chunks.
 
-    return differences_mc, toas_mc, errors_mc
+    Parameters
+    ----------
+    simulations : int
+        Total number of simulations.
+    size : int
+        Maximum number of simulations per chunk.
+    start : int, optional
+        Index of the first simulation still to run, by default 0.
+
+    Yields
+    ------
+    Iterator[Tuple[int, int]]
+        Start index and number of simulations of each chunk.
+    """
+    for first in range(start, simulations, size):
+        yield first, min(size, simulations - first)
 
 
-def save(data: np.ndarray, savepath: Path) -> None:
+def save(data: np.ndarray, savepath: Path, **metadata) -> None:
     """
-    Save np.ndarray.
+    Atomically save np.ndarray.
 
     Parameters
     ----------
     data : np.ndarray
     savepath : Path
+    **metadata
+        Additional arrays to store alongside the data, e.g. the random seed.
+    """
+    with atomic(savepath, mode=0o100666) as temporary:
+        with open(temporary, "wb") as handle:
+            np.savez(handle, max_z12_power=data, **metadata)
+
+
+def maxima(max_z2n_power: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Arrays to save for the maxima of a run.
+
+    Parameters
+    ----------
+    max_z2n_power : np.ndarray
+        Maximum Z^2_m power of each simulation, shape (simulations,
+        harmonics).
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The Z^2_1 maxima as `max_z12_power`, and every maximum as
+        `max_z2n_power` when there are several harmonics.
+    """
+    results = dict(max_z12_power=max_z2n_power[:, 0])
+    if max_z2n_power.shape[1] > 1:
+        results["max_z2n_power"] = max_z2n_power
+    return results
+
+
+def checkpoint_path(savepath: Path) -> Path:
+    """
+    Path of the checkpoint kept next to the results of a run.
+
+    Parameters
+    ----------
+    savepath : Path
+        Path of the results.
+
+    Returns
+    -------
+    Path
+    """
+    return savepath.with_suffix(".checkpoint.npz")
+
+
+def metrics_path(savepath: Path) -> Path:
+    """
+    Path of the metrics kept next to the results of a run.
+
+    Parameters
+    ----------
+    savepath : Path
+        Path of the results.
+
+    Returns
+    -------
+    Path
+    """
+    return savepath.with_suffix(".metrics.jsonl")
+
+
+def describe(
+    arrivals: List[float],
+    chi: float,
+    seed: int,
+    start: int,
+    harmonics: int,
+    dtype: str,
+    observed: Optional[float] = None,
+    exceedances: int = 0,
+    completed: int = 0,
+    confidence: float = 0.95,
+    observation: Optional[Dict[str, Any]] = None,
+    uncertainty: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Inputs and false alarm probability saved alongside the results of a run.
+
+    Parameters
+    ----------
+    arrivals : List[float]
+    chi : float
+    seed : int
+    start : int
+    harmonics : int
+    dtype : str
+        Parameters of the run, see `execute`.
+    observed : Optional[float], optional
+        Observed statistic, by default None, no false alarm probability. The
+        false alarm probability is not estimated without any completed
+        simulations either.
+    exceedances : int, optional
+        Number of simulations at least as large as the observed statistic,
+        by default 0.
+    completed : int, optional
+        Number of completed simulations, by default 0.
+    confidence : float, optional
+        Confidence level of the false alarm probability interval, by default
+        0.95.
+    observation : Optional[Dict[str, Any]], optional
+        Periodogram of the observed times of arrival, see `observe`, by
+        default None.
+    uncertainty : Optional[Dict[str, Any]], optional
+        Uncertainties on the arrivals and how they were used, see `execute`,
+        by default None.
+
+    Returns
+    -------
+    Dict[str, Any]
+    """
+    outputs: Dict[str, Any] = dict(observation or {})
+    outputs.update(
+        arrivals=[float(arrival) for arrival in arrivals],
+        chi=chi,
+        seed=seed,
+        start=start,
+        block=BLOCK,
+        harmonics=harmonics,
+        dtype=dtype,
+        **(uncertainty or {}),
+    )
+    if observed is not None:
+        outputs.update(
+            observed=observed, exceedances=exceedances, confidence=confidence
+        )
+    if observed is not None and completed:
+        fap, lower, upper = significance.false_alarm_probability(
+            exceedances, completed, confidence
+        )
+        log.debug(f"False Alarm Probability: {fap} [{lower}, {upper}]")
+        outputs.update(fap=fap, interval=(lower, upper))
+    return outputs
+
+
+def save_checkpoint(
+    path: Path, results: Dict[str, np.ndarray], completed: int, seed: int, **metadata
+) -> None:
     """
-    filename = savepath.absolute().as_posix()
-    np.savez(filename, max_z12_power=data)
-    savepath.chmod(0o100666)
+    Atomically save the completed simulations of a run.
+
+    The random state is fully described by the seed and the number of
+    completed simulations, see `generator`.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the checkpoint.
+    results : Dict[str, np.ndarray]
+        Results of the completed simulations.
+    completed : int
+        Number of completed simulations.
+    seed : int
+        Root seed of the run.
+    **metadata
+        Settings of the run, compared when resuming, see `load_checkpoint`.
+        Their names are saved as `settings`.
+    """
+    with atomic(path) as temporary, open(temporary, "wb") as handle:
+        np.savez(
+            handle,
+            completed=completed,
+            seed=seed,
+            settings=np.array(sorted(metadata), dtype=str),
+            **results,
+            **metadata,
+        )
+
+
+def load_checkpoint(
+    path: Path, seed: Optional[int] = None, **metadata
+) -> Tuple[Dict[str, np.ndarray], int, int]:
+    """
+    Load the completed simulations of a run from its checkpoint.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the checkpoint.
+    seed : Optional[int], optional
+        Root seed of the run being resumed, taken from the checkpoint when
+        None, by default None.
+    **metadata
+        Settings of the run being resumed, which must be exactly those saved
+        with the checkpoint, see `save_checkpoint`.
+
+    Returns
+    -------
+    Tuple[Dict[str, np.ndarray], int, int]
+        Results, number of completed simulations and root seed.
+
+    Raises
+    ------
+    ValueError
+        When the checkpoint was written by a run with different settings, or
+        without some of the settings of the run being resumed.
+    """
+    with np.load(path) as state:
+        saved = state["settings"].tolist() if "settings" in state.files else []
+        for key in sorted(set(saved) | set(metadata)):
+            if key not in metadata or key not in saved:
+                raise ValueError(f"checkpoint {path} does not match the setting {key}")
+            if not np.array_equal(state[key], metadata[key]):
+                value = metadata[key]
+                raise ValueError(f"checkpoint {path} does not match {key}={value}")
+        if seed is not None and int(state["seed"]) != seed:
+            raise ValueError(f"checkpoint {path} does not match seed={seed}")
+        results = {key: state[key] for key in state.files}
+    return results, int(results["completed"]), int(results["seed"])
+
+
+@dataclass
+class Options:
+    """Settings of a run, shared by `execute` and `sweep`.
+
+    Attributes
+    ----------
+    debug : bool
+        Log at the debug level, by default False.
+    kernel : str
+        Search kernel, one of `KERNELS`, by default auto, see `search`.
+    memory : float
+        Memory budget in MB for each chunk of simulations, by default `MEMORY`.
+    processors : int
+        Number of threads to search each chunk with, by default 1.
+    seed : Optional[int]
+        Root seed of the random streams, drawn from the system when None.
+    start : int
+        Index of the first simulation, used to split a run across jobs that
+        share the same seed, by default 0.
+    interval : float
+        Seconds between checkpoints, by default `INTERVAL`, 0 to disable.
+    resume : bool
+        Continue from the checkpoint of a previous run, if any, by default
+        False.
+    summarize : bool
+        Save a `summary.Summary` rather than every maximum, by default False.
+    observed : Optional[float]
+        Observed statistic to count exceedances of, by default the best
+        statistic of the periodogram of the arrivals.
+    precision : Optional[float]
+        Relative half-width of the false alarm probability interval to stop
+        at, by default None.
+    threshold : Optional[float]
+        False alarm probability the interval must exceed to stop, by default
+        None.
+    confidence : float
+        Confidence level of the false alarm probability interval, by default
+        0.95.
+    harmonics : int
+        Largest number of harmonics of the Z^2_n statistic, by default 1.
+    dtype : str
+        Precision of the simulated TOAs, one of `DTYPES`, by default float64;
+        see `accuracy` for the effect of single precision.
+    metrics : bool
+        Also write the progress and per-stage metrics of the run next to the
+        savepath, see `metrics_path`, by default False.
+    cache : Optional[Path]
+        Directory of the cached results, by default None, no cache.
+    budget : float
+        Disk budget of the cache in MB, by default `BUDGET`.
+    chunked : bool
+        Write the maxima to a chunked directory rather than a single file,
+        by default False.
+    storage : str
+        Precision of the maxima in a chunked directory, one of
+        `chunked.STORAGE`, by default float64.
+    compress : bool
+        Compress the chunks of a chunked directory, by default False.
+    uncertainties : Optional[List[float]]
+        Uncertainty on each arrival in ms, by default None, exact arrivals.
+    jitter : bool
+        Offset the simulated arrivals by their uncertainties, by default
+        False.
+    weighted : bool
+        Weight the arrivals by their inverse variance in the search, by
+        default False.
+    heartbeat : Optional[Callable[[], None]]
+        Called after every chunk of simulations, e.g. to refresh the claim of
+        a queued job, see `workqueue.WorkQueue.touch`, by default None.
+    """
+
+    debug: bool = False
+    kernel: str = "auto"
+    memory: float = MEMORY
+    processors: int = 1
+    seed: Optional[int] = None
+    start: int = 0
+    interval: float = INTERVAL
+    resume: bool = False
+    summarize: bool = False
+    observed: Optional[float] = None
+    precision: Optional[float] = None
+    threshold: Optional[float] = None
+    confidence: float = 0.95
+    harmonics: int = 1
+    dtype: str = "float64"
+    metrics: bool = False
+    cache: Optional[Path] = None
+    budget: float = BUDGET
+    chunked: bool = False
+    storage: str = "float64"
+    compress: bool = False
+    uncertainties: Optional[List[float]] = None
+    jitter: bool = False
+    weighted: bool = False
+    heartbeat: Optional[Callable[[], None]] = None
+
+    def changed(self) -> List[str]:
+        """Names of the settings that differ from their defaults."""
+        return [
+            field.name
+            for field in fields(self)
+            if getattr(self, field.name) != field.default
+        ]
+
+
+def validate(arrivals: List[float], options: Options) -> None:
+    """
+    Check the settings of a run, shared by `execute` and `sweep`.
+
+    Parameters
+    ----------
+    arrivals : List[float]
+        Observed times of arrival.
+    options : Options
+        Settings of the run.
+
+    Raises
+    ------
+    ValueError
+        When the kernel or precision is not supported, `jitter` or `weighted`
+        lack `uncertainties`, there is not one uncertainty per arrival, or
+        `weighted` is combined with the pruned kernel.
+    """
+    if options.kernel not in KERNELS:
+        raise ValueError(f"kernel must be one of {KERNELS}, got {options.kernel}")
+    if options.harmonics < 1:
+        raise ValueError(f"harmonics must be at least 1, got {options.harmonics}")
+    if options.dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}, got {options.dtype}")
+    if (options.jitter or options.weighted) and options.uncertainties is None:
+        raise ValueError("jitter and weighted require the uncertainties")
+    uncertainties = options.uncertainties
+    if uncertainties is not None and len(uncertainties) != len(arrivals):
+        raise ValueError(f"{len(arrivals)} arrivals need as many uncertainties")
+    if options.weighted and options.kernel == "pruned":
+        raise ValueError("the pruned kernel does not support weights")
+
+
+def prepare(
+    toas: np.ndarray,
+    errors: np.ndarray,
+    grid: np.ndarray,
+    monitor: Metrics,
+    options: Options,
+) -> Tuple[Optional[np.ndarray], Dict[str, Any], Dict[str, Any], float, str]:
+    """
+    Search the observed arrivals and settle the search of the simulations.
+
+    Parameters
+    ----------
+    toas : np.ndarray
+        Observed times of arrival, see `parameters`.
+    errors : np.ndarray
+        Uncertainties of the arrivals, see `parameters`.
+    grid : np.ndarray
+        Frequency grid.
+    monitor : Metrics
+        Metrics of the run, timing the search as its observe stage.
+    options : Options
+        Settings of the run.
+
+    Returns
+    -------
+    Tuple[Optional[np.ndarray], Dict[str, Any], Dict[str, Any], float, str]
+        Weights of the arrivals, None when unweighted, the uncertainty
+        settings to record with the results, the observation, see `observe`,
+        the observed statistic and the kernel, with auto resolved.
+    """
+    weight = weights(errors) if options.weighted else None
+    uncertainty: Dict[str, Any] = {}
+    if options.uncertainties is not None:
+        uncertainty = dict(
+            uncertainties=[float(error) for error in options.uncertainties],
+            jitter=options.jitter,
+            weighted=options.weighted,
+        )
+    with monitor.stage("observe"):
+        observation = observe(toas, grid, options.harmonics, weight)
+    log.debug(f"Observed: {observation['statistic']} at {observation['period']} ms")
+    observed = options.observed
+    if observed is None:
+        observed = observation["statistic"]
+    kernel = options.kernel
+    if kernel == "auto":
+        kernel = nufft.select(len(toas), grid.size, options.harmonics)
+    log.debug(f"Kernel: {kernel}")
+    return weight, uncertainty, observation, observed, kernel
 
 
 def execute(
@@ -289,55 +1731,438 @@ def execute(
     chi: float,
     simulations: int,
     savepath: Path,
-    debug: bool = False,
+    options: Optional[Options] = None,
+    **settings: Any,
 ) -> None:
     """
     Run the simulation .
 
+    Simulations are generated and searched in chunks sized to fit within the
+    memory budget, so the inputs never have to be held in memory at once.
+    Completed chunks are checkpointed next to `savepath` every `interval`
+    seconds, and the checkpoint is removed once the results are saved. With
+    `summarize`, only a constant-size `summary.Summary` of the maxima is kept
+    and saved, instead of every maximum.
+
+    The periodogram of the observed arrivals is evaluated first, see
+    `observe`, and saved with the results, along with its best period and
+    statistic. The false alarm probability of the `observed` statistic, by
+    default that best statistic, is counted as the simulations stream in and
+    reported with the progress. Given `precision` or `threshold` goals, it is
+    checked after every chunk of at most `CHECK` simulations, and the run
+    stops early once `significance.converged`; only the completed
+    simulations are saved.
+
+    With several `harmonics`, the maximum Z^2_m over the grid is kept for
+    every number of harmonics m up to `harmonics`, and saved as
+    `max_z2n_power` alongside the Z^2_1 maxima in `max_z12_power`. The
+    summary and the observed statistic then refer to Z^2_n with n =
+    `harmonics`.
+
+    With a `cache` directory, the results are keyed by a digest of the
+    arrivals, chi, grid, statistic and first simulation, see `digest`, and
+    kept in the cache. A run already cached with at least `simulations` is
+    returned without searching, and a smaller one is topped up with only the
+    missing simulations, drawn from the next random streams of the cached
+    seed, see `generator`. The results are then those of a single run of
+    every simulation. A cached summary may hold more than `simulations`, and
+    the exceedances of a cached summary are interpolated, see
+    `summary.Summary.exceedances`.
+
+    With `chunked`, `savepath` is a directory in the `chunked.Chunked`
+    format, whose manifest records the inputs of the analysis. The maxima of
+    every chunk of simulations are appended to it as soon as they are
+    searched, so they are never held in memory, and several jobs sharing the
+    seed may write disjoint simulations into the same directory. A job
+    without a seed joins the seed of the directory. The appended chunks
+    replace the checkpoints, and a resumed run continues after the chunks
+    already written from `start`.
+
+    Given the `uncertainties` of the arrivals, `jitter` offsets every
+    simulated arrival by a normal deviate of its uncertainty, see `perturb`,
+    so the simulations share the timing noise of the observation, and
+    `weighted` weights the arrivals by their inverse variance in the search
+    of both the observation and the simulations, see `weights`. Neither
+    allocates more than a buffer of deviates or one weight per arrival.
+
     Parameters
     ----------
     arrivals : List[float]
-        [description]
+        Observed times of arrival in ms.
     chi : float
-        [description]
-    processors : int
-        [description]
+        Fraction of the mean separation of the arrivals by which they may
+        vary in the simulations.
     simulations : int
-        [description]
-    savepath: str
-        [description]
+        Number of simulations.
+    savepath : Path
+        Path of the results.
+    options : Optional[Options]
+        Settings of the run, by default those of `Options`.
+    **settings
+        Settings of `Options` that override those of `options`.
+
+    Raises
+    ------
+    ValueError
+        When the kernel or precision is not supported, the checkpoint to
+        resume from belongs to a different run, the chunked directory holds
+        another analysis, `chunked` is combined with `summarize` or a
+        `cache`, `jitter` or `weighted` lack `uncertainties`, there is not one
+        uncertainty per arrival, or `weighted` is combined with the pruned
+        kernel. A cached run with another seed than `seed` is not an error,
+        it is run again and replaces the cached one.
+    TypeError
+        When a setting is not one of `Options`.
     """
-    if debug:
+    options = replace(options or Options(), **settings)
+    seed = options.seed
+    validate(arrivals, options)
+    if options.chunked and (options.summarize or options.cache is not None):
+        raise ValueError("chunked outputs keep every maximum and are not cached")
+    if options.debug:
         log.setLevel(logging.DEBUG)
-    log.debug("Job Recieved: ✔️")
-    np.random.seed(random.SystemRandom().randint(0, 2147483647))
-    log.debug("Random Seed : ✔️")
-    grid = frequency_grid()
-    log.debug("Frequency Grid: ✔️")
-    toas, errors, differences, minimum, maximum = parameters(
+    log.debug(f"Threads: {threads(options.processors)}")
+    if options.chunked:
+        # Each job sharing a chunked directory keeps its own metrics in it.
+        savepath.mkdir(parents=True, exist_ok=True)
+        monitored = savepath / f"run_{options.start:012d}"
+    else:
+        monitored = savepath
+    monitor = Metrics(
+        simulations, path=metrics_path(monitored) if options.metrics else None
+    )
+    with monitor.stage("grid"):
+        grid = frequency_grid()
+    with monitor.stage("parameters"):
+        toas, errors, differences, minimum, maximum = parameters(
+            arrivals=arrivals,
+            chi=chi,
+            simulations=simulations,
+            uncertainties=options.uncertainties,
+        )
+    weight, uncertainty, observation, observed, kernel = prepare(
+        toas, errors, grid, monitor, options
+    )
+    size = chunksize(len(toas), options.memory, options.dtype)
+    if options.precision is not None or options.threshold is not None:
+        size = min(size, CHECK)
+    log.debug(f"Chunk Size: {size}")
+    # Z^2_n of N TOAs is at most 2Nn.
+    upper = 2.0 * len(toas) * options.harmonics
+    stats = summary.Summary(upper=upper) if options.summarize else None
+    kept = 0 if options.summarize or options.chunked else simulations
+    max_z2n_power = np.zeros((kept, options.harmonics))
+    completed = 0
+    checkpoint = checkpoint_path(savepath)
+    # Every setting that changes the results, compared when resuming.
+    metadata = dict(
         arrivals=arrivals,
         chi=chi,
         simulations=simulations,
+        start=options.start,
+        harmonics=options.harmonics,
+        dtype=options.dtype,
+        summarize=options.summarize,
+        observed=observed,
+        uncertainties=uncertainty.get("uncertainties", []),
+        jitter=options.jitter,
+        weighted=options.weighted,
+    )
+    exceedances = 0
+    cached = 0
+    store = Cache(options.cache, options.budget) if options.cache is not None else None
+    key = digest(
+        arrivals=[float(arrival) for arrival in arrivals],
+        chi=float(chi),
+        grid=grid,
+        start=options.start,
+        block=BLOCK,
+        harmonics=options.harmonics,
+        dtype=options.dtype,
+        summarize=options.summarize,
+        **uncertainty,
     )
-    log.debug("Parameters: ✔️")
-    differences_mc, toas_mc, errors_mc = simulate(
-        simulations, differences, minimum, maximum
+    if options.chunked:
+        if seed is None and is_chunked(savepath):
+            seed = int(Chunked(savepath).inputs["seed"])
+    elif options.resume and checkpoint.exists():
+        results, completed, seed = load_checkpoint(checkpoint, seed, **metadata)
+        if options.summarize:
+            stats = summary.Summary.from_arrays(results)
+        else:
+            name = "max_z2n_power" if options.harmonics > 1 else "max_z12_power"
+            max_z2n_power[:completed] = results[name].reshape(
+                completed, options.harmonics
+            )
+        exceedances = int(results.get("exceedances", 0))
+        log.debug(f"Resumed: {completed} simulations from {checkpoint}")
+    elif store is not None:
+        results = store.load(key)
+        if results is not None and seed in (None, int(results["seed"])):
+            seed = int(results["seed"])
+            if options.summarize:
+                stats = summary.Summary.from_arrays(results)
+                cached = completed = stats.count
+                exceedances = stats.exceedances(observed)
+            else:
+                name = "max_z2n_power" if options.harmonics > 1 else "max_z12_power"
+                powers = results[name].reshape(-1, options.harmonics)
+                cached = len(powers)
+                completed = min(cached, simulations)
+                max_z2n_power[:completed] = powers[:completed]
+                power = max_z2n_power[:completed, -1]
+                exceedances = int(np.count_nonzero(power >= observed))
+            log.debug(f"Cached: {cached} simulations in {store.path(key)}")
+    if seed is None:
+        seed = random.SystemRandom().randint(0, 2**63 - 1)
+    log.debug(f"Random Seed : {seed}")
+    if options.chunked:
+        writer = Chunked.create(
+            savepath,
+            columns=options.harmonics,
+            storage=options.storage,
+            compress=options.compress,
+            arrivals=[float(arrival) for arrival in arrivals],
+            chi=float(chi),
+            seed=seed,
+            block=BLOCK,
+            harmonics=options.harmonics,
+            dtype=options.dtype,
+            grid=dict(start=float(grid[0]), stop=float(grid[-1]), size=grid.size),
+            **uncertainty,
+        )
+        if options.resume:
+            completed = min(writer.contiguous(options.start), simulations)
+            for values in writer.chunks(options.start, options.start + completed):
+                exceedances += int(np.count_nonzero(values[:, -1] >= observed))
+            log.debug(f"Resumed: {completed} simulations from {savepath}")
+    monitor.resume(completed)
+    saved = time.monotonic()
+    for offset, count in chunks(simulations, size, completed):
+        with monitor.stage("simulate"):
+            toas_mc = simulate(
+                count,
+                differences,
+                minimum,
+                maximum,
+                seed,
+                options.start + offset,
+                options.dtype,
+            )
+        if options.jitter:
+            with monitor.stage("jitter"):
+                perturb(toas_mc, errors, seed, options.start + offset)
+        with monitor.stage("search"):
+            powers, max_index = search(toas_mc, grid, kernel, options.harmonics, weight)
+        power = powers[:, -1]
+        completed = offset + count
+        if options.summarize:
+            stats.update(power)
+        elif options.chunked:
+            with monitor.stage("append"):
+                writer.append(options.start + offset, powers)
+        else:
+            max_z2n_power[offset:completed] = powers
+        exceedances += int(np.count_nonzero(power >= observed))
+        monitor.progress(
+            completed, exceedances=exceedances, fap=exceedances / completed
+        )
+        if options.heartbeat is not None:
+            options.heartbeat()
+        if significance.converged(
+            exceedances,
+            completed,
+            options.precision,
+            options.threshold,
+            options.confidence,
+        ):
+            log.debug(f"Converged: {exceedances} in {completed} simulations")
+            break
+        if (
+            options.interval
+            and not options.chunked
+            and time.monotonic() - saved >= options.interval
+        ):
+            with monitor.stage("checkpoint"):
+                if options.summarize:
+                    results = stats.arrays()
+                else:
+                    results = maxima(max_z2n_power[:completed])
+                results["exceedances"] = np.asarray(exceedances)
+                save_checkpoint(checkpoint, results, completed, seed, **metadata)
+            saved = time.monotonic()
+            log.debug(f"Checkpoint: {completed} simulations")
+    monitor.progress(
+        completed,
+        force=True,
+        exceedances=exceedances,
+        fap=exceedances / completed if completed else None,
+    )
+    outputs = describe(
+        arrivals,
+        chi,
+        seed,
+        options.start,
+        options.harmonics,
+        options.dtype,
+        observed,
+        exceedances,
+        completed,
+        options.confidence,
+        observation,
+        uncertainty,
+    )
+    with monitor.stage("save"):
+        if options.summarize:
+            stats.save(savepath, **outputs)
+        elif options.chunked:
+            writer.record(simulations=completed, **outputs)
+        else:
+            results = maxima(max_z2n_power[:completed])
+            save(results.pop("max_z12_power"), savepath, **results, **outputs)
+    if checkpoint.exists():
+        checkpoint.unlink()
+    if store is not None and completed > cached:
+        with monitor.stage("cache"):
+            store.store(key, savepath)
+    monitor.close(
+        kernel=kernel, chunk=size, savepath=savepath.as_posix(), cached=cached
+    )
+
+
+def sweep(
+    arrivals: List[float],
+    chis: List[float],
+    simulations: int,
+    savepaths: List[Path],
+    options: Optional[Options] = None,
+    **settings: Any,
+) -> None:
+    """
+    Run the simulations of several chi in a single pass.
+
+    Each chunk of uniforms is drawn once, see `draw`, then realized and
+    searched for every chi. The chi therefore share common random numbers:
+    simulation i of every chi maps the same draws, so their distributions
+    are correlated and directly comparable, and the results of each chi are
+    bit-identical to those of `execute` with the same seed. The draws cost
+    the same whatever the number of chi.
+
+    Each chi is saved to its own path as by `execute`, with the periodogram
+    of the arrivals, without its checkpoints, caching, chunked directories
+    or early stopping.
+
+    Parameters
+    ----------
+    arrivals : List[float]
+        Observed times of arrival.
+    chis : List[float]
+        Values of chi to simulate.
+    simulations : int
+        Number of simulations of each chi.
+    savepaths : List[Path]
+        Path of the results of each chi.
+    options : Optional[Options]
+        Settings of the run, among `SWEEP`, by default those of `Options`.
+        The memory budget also holds the draws, the jitter is drawn again for
+        each chi, and the metrics are written next to the first savepath.
+    **settings
+        Settings of `Options` that override those of `options`.
+
+    Raises
+    ------
+    ValueError
+        When a setting other than `SWEEP` is changed, the kernel or precision
+        is not supported, there is not one savepath per chi, or the
+        uncertainties are not supported, see `execute`.
+    TypeError
+        When a setting is not one of `Options`.
+    """
+    options = replace(options or Options(), **settings)
+    seed = options.seed
+    unsupported = [name for name in options.changed() if name not in SWEEP]
+    if unsupported:
+        raise ValueError(f"a sweep does not support {unsupported}")
+    if len(chis) != len(savepaths):
+        raise ValueError(f"{len(chis)} chi need as many savepaths, got {savepaths}")
+    validate(arrivals, options)
+    if options.debug:
+        log.setLevel(logging.DEBUG)
+    log.debug(f"Threads: {threads(options.processors)}")
+    path = metrics_path(savepaths[0]) if options.metrics else None
+    monitor = Metrics(simulations, path=path)
+    with monitor.stage("grid"):
+        grid = frequency_grid()
+    with monitor.stage("parameters"):
+        settings = [
+            parameters(arrivals, chi, simulations, options.uncertainties)
+            for chi in chis
+        ]
+    toas, errors, differences, _, _ = settings[0]
+    # The observed arrivals are the same whatever chi.
+    weight, uncertainty, observation, observed, kernel = prepare(
+        toas, errors, grid, monitor, options
+    )
+    # The draws and the TOAs of one chi take at most two double arrays.
+    size = chunksize(len(toas), options.memory)
+    log.debug(f"Chunk Size: {size}")
+    upper = 2.0 * len(toas) * options.harmonics
+    stats = [summary.Summary(upper=upper) for _ in chis] if options.summarize else []
+    kept = 0 if options.summarize else simulations
+    max_z2n_power = np.zeros((len(chis), kept, options.harmonics))
+    exceedances = np.zeros(len(chis), dtype=np.int64)
+    if seed is None:
+        seed = random.SystemRandom().randint(0, 2**63 - 1)
+    log.debug(f"Random Seed : {seed}")
+    for offset, count in chunks(simulations, size):
+        with monitor.stage("draw"):
+            uniforms = draw(count, len(differences), seed, options.start + offset)
+        for index, (_, _, _, minimum, maximum) in enumerate(settings):
+            with monitor.stage("simulate"):
+                toas_mc = realize(uniforms, minimum, maximum, options.dtype)
+            if options.jitter:
+                with monitor.stage("jitter"):
+                    perturb(toas_mc, errors, seed, options.start + offset)
+            with monitor.stage("search"):
+                powers, _ = search(toas_mc, grid, kernel, options.harmonics, weight)
+            if options.summarize:
+                stats[index].update(powers[:, -1])
+            else:
+                max_z2n_power[index, offset:][:count] = powers
+            exceedances[index] += np.count_nonzero(powers[:, -1] >= observed)
+        completed = offset + count
+        monitor.progress(
+            completed,
+            exceedances=exceedances.tolist(),
+            fap=(exceedances / completed).tolist(),
+        )
+        if options.heartbeat is not None:
+            options.heartbeat()
+    monitor.progress(
+        simulations,
+        force=True,
+        exceedances=exceedances.tolist(),
+        fap=(exceedances / simulations).tolist() if simulations else None,
     )
-    log.debug("Dataset: ✔️")
-    max_z12_power = np.zeros(len(toas_mc))
-
-    for index in tqdm(
-        np.arange(0, len(toas_mc), 1),
-        ascii=True,
-        desc="simulating",
-        leave=True,
-    ):
-        toa = toas_mc[index]
-        error = errors_mc[index]
-        z1 = z2search(toa, error, grid)
-        max_index = np.argmax(z1)
-        max_period = 1.0 / grid[max_index]  # noqa: F841
-        max_z12_power[index] = z1[max_index]
-    log.debug("Simulations: ✔️")
-    save(max_z12_power, savepath)
-    log.debug("Save: ✔️")
+    with monitor.stage("save"):
+        for index, (chi, savepath) in enumerate(zip(chis, savepaths)):
+            outputs = describe(
+                arrivals,
+                chi,
+                seed,
+                options.start,
+                options.harmonics,
+                options.dtype,
+                observed,
+                int(exceedances[index]),
+                simulations,
+                options.confidence,
+                observation,
+                uncertainty,
+            )
+            if options.summarize:
+                stats[index].save(savepath, **outputs)
+            else:
+                results = maxima(max_z2n_power[index])
+                save(results.pop("max_z12_power"), savepath, **results, **outputs)
+    monitor.close(kernel=kernel, chunk=size, chis=list(chis))
@@ -1,13 +1,26 @@
 """Sample RESTful Framework."""
+import asyncio
+from typing import Optional
+
 from sanic import Blueprint
 from sanic.request import Request
 from sanic.response import HTTPResponse, json
 from sanic_openapi import doc
 
-from subpulse.routines import composite, simple
+from subpulse.routines import composite, jobs, simple
 
 # NOTE: The URL Prefix for your backend has to be the name of the backend
 blueprint = Blueprint("subpulse Backend", url_prefix="/")
+# Analyses submitted to this server, run in a pool of background processes,
+# created when the server starts.
+analyses: Optional[jobs.Jobs] = None
+
+
+@blueprint.listener("before_server_start")
+async def start_jobs(app, loop) -> None:
+    """Create the analyses, and their directory, when the server starts."""
+    global analyses
+    analyses = jobs.Jobs(jobs.directory())
 
 
 @doc.summary("Hello from /subpulse!")
@@ -61,3 +74,92 @@ async def get_composite(request: Request) -> HTTPResponse:
     """
     example = composite.Composite(1.0, 10.0, "hex")
     return json(example.get_random_integer())
+
+
+@doc.summary("Submit a TOA analysis")
+@blueprint.post("/toa")
+async def post_toa(request: Request) -> HTTPResponse:
+    """Submit a time of arrival analysis to run in the background.
+
+    The body holds the arrivals, chi and simulations of the analysis, and
+    optionally any of `jobs.OPTIONS`.
+
+    Parameters
+    ----------
+    request : Request
+        Request object from sanic app
+
+    Returns
+    -------
+    HTTPResponse
+        The id of the analysis, 202 when accepted, 400 when the parameters
+        are invalid and 503 when the queue of analyses is full.
+    """
+    try:
+        body = request.json or {}
+        if not isinstance(body, dict):
+            raise TypeError("the body must be a JSON object")
+        body = dict(body)
+        identifier = analyses.submit(
+            body.pop("arrivals"), body.pop("chi"), body.pop("simulations"), **body
+        )
+    except (KeyError, TypeError, ValueError) as error:
+        return json({"error": f"invalid parameters: {error}"}, status=400)
+    except jobs.Full as error:
+        return json({"error": str(error)}, status=503)
+    loop = asyncio.get_running_loop()
+    status = await loop.run_in_executor(None, analyses.status, identifier)
+    return json(status, status=202)
+
+
+@doc.summary("Status of a TOA analysis")
+@blueprint.get("/toa/<identifier>")
+async def get_toa(request: Request, identifier: str) -> HTTPResponse:
+    """State and progress of a time of arrival analysis.
+
+    Parameters
+    ----------
+    request : Request
+        Request object from sanic app
+    identifier : str
+        Id of the analysis.
+
+    Returns
+    -------
+    HTTPResponse
+        The status of the analysis, or 404 when unknown.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        # Reading the progress of the analysis blocks on the filesystem.
+        return json(await loop.run_in_executor(None, analyses.status, identifier))
+    except KeyError:
+        return json({"error": f"unknown analysis {identifier}"}, status=404)
+
+
+@doc.summary("Result of a TOA analysis")
+@blueprint.get("/toa/<identifier>/result")
+async def get_toa_result(request: Request, identifier: str) -> HTTPResponse:
+    """Result of a finished time of arrival analysis.
+
+    Parameters
+    ----------
+    request : Request
+        Request object from sanic app
+    identifier : str
+        Id of the analysis.
+
+    Returns
+    -------
+    HTTPResponse
+        The result of the analysis, 404 when unknown and 409 when it has not
+        finished successfully.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        # Loading the summary of the analysis blocks on the filesystem.
+        return json(await loop.run_in_executor(None, analyses.result, identifier))
+    except KeyError:
+        return json({"error": f"unknown analysis {identifier}"}, status=404)
+    except ValueError as error:
+        return json({"error": str(error)}, status=409)
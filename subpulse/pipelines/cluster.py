@@ -1,11 +1,17 @@
 """Sample Pipeline."""
+import random
 import time
+from pathlib import Path
+from typing import Optional, Tuple
 
 import click
-from chime_frb_api import frb_master
 
+from subpulse.pipelines import executors
+from subpulse.utilities import workqueue
 from subpulse.utilities.options import PythonLiteralOption
 
+SCHEDULERS = ["static", "queue"]
+
 
 @click.command()
 @click.option("--event", help="CHIME/FRB Event Number", required=True, type=click.INT)
@@ -15,7 +21,14 @@ from subpulse.utilities.options import PythonLiteralOption
     cls=PythonLiteralOption,
     required=True,
 )
-@click.option("--chi", default=0.0, show_default=True, type=click.FLOAT)
+@click.option(
+    "--chi",
+    help="Repeat to sweep several chi in one pass over common random numbers.",
+    default=[0.0],
+    show_default=True,
+    multiple=True,
+    type=click.FLOAT,
+)
 @click.option(
     "--simulations",
     help="Number of total simulations to run.",
@@ -25,44 +38,157 @@ from subpulse.utilities.options import PythonLiteralOption
     type=click.INT,
 )
 @click.option("--jobs", help="Number of jobs to spawn.", type=click.INT, required=True)
+@click.option(
+    "--scheduler",
+    help="Split the simulations equally between jobs, or into a queue of chunks.",
+    default="static",
+    show_default=True,
+    type=click.Choice(SCHEDULERS),
+)
+@click.option(
+    "--chunk",
+    help="Number of simulations per chunk of the queue.",
+    default=workqueue.CHUNK,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--timeout",
+    help="Seconds without progress after which a chunk of the queue is reassigned.",
+    default=workqueue.TIMEOUT,
+    show_default=True,
+    type=click.FloatRange(min=0),
+)
+@click.option(
+    "--cpus",
+    help="Number of CPUs reserved for, and threads used by, each job.",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--executor",
+    help="Run the jobs on the CHIME/FRB cluster, or as local processes.",
+    default="swarm",
+    show_default=True,
+    type=click.Choice(list(executors.EXECUTORS)),
+)
+@click.option(
+    "--cores",
+    help="Cores shared by the local jobs, by default every core.",
+    default=None,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--chunked",
+    help="Have every job append its maxima to one chunked directory.",
+    default=False,
+    show_default=True,
+    type=click.BOOL,
+)
+@click.option(
+    "--errors",
+    help="List of uncertainties on the TOAs, e.g. '[0.5, 0.8]' ",
+    cls=PythonLiteralOption,
+    default=None,
+    required=False,
+)
+@click.option(
+    "--jitter",
+    help="Offset the simulated TOAs by normal deviates of their --errors.",
+    default=False,
+    show_default=True,
+    type=click.BOOL,
+)
+@click.option(
+    "--weighted",
+    help="Weight the TOAs by the inverse variance of their --errors.",
+    default=False,
+    show_default=True,
+    type=click.BOOL,
+)
 def run(
     event: int,
     arrivals: list,
-    chi: float,
+    chi: Tuple[float, ...],
     jobs: int,
     simulations: int,
+    scheduler: str = "static",
+    chunk: int = workqueue.CHUNK,
+    timeout: float = workqueue.TIMEOUT,
+    cpus: int = 1,
+    executor: str = "swarm",
+    cores: Optional[int] = None,
+    chunked: bool = False,
+    errors: Optional[list] = None,
+    jitter: bool = False,
+    weighted: bool = False,
 ) -> None:
-    """Run the subpulse analysis on the CHIME/FRB Cluster."""
+    """Run the subpulse analysis on the CHIME/FRB Cluster, or locally."""
+    if chunked and len(chi) > 1:
+        # Checked before spawning, rather than failing in every job.
+        raise click.UsageError("a sweep of several --chi does not support --chunked")
     click.echo("Running Subpulse TOA Analysis")
     click.echo(f"Parameters : {locals()}")
     fingerprint = int(time.time())
     click.echo(f"Fingerprint: {fingerprint}")
+    # All jobs share one root seed and draw disjoint ranges of simulations.
+    seed = random.SystemRandom().randint(0, 2**63 - 1)
+    click.echo(f"Seed: {seed}")
+
+    if executor == "local":
+        # Logs are kept next to the outputs of the local jobs, see pipeline.
+        logs = Path.cwd() / f"{event}/{fingerprint}/logs"
+        backend = executors.LocalExecutor(logs, cores)
+    else:
+        backend = executors.SwarmExecutor()
 
-    master = frb_master.FRBMaster()
-    click.echo(f"Backend: {master.version()}")
+    uncertainty = []
+    if errors is not None:
+        uncertainty = ["--errors", f"{errors}", "--jitter", f"{jitter}"]
+        uncertainty += ["--weighted", f"{weighted}"]
 
     for job in range(jobs):
-        response = master.swarm.spawn_job(
-            job_name=f"subpulse-toa-{event}-{job}",
-            image_name="chimefrb/subpulse",
-            command=["python"],
-            arguments=[
-                "/src/subpulse/pipelines/pipeline.py",
+        if scheduler == "queue":
+            # Every job pulls chunks of the whole run until none are left.
+            share, start = simulations, 0
+            scheduling = ["--queue", f"{True}", "--chunk", f"{chunk}"]
+            scheduling += ["--timeout", f"{timeout}"]
+        else:
+            # The first jobs take one more simulation each for the remainder.
+            base, remainder = divmod(simulations, jobs)
+            share = base + (job < remainder)
+            start = job * base + min(job, remainder)
+            scheduling = []
+        backend.spawn(
+            f"subpulse-toa-{event}-{job}",
+            [
                 "--event",
                 f"{event}",
                 "--arrivals",
                 f"{arrivals}",
-                "--chi",
-                f"{chi}",
+                *[argument for value in chi for argument in ("--chi", f"{value}")],
                 "--simulations",
-                f"{int(simulations/jobs)}",
+                f"{share}",
                 "--fingerprint",
                 f"{fingerprint}",
                 "--cluster",
-                f"{True}",
+                f"{backend.cluster}",
                 "--job",
                 f"{job}",
+                "--seed",
+                f"{seed}",
+                "--start",
+                f"{start}",
+                "--processors",
+                f"{cpus}",
+                "--chunked",
+                f"{chunked}",
+                *uncertainty,
+                *scheduling,
             ],
-            job_cpu_limit=1,
-            job_cpu_reservation=1,
+            cpus,
         )
+    backend.wait()
+    if executor == "local":
+        backend.monitor(f"subpulse-toa-{event}-")
@@ -0,0 +1,197 @@
+"""Backends that spawn and monitor the pipeline jobs of a distributed run."""
+import abc
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+
+import subpulse
+
+# Default number of seconds between checks on local jobs.
+POLL: float = 1.0
+
+
+class Executor(abc.ABC):
+    """Spawns `pipeline.py` jobs and reports on them.
+
+    Subclasses implement `spawn` and `monitor` for a backend, see
+    `EXECUTORS`.
+    """
+
+    #: Whether the jobs write their outputs on the CHIME/FRB cluster storage.
+    cluster: bool = False
+
+    @abc.abstractmethod
+    def spawn(self, name: str, arguments: List[str], cpus: int = 1) -> None:
+        """Start a pipeline job.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job.
+        arguments : List[str]
+            Command line arguments of `pipeline.py`.
+        cpus : int, optional
+            Number of CPUs for the job, by default 1.
+        """
+
+    def wait(self) -> None:
+        """Wait for the spawned jobs to finish, where the backend allows."""
+
+    @abc.abstractmethod
+    def monitor(self, pattern: str) -> None:
+        """Report on the jobs whose name matches a pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            Regex pattern of the job names.
+        """
+
+
+class SwarmExecutor(Executor):
+    """Jobs run as docker swarm services on the CHIME/FRB cluster."""
+
+    cluster = True
+
+    def __init__(self, image: str = "chimefrb/subpulse"):
+        """Initialization.
+
+        Parameters
+        ----------
+        image : str, optional
+            Docker image of the jobs, by default "chimefrb/subpulse".
+        """
+        from chime_frb_api import frb_master
+
+        self.image = image
+        self.master = frb_master.FRBMaster()
+        click.echo(f"Backend: {self.master.version()}")
+
+    def spawn(self, name: str, arguments: List[str], cpus: int = 1) -> None:
+        """Start a pipeline job as a swarm service, see `Executor.spawn`."""
+        self.master.swarm.spawn_job(
+            job_name=name,
+            image_name=self.image,
+            command=["python"],
+            arguments=["/src/subpulse/pipelines/pipeline.py", *arguments],
+            job_cpu_limit=cpus,
+            job_cpu_reservation=cpus,
+        )
+
+    def monitor(self, pattern: str) -> None:
+        """Monitor the swarm services, see `Executor.monitor`."""
+        self.master.swarm.monitor_jobs(pattern)
+
+
+class LocalExecutor(Executor):
+    """Jobs run as processes on this machine, within a number of cores.
+
+    The output of each job, including its JSON lines metrics, is written to
+    `<name>.log` in the log directory, and its exit code to `<name>.exit`
+    once it finishes, which is what `monitor` reports on.
+    """
+
+    def __init__(self, directory: Path, cores: Optional[int] = None):
+        """Initialization.
+
+        Parameters
+        ----------
+        directory : Path
+            Directory of the job logs.
+        cores : Optional[int], optional
+            Number of cores the running jobs may reserve between them, by
+            default every core of the machine.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.cores = cores or os.cpu_count() or 1
+        self.running: Dict[str, tuple] = {}
+
+    def spawn(self, name: str, arguments: List[str], cpus: int = 1) -> None:
+        """Start a pipeline job once enough cores are free.
+
+        See `Executor.spawn`.
+        """
+        cpus = min(cpus, self.cores)
+        while sum(job[1] for job in self.running.values()) + cpus > self.cores:
+            self.poll()
+            time.sleep(POLL)
+        environment = dict(os.environ, NUMBA_NUM_THREADS=str(cpus))
+        # Run the same checkout of the package as the parent process.
+        source = Path(subpulse.__file__).parents[1].as_posix()
+        paths = [source, environment.get("PYTHONPATH", "")]
+        environment["PYTHONPATH"] = os.pathsep.join(filter(None, paths))
+        log = open(self.directory / f"{name}.log", "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "subpulse.pipelines.pipeline", *arguments],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env=environment,
+        )
+        self.running[name] = (process, cpus, log)
+
+    def poll(self) -> None:
+        """Record the exit code of every finished job."""
+        for name, (process, _, log) in list(self.running.items()):
+            if process.poll() is not None:
+                log.close()
+                (self.directory / f"{name}.exit").write_text(f"{process.returncode}\n")
+                del self.running[name]
+
+    def wait(self) -> None:
+        """Wait for the spawned jobs to finish, see `Executor.wait`."""
+        while self.running:
+            self.poll()
+            if self.running:
+                time.sleep(POLL)
+
+    def status(self, pattern: str = ".*") -> Dict[str, Dict]:
+        """State and last progress of the jobs with logs in the directory.
+
+        Parameters
+        ----------
+        pattern : str, optional
+            Regex pattern of the job names, by default every job.
+
+        Returns
+        -------
+        Dict[str, Dict]
+            For each job, its state, one of "running", "done" or "failed",
+            and its last progress record, if any.
+        """
+        jobs = {}
+        for path in sorted(self.directory.glob("*.log")):
+            name = path.stem
+            if not re.search(pattern, name):
+                continue
+            code = self.directory / f"{name}.exit"
+            state = "running"
+            if code.exists():
+                state = "done" if code.read_text().strip() == "0" else "failed"
+            progress = {}
+            for line in path.read_text().splitlines():
+                if line.startswith("{"):
+                    record = json.loads(line)
+                    if record.get("event") == "progress":
+                        progress = record
+            jobs[name] = dict(progress, state=state)
+        return jobs
+
+    def monitor(self, pattern: str) -> None:
+        """Print the status of the local jobs, see `Executor.monitor`."""
+        for name, job in self.status(pattern).items():
+            line = f"{name}: {job['state']}"
+            if "completed" in job:
+                line += f", {job['completed']}/{job['total']} simulations"
+                line += f", {job['rate']:.0f} sims/s"
+            click.echo(line)
+
+
+EXECUTORS: Dict[str, type] = {"swarm": SwarmExecutor, "local": LocalExecutor}
@@ -1,13 +1,19 @@
 """Sample Pipeline."""
 
+import dataclasses
+import functools
 import logging
 import os
 import time
 from pathlib import Path
+from typing import Callable, Optional, Tuple
 
 import click
 
 from subpulse.analysis import toa
+from subpulse.utilities import workqueue
+from subpulse.utilities.cache import BUDGET
+from subpulse.utilities.chunked import STORAGE
 from subpulse.utilities.options import PythonLiteralOption
 
 LOG_FORMAT: str = "[%(asctime)s] %(levelname)s "
@@ -25,7 +31,13 @@ log = logging.getLogger(__name__)
     cls=PythonLiteralOption,
     required=True,
 )
-@click.option("--chi", default=0.0, type=click.FLOAT)
+@click.option(
+    "--chi",
+    help="Repeat to sweep several chi in one pass over common random numbers.",
+    default=[0.0],
+    multiple=True,
+    type=click.FLOAT,
+)
 @click.option(
     "--simulations",
     help="Number of total simulations to run.",
@@ -52,17 +64,225 @@ log = logging.getLogger(__name__)
 @click.option(
     "--debug", help="Change logging level to debug.", default=False, type=click.BOOL
 )
+@click.option(
+    "--kernel",
+    help="Z^2 search kernel, auto picks by problem size.",
+    default="auto",
+    type=click.Choice(toa.KERNELS),
+    required=False,
+)
+@click.option(
+    "--memory",
+    help="Memory budget in MB for each chunk of simulations.",
+    default=toa.MEMORY,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--processors",
+    help="Number of threads to run the simulations on.",
+    default=1,
+    type=click.IntRange(min=1),
+    required=False,
+)
+@click.option(
+    "--seed",
+    help="Root seed of the random streams, drawn from the system by default.",
+    default=None,
+    type=click.INT,
+    required=False,
+)
+@click.option(
+    "--start",
+    help="Index of the first simulation, for jobs sharing a seed.",
+    default=0,
+    type=click.IntRange(min=0),
+    required=False,
+)
+@click.option(
+    "--interval",
+    help="Seconds between checkpoints, 0 to disable.",
+    default=toa.INTERVAL,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--resume",
+    help="Resume from the last checkpoint of the same job.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--summarize",
+    help="Save a constant-size summary instead of every maximum.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--observed",
+    help="Observed Z^2 statistic, by default the best of the arrivals.",
+    default=None,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--precision",
+    help="Stop once the FAP interval half-width is within this fraction.",
+    default=None,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--threshold",
+    help="Stop once the FAP interval lies entirely above this probability.",
+    default=None,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--confidence",
+    help="Confidence level of the FAP interval.",
+    default=0.95,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--harmonics",
+    help="Largest number of harmonics of the Z^2_n statistic.",
+    default=1,
+    type=click.IntRange(min=1),
+    required=False,
+)
+@click.option(
+    "--dtype",
+    help="Precision of the simulated TOAs, float32 halves their memory.",
+    default="float64",
+    type=click.Choice(toa.DTYPES),
+    required=False,
+)
+@click.option(
+    "--metrics",
+    help="Also write the JSON lines metrics to a file next to the output.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--queue",
+    help="Pull chunks of the simulations from a queue shared by the jobs.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--chunk",
+    help="Number of simulations per chunk of the queue.",
+    default=workqueue.CHUNK,
+    type=click.IntRange(min=1),
+    required=False,
+)
+@click.option(
+    "--timeout",
+    help="Seconds without progress after which a chunk of the queue is reassigned.",
+    default=workqueue.TIMEOUT,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--cache",
+    help="Directory of cached results, reused and topped up across runs.",
+    default=None,
+    type=click.Path(file_okay=False),
+    required=False,
+)
+@click.option(
+    "--budget",
+    help="Disk budget in MB of the cache, least recently used results are evicted.",
+    default=BUDGET,
+    type=click.FLOAT,
+    required=False,
+)
+@click.option(
+    "--chunked",
+    help="Append the maxima to a chunked directory shared by the jobs.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--storage",
+    help="Precision of the maxima in a chunked directory.",
+    default="float64",
+    type=click.Choice(STORAGE),
+    required=False,
+)
+@click.option(
+    "--compress",
+    help="Compress the chunks of a chunked directory.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--errors",
+    help="List of uncertainties on the TOAs, e.g. '[0.5, 0.8]' ",
+    cls=PythonLiteralOption,
+    default=None,
+    required=False,
+)
+@click.option(
+    "--jitter",
+    help="Offset the simulated TOAs by normal deviates of their --errors.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
+@click.option(
+    "--weighted",
+    help="Weight the TOAs by the inverse variance of their --errors.",
+    default=False,
+    type=click.BOOL,
+    required=False,
+)
 def run(
     event: int,
     arrivals: list,
-    chi: float,
+    chi: Tuple[float, ...],
     simulations: int,
     fingerprint: int = int(time.time()),
     cluster: bool = False,
     job: int = 0,
     debug: bool = False,
+    kernel: str = "auto",
+    memory: float = toa.MEMORY,
+    processors: int = 1,
+    seed: Optional[int] = None,
+    start: int = 0,
+    interval: float = toa.INTERVAL,
+    resume: bool = False,
+    summarize: bool = False,
+    observed: Optional[float] = None,
+    precision: Optional[float] = None,
+    threshold: Optional[float] = None,
+    confidence: float = 0.95,
+    harmonics: int = 1,
+    dtype: str = "float64",
+    metrics: bool = False,
+    queue: bool = False,
+    chunk: int = workqueue.CHUNK,
+    timeout: Optional[float] = workqueue.TIMEOUT,
+    cache: Optional[str] = None,
+    budget: float = BUDGET,
+    chunked: bool = False,
+    storage: str = "float64",
+    compress: bool = False,
+    errors: Optional[list] = None,
+    jitter: bool = False,
+    weighted: bool = False,
 ) -> None:
-    """Run single-thread subpulse analysis."""
+    """Run subpulse analysis."""
     if os.environ.get("DEBUG", False) or debug:
         log.setLevel(logging.DEBUG)
     else:
@@ -78,18 +298,91 @@ def run(
             f"/data/chime/intensity/processed/subpulse/{event}/{fingerprint}"
         )
         base_path.mkdir(parents=True, exist_ok=True)
-        filename = f"mc_{event}_nsim{simulations}_chi%.2f_{job}.npz" % chi
 
     else:
         base_path = Path.cwd() / f"{event}/{fingerprint}"
         base_path.mkdir(parents=True, exist_ok=True)
-        filename = f"mc_{event}_nsim{simulations}_chi%.2f_{job}.npz" % chi
 
     log.debug(f"Base Path: {base_path}")
-    log.debug(f"Filename : {filename}")
-    savepath = base_path.absolute().joinpath(filename)
-    log.debug("TOA Analysis: Started...")
-    toa.execute(arrivals, chi, simulations, savepath, debug)
+    options = toa.Options(
+        debug=debug,
+        kernel=kernel,
+        memory=memory,
+        processors=processors,
+        seed=seed,
+        start=start,
+        interval=interval,
+        resume=resume,
+        summarize=summarize,
+        observed=observed,
+        precision=precision,
+        threshold=threshold,
+        confidence=confidence,
+        harmonics=harmonics,
+        dtype=dtype,
+        metrics=metrics,
+        cache=Path(cache) if cache else None,
+        budget=budget,
+        chunked=chunked,
+        storage=storage,
+        compress=compress,
+        uncertainties=errors,
+        jitter=jitter,
+        weighted=weighted,
+    )
+    unsupported = [name for name in options.changed() if name not in toa.SWEEP]
+    if len(chi) > 1 and unsupported:
+        raise click.UsageError(
+            f"a sweep of several --chi does not support {unsupported}"
+        )
+
+    def analyse(
+        count: int, first: int, label: int, heartbeat: Optional[Callable] = None
+    ) -> None:
+        """Run `count` simulations from `first`, saved under a job or chunk."""
+        savepaths = [
+            base_path.absolute().joinpath(
+                f"mc_{event}_chi%.2f" % value
+                if chunked
+                else f"mc_{event}_nsim{count}_chi%.2f_{label}.npz" % value
+            )
+            for value in chi
+        ]
+        log.debug(f"Filenames : {[path.name for path in savepaths]}")
+        settings = dict(start=first, heartbeat=heartbeat)
+        if len(chi) > 1:
+            # A sweep only takes the settings it supports, see `toa.SWEEP`.
+            sweep = toa.Options(**{name: getattr(options, name) for name in toa.SWEEP})
+            toa.sweep(arrivals, list(chi), count, savepaths, sweep, **settings)
+        else:
+            toa.execute(arrivals, chi[0], count, savepaths[0], options, **settings)
+
+    if queue:
+        if seed is None:
+            raise click.UsageError("--queue requires the --seed shared by the jobs")
+        # Chunks are numbered after the simulations of the whole run, and a
+        # chunk taken over from a lost worker resumes from its checkpoint.
+        options = dataclasses.replace(options, resume=True)
+        work = workqueue.WorkQueue(
+            base_path / "queue", simulations, chunk, timeout, f"{job}-{os.getpid()}"
+        )
+        log.debug("TOA Analysis: Started...")
+        for index, first, count in work.claims():
+            log.debug(f"Chunk {index}: {count} simulations from {start + first}")
+            analyse(count, start + first, index, functools.partial(work.touch, index))
+            work.complete(index)
+        unfinished = work.unfinished()
+        if unfinished:
+            # Without a timeout, chunks claimed by other jobs are not waited
+            # for, and are lost with their jobs.
+            click.echo(
+                f"Warning: {len(unfinished)} of {work.chunks} chunks are not done, "
+                f"see {work.directory}"
+            )
+        log.debug(f"Queue: {work.status()}")
+    else:
+        log.debug("TOA Analysis: Started...")
+        analyse(simulations, start, job)
     log.debug("TOA Analysis: Completed")
 
 
@@ -0,0 +1,281 @@
+"""Time of arrival analyses run in the background for the backend."""
+import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from subpulse.analysis import seed, summary, toa
+
+# Default number of analyses run at once.
+WORKERS: int = 2
+# Default number of analyses running or waiting before submissions are refused.
+QUEUE: int = 8
+# Largest number of simulations of a single submission.
+SIMULATIONS: int = 10**9
+# Settings of `toa.Options` that may be set by a submission.
+OPTIONS: List[str] = [
+    "kernel",
+    "seed",
+    "observed",
+    "precision",
+    "threshold",
+    "confidence",
+    "harmonics",
+    "uncertainties",
+    "jitter",
+    "weighted",
+]
+# Scalar outputs of `toa.execute` reported with the result.
+SCALARS: List[str] = [
+    "seed",
+    "harmonics",
+    "statistic",
+    "period",
+    "frequency",
+    "observed",
+    "exceedances",
+    "fap",
+]
+# Quantiles of the simulated maxima reported with the result.
+QUANTILES: List[float] = [0.5, 0.9, 0.99, 0.999]
+
+
+class Full(Exception):
+    """Raised when the queue of analyses is full."""
+
+
+class Jobs:
+    """Analyses submitted to a pool of processes.
+
+    Each analysis runs `toa.execute` in its own process, so the caller is
+    never blocked, and saves a `summary.Summary` and its metrics, see
+    `toa.metrics_path`, in the directory under the job id. Results are
+    cached in the `cache` subdirectory, so repeated analyses return at once
+    and larger ones only run the missing simulations. At most `workers`
+    analyses run at once, and submissions beyond `queue` analyses running or
+    waiting are refused with `Full`. Finished analyses are forgotten once
+    their result is read or another one is submitted, and their state is
+    then read back from their result, or from the error of a failed one.
+
+    Example
+    -------
+    >>> from subpulse.routines.jobs import Jobs
+    >>> jobs = Jobs(Path("jobs"))
+    >>> identifier = jobs.submit([0.0, 439.018, 653.038], chi=0.2, simulations=10000)
+    >>> print(jobs.status(identifier))
+    >>> print(jobs.result(identifier))
+    """
+
+    def __init__(self, directory: Path, workers: int = WORKERS, queue: int = QUEUE):
+        """Initialization.
+
+        Parameters
+        ----------
+        directory : Path
+            Directory of the results of the analyses.
+        workers : int, optional
+            Number of analyses run at once, by default `WORKERS`.
+        queue : int, optional
+            Number of analyses running or waiting before submissions are
+            refused, by default `QUEUE`.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.queue = queue
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.futures: Dict[str, Future] = {}
+
+    def path(self, identifier: str) -> Path:
+        """Path of the result of an analysis."""
+        return self.directory / f"{identifier}.npz"
+
+    def failure(self, identifier: str) -> Path:
+        """Path of the error of a failed analysis."""
+        return self.directory / f"{identifier}.error"
+
+    def active(self) -> int:
+        """Number of analyses running or waiting."""
+        return sum(not future.done() for future in self.futures.values())
+
+    def submit(
+        self, arrivals: List[float], chi: float, simulations: int, **options: Any
+    ) -> str:
+        """Submit an analysis.
+
+        Parameters
+        ----------
+        arrivals : List[float]
+            Times of arrival in ms.
+        chi : float
+            Fraction of the mean separation of the arrivals by which they may
+            vary in the simulations.
+        simulations : int
+            Number of simulations.
+        **options
+            Settings of `toa.Options`, among `OPTIONS`.
+
+        Returns
+        -------
+        str
+            Identifier of the analysis.
+
+        Raises
+        ------
+        ValueError
+            When the parameters are invalid.
+        Full
+            When the queue of analyses is full.
+        """
+        unknown = set(options) - set(OPTIONS)
+        if unknown:
+            raise ValueError(f"unsupported options {sorted(unknown)}")
+        arrivals = [float(arrival) for arrival in arrivals]
+        if len(arrivals) < 2:
+            raise ValueError("at least two arrivals are required")
+        if not 0 <= float(chi) <= 1:
+            raise ValueError(f"chi must be within [0, 1], got {chi}")
+        if not 0 < int(simulations) <= SIMULATIONS:
+            raise ValueError(f"simulations must be within [1, {SIMULATIONS}]")
+        if len(options.get("uncertainties") or arrivals) != len(arrivals):
+            raise ValueError("there must be one uncertainty per arrival")
+        if options.get("kernel", "auto") not in toa.KERNELS:
+            raise ValueError(f"kernel must be one of {toa.KERNELS}")
+        self.prune()
+        if self.active() >= self.queue:
+            raise Full(f"{self.queue} analyses are already running or waiting")
+        if self.pool is None:
+            # Forking after the numba threading layer has started deadlocks.
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        identifier = str(seed.get_uuid("hex"))
+        self.futures[identifier] = self.pool.submit(
+            toa.execute,
+            arrivals,
+            float(chi),
+            int(simulations),
+            self.path(identifier),
+            toa.Options(
+                summarize=True,
+                metrics=True,
+                interval=0,
+                cache=self.directory / "cache",
+                **options,
+            ),
+        )
+        return identifier
+
+    def status(self, identifier: str) -> Dict[str, Any]:
+        """State and progress of an analysis.
+
+        Parameters
+        ----------
+        identifier : str
+
+        Returns
+        -------
+        Dict[str, Any]
+            State, one of "pending", "running", "done" or "failed", the error
+            of a failed analysis and the last progress record of a running
+            one, see `toa.execute`.
+
+        Raises
+        ------
+        KeyError
+            When the analysis is unknown.
+        """
+        future = self.futures.get(identifier)
+        status: Dict[str, Any] = dict(id=identifier)
+        if future is None:
+            if self.failure(identifier).exists():
+                error = self.failure(identifier).read_text()
+                status.update(state="failed", error=error)
+            elif self.path(identifier).exists():
+                status.update(state="done")
+            else:
+                raise KeyError(identifier)
+        elif future.done():
+            error = future.exception()
+            status.update(state="failed" if error else "done")
+            if error:
+                status.update(error=str(error))
+        else:
+            status.update(state="running" if future.running() else "pending")
+        metrics = toa.metrics_path(self.path(identifier))
+        if metrics.exists():
+            for line in metrics.read_text().splitlines():
+                record = json.loads(line)
+                if record["event"] == "progress":
+                    status.update(progress=record)
+        return status
+
+    def result(self, identifier: str) -> Dict[str, Any]:
+        """Result of a finished analysis.
+
+        Parameters
+        ----------
+        identifier : str
+
+        Returns
+        -------
+        Dict[str, Any]
+            Number of simulations, seed, quantiles of the simulated maxima,
+            the best period and statistic of the observed arrivals, and the
+            false alarm probability of the observed statistic.
+
+        Raises
+        ------
+        KeyError
+            When the analysis is unknown.
+        ValueError
+            When the analysis has not finished successfully.
+        """
+        if self.status(identifier)["state"] != "done":
+            raise ValueError(f"analysis {identifier} has not finished")
+        path = self.path(identifier)
+        stats = summary.Summary.load(path)
+        result: Dict[str, Any] = dict(
+            id=identifier,
+            path=path.as_posix(),
+            simulations=stats.count,
+            quantiles={str(q): stats.quantile(q) for q in QUANTILES},
+            maximum=float(stats.tail[0]) if stats.tail.size else None,
+        )
+        with np.load(path) as data:
+            for key in SCALARS:
+                if key in data.files:
+                    result[key] = data[key].item()
+            if "interval" in data.files:
+                result["interval"] = data["interval"].tolist()
+        self.prune()
+        return result
+
+    def prune(self) -> None:
+        """Forget the finished analyses, saving the error of failed ones."""
+        for identifier, future in list(self.futures.items()):
+            if future.done():
+                error = future.exception()
+                if error:
+                    self.failure(identifier).write_text(str(error))
+                del self.futures[identifier]
+
+    def shutdown(self) -> None:
+        """Stop accepting analyses and wait for those submitted."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+
+def directory() -> Path:
+    """Directory of the results of the backend analyses.
+
+    Set by the `SUBPULSE_JOBS` environment variable, by default `jobs` in the
+    working directory.
+    """
+    return Path(os.environ.get("SUBPULSE_JOBS", "jobs"))
@@ -0,0 +1,425 @@
+"""Aggregate the outputs of the jobs of a subpulse analysis."""
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import click
+import numpy as np
+
+from subpulse.analysis import significance, summary, tail
+from subpulse.utilities.chunked import Chunked, is_chunked
+
+# Number of values read from disk at a time.
+BUFFER: int = 2**20
+
+
+def outputs(directory: Path, pattern: str = "mc_*") -> List[Path]:
+    """
+    Find the job outputs in a fingerprint directory.
+
+    Parameters
+    ----------
+    directory : Path
+        Fingerprint directory of the analysis.
+    pattern : str, optional
+        Glob pattern of the job outputs, by default "mc_*".
+
+    Returns
+    -------
+    List[Path]
+        Sorted job outputs, .npz files excluding checkpoints and chunked
+        directories, see `chunked.Chunked`.
+    """
+    return sorted(
+        path
+        for path in directory.glob(pattern)
+        if is_chunked(path)
+        or (path.suffix == ".npz" and not path.name.endswith(".checkpoint.npz"))
+    )
+
+
+def chi(path: Path) -> Optional[float]:
+    """
+    Chi of a job output, as saved by the analysis.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the .npz file or chunked directory.
+
+    Returns
+    -------
+    Optional[float]
+        Chi of the simulations, None when it was not saved.
+    """
+    if is_chunked(path):
+        value = Chunked(path).inputs.get("chi")
+        return None if value is None else float(value)
+    with np.load(path) as data:
+        return float(data["chi"]) if "chi" in data.files else None
+
+
+def groups(paths: List[Path]) -> Dict[Optional[float], List[Path]]:
+    """
+    Job outputs grouped by their chi, see `chi`.
+
+    The outputs of a sweep of several chi share a fingerprint directory, but
+    their simulations follow different distributions and are never merged.
+
+    Parameters
+    ----------
+    paths : List[Path]
+        Job outputs.
+
+    Returns
+    -------
+    Dict[Optional[float], List[Path]]
+        Job outputs of each chi, in increasing chi.
+
+    Raises
+    ------
+    ValueError
+        When only some of the outputs saved their chi.
+    """
+    grouped: Dict[Optional[float], List[Path]] = {}
+    for path in paths:
+        grouped.setdefault(chi(path), []).append(path)
+    if None in grouped and len(grouped) > 1:
+        raise ValueError(f"the chi of {grouped[None]} is unknown, select by pattern")
+    return dict(sorted(grouped.items(), key=lambda item: item[0] or 0.0))
+
+
+def stream(
+    path: Path, key: Optional[str] = None, size: int = BUFFER
+) -> Iterator[np.ndarray]:
+    """
+    Stream the maxima out of an .npz file without loading it whole.
+
+    The statistic of a run is the Z^2_n with the most harmonics, the last
+    column of `max_z2n_power` when it was saved, and `max_z12_power`
+    otherwise, so it matches the observed statistic and the summaries of the
+    same run. The maxima of a chunked directory are streamed from the last
+    column of its chunks.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the .npz file or chunked directory.
+    key : Optional[str], optional
+        Name of the array, by default `max_z2n_power` when present and
+        `max_z12_power` otherwise. Of a 2D array, the last column is streamed.
+    size : int, optional
+        Number of values per yielded slice, by default `BUFFER`.
+
+    Yields
+    ------
+    Iterator[np.ndarray]
+        Consecutive slices of the maxima.
+    """
+    if is_chunked(path):
+        yield from Chunked(path).stream(column=-1, size=size)
+        return
+    with zipfile.ZipFile(path) as archive:
+        if key is None:
+            names = archive.namelist()
+            key = "max_z2n_power" if "max_z2n_power.npy" in names else "max_z12_power"
+        with archive.open(f"{key}.npy") as handle:
+            if np.lib.format.read_magic(handle) == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(handle)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(handle)
+            if fortran:
+                # Not written by the analysis, read whole rather than strided.
+                values = np.load(path)[key].reshape(shape[0], -1)[:, -1]
+                for first in range(0, values.size, size):
+                    stop = first + size
+                    yield values[first:stop]
+                return
+            columns = int(np.prod(shape[1:]))
+            remaining = shape[0] if shape else 1
+            while remaining:
+                count = min(size, remaining)
+                data = handle.read(count * columns * dtype.itemsize)
+                yield np.frombuffer(data, dtype=dtype).reshape(count, columns)[:, -1]
+                remaining -= count
+
+
+def extent(
+    paths: List[Path], observed: Optional[float] = None
+) -> Tuple[int, float, float, int]:
+    """
+    First pass over the job outputs.
+
+    Parameters
+    ----------
+    paths : List[Path]
+        Job outputs.
+    observed : Optional[float], optional
+        Observed statistic to count exceedances of, by default None.
+
+    Returns
+    -------
+    Tuple[int, float, float, int]
+        Number of simulations, minimum, maximum and number of simulations
+        at least as large as the observed statistic.
+    """
+    total, exceedances = 0, 0
+    minimum, maximum = np.inf, -np.inf
+    for path in paths:
+        for values in stream(path):
+            total += values.size
+            minimum = min(minimum, values.min())
+            maximum = max(maximum, values.max())
+            if observed is not None:
+                exceedances += int(np.count_nonzero(values >= observed))
+    return total, minimum, maximum, exceedances
+
+
+def histogram(paths: List[Path], edges: np.ndarray) -> np.ndarray:
+    """
+    Merged histogram of the job outputs.
+
+    Parameters
+    ----------
+    paths : List[Path]
+        Job outputs.
+    edges : np.ndarray
+        Bin edges.
+
+    Returns
+    -------
+    np.ndarray
+        Counts per bin.
+    """
+    counts = np.zeros(edges.size - 1, dtype=np.int64)
+    for path in paths:
+        for values in stream(path):
+            counts += np.histogram(values, bins=edges)[0]
+    return counts
+
+
+def combine(paths: List[Path]) -> summary.Summary:
+    """
+    Merge summary outputs, folding in any outputs with every value.
+
+    Parameters
+    ----------
+    paths : List[Path]
+        Job outputs, at least one of which is a summary.
+
+    Returns
+    -------
+    summary.Summary
+        Merged summary.
+    """
+    summaries = [path for path in paths if is_summary(path)]
+    merged = summary.Summary.load(summaries[0])
+    for path in paths:
+        if path == summaries[0]:
+            continue
+        if path in summaries:
+            merged.merge(summary.Summary.load(path))
+        else:
+            for values in stream(path):
+                merged.update(values)
+    return merged
+
+
+def is_summary(path: Path) -> bool:
+    """Whether a job output is a summary, see `summary.is_summary`."""
+    return not is_chunked(path) and summary.is_summary(path)
+
+
+def largest(paths: List[Path], top: int) -> np.ndarray:
+    """
+    Largest values of the job outputs.
+
+    Parameters
+    ----------
+    paths : List[Path]
+        Job outputs.
+    top : int
+        Number of values to keep.
+
+    Returns
+    -------
+    np.ndarray
+        Largest values, in descending order.
+    """
+    values = np.empty(0)
+    for path in paths:
+        for chunk in stream(path):
+            values = np.sort(np.concatenate((values, chunk)))[::-1][:top]
+    return values
+
+
+def merge(
+    paths: List[Path],
+    bins: int,
+    observed: Optional[float],
+    confidence: float,
+    model: Optional[str],
+    top: int,
+) -> Dict[str, Any]:
+    """
+    Merge job outputs of a single chi, see `aggregate`.
+
+    Parameters
+    ----------
+    paths : List[Path]
+        Job outputs.
+    bins : int
+        Number of histogram bins of outputs with every value.
+    observed : Optional[float]
+        Observed statistic to compute the false alarm probability of.
+    confidence : float
+        Confidence level of the false alarm probability interval.
+    model : Optional[str]
+        Tail model to extrapolate the false alarm probability with.
+    top : int
+        Number of largest values to fit the tail model to.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Arrays of the aggregate.
+    """
+    if any(is_summary(path) for path in paths):
+        merged = combine(paths)
+        total, edges, counts = merged.count, merged.edges, merged.counts
+        if observed is not None:
+            exceedances = merged.exceedances(observed)
+        results = merged.arrays()
+        values = merged.tail
+    else:
+        total, minimum, maximum, exceedances = extent(paths, observed)
+        edges = np.linspace(minimum, maximum, bins + 1)
+        counts = histogram(paths, edges)
+        results = dict(edges=edges, counts=counts)
+        values = largest(paths, top) if model else np.empty(0)
+    click.echo(f"Simulations: {total}")
+    cdf = np.cumsum(counts) / total
+    results.update(cdf=cdf, simulations=total)
+    if observed is not None:
+        fap, lower, upper = significance.false_alarm_probability(
+            exceedances, total, confidence
+        )
+        click.echo(f"Exceedances: {exceedances} >= {observed}")
+        click.echo(f"FAP        : {fap:.3e} [{lower:.3e}, {upper:.3e}]")
+        results.update(
+            observed=observed,
+            exceedances=exceedances,
+            fap=fap,
+            interval=(lower, upper),
+            confidence=confidence,
+        )
+    if model:
+        result = tail.fit(values, total, model)
+        click.echo(f"Tail Model : {result}")
+        check = tail.diagnostic(result, values)
+        click.echo(f"Tail Check : max |log10 model/empirical| {check['deviation']:.2f}")
+        results.update({f"tail_{key}": value for key, value in check.items()})
+        results.update(tail_shape=result.shape, tail_scale=result.scale)
+        if observed is not None and observed > result.threshold:
+            fap, lower, upper = tail.extrapolate(
+                values, total, observed, model, confidence=confidence
+            )
+            click.echo(f"Tail FAP   : {fap:.3e} [{lower:.3e}, {upper:.3e}]")
+            results.update(tail_fap=fap, tail_interval=(lower, upper))
+    return results
+
+
+@click.command()
+@click.option(
+    "-d",
+    "--directory",
+    help="Fingerprint directory with the job outputs.",
+    type=click.Path(exists=True, file_okay=False),
+    required=True,
+)
+@click.option(
+    "--pattern",
+    help="Glob pattern of the job outputs, .npz files or chunked directories.",
+    default="mc_*",
+)
+@click.option("--bins", help="Number of histogram bins.", default=100, type=click.INT)
+@click.option(
+    "--observed",
+    help="Observed Z^2 statistic to compute the false alarm probability of.",
+    default=None,
+    type=click.FLOAT,
+)
+@click.option(
+    "--confidence",
+    help="Confidence level of the false alarm probability interval.",
+    default=0.95,
+    show_default=True,
+    type=click.FLOAT,
+)
+@click.option(
+    "--model",
+    help="Tail model to extrapolate the false alarm probability with.",
+    default=None,
+    type=click.Choice(tail.MODELS),
+)
+@click.option(
+    "--top",
+    help="Number of largest values to fit the tail model to.",
+    default=summary.TOP,
+    show_default=True,
+    type=click.INT,
+)
+@click.option(
+    "-o",
+    "--output",
+    help="Output file, by default aggregate.npz in the directory.",
+    default=None,
+    type=click.Path(dir_okay=False),
+)
+def aggregate(
+    directory: str,
+    pattern: str,
+    bins: int,
+    observed: Optional[float],
+    confidence: float,
+    model: Optional[str],
+    top: int,
+    output: Optional[str],
+):
+    """
+    Merge the job outputs of a subpulse analysis.
+
+    The outputs are streamed twice, to find the histogram range and then to
+    fill it, so at most `BUFFER` values are held in memory at a time. When
+    any output is a summary, the outputs are merged into a single summary
+    instead, and its fixed bins replace --bins. With --model, a tail model is
+    fitted to the largest values to extrapolate the false alarm probability
+    beyond the reach of the simulations. The maxima aggregated are those of
+    Z^2_n with the most harmonics of each run, like its observed statistic.
+
+    The outputs of each chi of a sweep are merged separately, and saved with
+    their chi appended to the output file name, e.g. aggregate_chi0.20.npz.
+    """
+    paths = outputs(Path(directory), pattern)
+    if not paths:
+        raise click.ClickException(f"no outputs matching {pattern} in {directory}")
+    click.echo(f"Outputs    : {len(paths)}")
+    try:
+        grouped = groups(paths)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    savepath = Path(output) if output else Path(directory) / "aggregate.npz"
+    for value, members in grouped.items():
+        path = savepath
+        if len(grouped) > 1:
+            click.echo(f"Chi        : {value} ({len(members)} outputs)")
+            path = savepath.with_name(f"{savepath.stem}_chi{value:.2f}.npz")
+        results = merge(members, bins, observed, confidence, model, top)
+        if value is not None:
+            results.update(chi=value)
+        np.savez(path.absolute().as_posix(), **results)
+        click.echo(f"Saved      : {path}")
+
+
+if __name__ == "__main__":
+    aggregate()
@@ -0,0 +1,48 @@
+"""Atomic writes of files that other jobs may read while they are written."""
+import contextlib
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+@contextlib.contextmanager
+def atomic(
+    path: Path, mode: Optional[int] = None, exclusive: bool = False
+) -> Iterator[Path]:
+    """
+    Write a file to a temporary path and move it into place when done.
+
+    The temporary file is a hidden file in the same directory, named after
+    the process, so that readers and other jobs never see a partial file. It
+    is removed if the write fails.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the file.
+    mode : Optional[int]
+        Permissions of the file, by default those of a new file.
+    exclusive : bool
+        Only create the file if it does not exist yet, by linking it into
+        place, so that exactly one of several jobs writing it succeeds.
+
+    Yields
+    ------
+    Path
+        Temporary path to write the file to.
+    """
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        yield temporary
+        if mode is not None:
+            temporary.chmod(mode)
+        if exclusive:
+            try:
+                os.link(temporary, path)
+            except FileExistsError:
+                pass
+        else:
+            os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
@@ -0,0 +1,169 @@
+"""Content-addressed cache of the results of runs."""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from subpulse.utilities.atomic import atomic
+
+# Default disk budget of a cache in MB.
+BUDGET: float = 10240.0
+
+
+def digest(**inputs: Any) -> str:
+    """
+    Key of a run, the SHA-256 of its inputs.
+
+    Arrays are hashed by their dtype, shape and contents, and every other
+    input by its JSON encoding, so the key does not depend on the order of
+    the inputs.
+
+    Parameters
+    ----------
+    **inputs
+        Inputs that determine the results of the run.
+
+    Returns
+    -------
+    str
+        Hexadecimal key.
+    """
+    hasher = hashlib.sha256()
+    for name in sorted(inputs):
+        value = inputs[name]
+        hasher.update(name.encode())
+        if isinstance(value, np.ndarray):
+            hasher.update(f"{value.dtype.str}{value.shape}".encode())
+            hasher.update(np.ascontiguousarray(value).tobytes())
+        else:
+            hasher.update(json.dumps(value, sort_keys=True).encode())
+    return hasher.hexdigest()
+
+
+class Cache:
+    """Results of runs in a directory, keyed by a digest of their inputs.
+
+    Each entry is the output file of a run, see `toa.execute`. Entries are
+    written atomically, so several jobs may share a cache, and the least
+    recently used entries are evicted once the cache outgrows its budget.
+
+    Example
+    -------
+    >>> from subpulse.utilities.cache import Cache, digest
+    >>> cache = Cache(Path("cache"))
+    >>> key = digest(arrivals=[0.0, 439.018, 653.038], chi=0.2)
+    >>> results = cache.load(key)
+    >>> if results is None:
+    ...     cache.store(key, run(...))
+    """
+
+    def __init__(self, directory: Path, budget: float = BUDGET):
+        """Initialization.
+
+        Parameters
+        ----------
+        directory : Path
+            Directory of the entries.
+        budget : float, optional
+            Disk budget of the cache in MB, by default `BUDGET`.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.budget = float(budget)
+
+    def path(self, key: str) -> Path:
+        """Path of the entry of a key."""
+        return self.directory / f"{key}.npz"
+
+    def load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Arrays of an entry, marking it as recently used.
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        Optional[Dict[str, np.ndarray]]
+            Arrays of the entry, or None when there is none.
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as arrays:
+                results = {name: arrays[name] for name in arrays.files}
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return results
+
+    def store(self, key: str, source: Path) -> Path:
+        """
+        Atomically copy the output of a run into the cache.
+
+        Parameters
+        ----------
+        key : str
+        source : Path
+            Output file of the run.
+
+        Returns
+        -------
+        Path
+            Path of the entry.
+        """
+        path = self.path(key)
+        with atomic(path) as temporary:
+            shutil.copyfile(source, temporary)
+        self.evict(keep=key)
+        return path
+
+    def size(self) -> float:
+        """Disk usage of the entries in MB."""
+        return sum(path.stat().st_size for path in self.entries()) / 2**20
+
+    def entries(self) -> List[Path]:
+        """Paths of the entries, least recently used first."""
+        paths = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                paths.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(paths)]
+
+    def evict(self, keep: Optional[str] = None) -> List[Path]:
+        """
+        Remove the least recently used entries until the cache fits its budget.
+
+        Parameters
+        ----------
+        keep : Optional[str], optional
+            Key of an entry to never evict, e.g. the one just stored, by
+            default None.
+
+        Returns
+        -------
+        List[Path]
+            Paths of the evicted entries.
+        """
+        evicted = []
+        entries = self.entries()
+        usage = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if usage <= self.budget * 2**20:
+                break
+            if path == self.path(keep or ""):
+                continue
+            try:
+                usage -= path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                # Evicted by another job sharing the cache.
+                continue
+            evicted.append(path)
+        return evicted
@@ -0,0 +1,300 @@
+"""Chunked, self-describing directory format of the maxima of an analysis."""
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from subpulse.utilities.atomic import atomic
+
+# Version of the format, recorded in the manifest.
+VERSION: int = 1
+# Name of the manifest of a chunked directory.
+MANIFEST: str = "manifest.json"
+# Precisions the maxima may be stored in.
+STORAGE: List[str] = ["float64", "float32"]
+# Number of values read from disk at a time by `Chunked.stream`.
+BUFFER: int = 2**20
+
+CHUNK = re.compile(r"chunk_(\d+)_(\d+)\.(npy|npz)$")
+
+
+def is_chunked(path: Path) -> bool:
+    """Whether an output is a chunked directory rather than a single file.
+
+    Parameters
+    ----------
+    path : Path
+
+    Returns
+    -------
+    bool
+    """
+    return (Path(path) / MANIFEST).is_file()
+
+
+class Chunked:
+    """Maxima of the simulations of an analysis as a directory of chunks.
+
+    The manifest records the inputs of the analysis, e.g. the arrivals, chi
+    and root seed, the number of columns of the maxima and how they are
+    stored. Each chunk holds the maxima of consecutive simulations, shape
+    (count, columns), in a `.npy` file, or a compressed `.npz` file, named
+    after the index of its first simulation and its count, so chunks are
+    appended without touching the manifest or any other chunk.
+
+    Every file is written to a temporary file and renamed into place, so
+    several jobs may write disjoint simulations of the same analysis into
+    one directory, and readers only ever see complete chunks. Uncompressed
+    chunks are read memory-mapped.
+
+    Example
+    -------
+    >>> from subpulse.utilities.chunked import Chunked
+    >>> store = Chunked.create(Path("mc"), columns=1, arrivals=arrivals, seed=7)
+    >>> store.append(0, max_z12_power)
+    >>> for values in Chunked(Path("mc")).stream():
+    ...     histogram(values)
+    """
+
+    def __init__(self, directory: Path):
+        """Open a chunked directory.
+
+        Parameters
+        ----------
+        directory : Path
+            Directory with a manifest, see `create`.
+        """
+        self.directory = Path(directory)
+        self.manifest: Dict[str, Any] = json.loads(
+            (self.directory / MANIFEST).read_text()
+        )
+        self.columns = int(self.manifest["columns"])
+        self.storage = self.manifest["storage"]
+        self.compress = bool(self.manifest["compress"])
+        self.inputs: Dict[str, Any] = self.manifest["inputs"]
+
+    @classmethod
+    def create(
+        cls,
+        directory: Path,
+        columns: int = 1,
+        storage: str = "float64",
+        compress: bool = False,
+        **inputs: Any,
+    ) -> "Chunked":
+        """Create a chunked directory, or join one created by another job.
+
+        Parameters
+        ----------
+        directory : Path
+        columns : int, optional
+            Number of maxima per simulation, by default 1.
+        storage : str, optional
+            Precision of the stored maxima, one of `STORAGE`, by default
+            float64.
+        compress : bool, optional
+            Compress the chunks, which are then read whole rather than
+            memory-mapped, by default False.
+        **inputs
+            JSON serializable inputs of the analysis.
+
+        Returns
+        -------
+        Chunked
+
+        Raises
+        ------
+        ValueError
+            When the storage is not supported, or the directory holds another
+            analysis.
+        """
+        if storage not in STORAGE:
+            raise ValueError(f"storage must be one of {STORAGE}, got {storage}")
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        manifest = dict(
+            version=VERSION,
+            columns=int(columns),
+            storage=storage,
+            compress=bool(compress),
+            inputs=inputs,
+        )
+        path = directory / MANIFEST
+        # Only one job can link its manifest into place.
+        with atomic(path, exclusive=True) as temporary:
+            temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        store = cls(directory)
+        # Compare through JSON, as the manifest read back holds lists.
+        if store.manifest != json.loads(json.dumps(manifest)):
+            raise ValueError(f"{directory} holds another analysis: {store.manifest}")
+        return store
+
+    def path(self, start: int, count: int) -> Path:
+        """Path of the chunk of `count` simulations from `start`."""
+        suffix = "npz" if self.compress else "npy"
+        return self.directory / f"chunk_{start:012d}_{count}.{suffix}"
+
+    def append(self, start: int, values: np.ndarray) -> Path:
+        """
+        Atomically write the maxima of consecutive simulations.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first simulation.
+        values : np.ndarray
+            Maxima, shape (count, columns), or (count,) for a single column.
+
+        Returns
+        -------
+        Path
+            Path of the chunk.
+        """
+        values = np.asarray(values, dtype=self.storage).reshape(-1, self.columns)
+        path = self.path(start, len(values))
+        with atomic(path) as temporary, open(temporary, "wb") as handle:
+            if self.compress:
+                np.savez_compressed(handle, values=values)
+            else:
+                np.save(handle, values)
+        return path
+
+    def record(self, start: int, **outputs: Any) -> Path:
+        """
+        Atomically write the outputs of the run of a job, e.g. its FAP.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first simulation of the run.
+        **outputs
+            JSON serializable outputs of the run.
+
+        Returns
+        -------
+        Path
+            Path of the record.
+        """
+        path = self.directory / f"run_{start:012d}.json"
+        record = dict(start=start, **outputs)
+        # Arrays, e.g. the periodogram, and numpy scalars are written as lists
+        # and numbers.
+        text = json.dumps(record, default=lambda value: np.asarray(value).tolist())
+        with atomic(path) as temporary:
+            temporary.write_text(text)
+        return path
+
+    def spans(self) -> List[Tuple[int, int, Path]]:
+        """First simulation, number of simulations and path of every chunk."""
+        spans = []
+        for path in self.directory.iterdir():
+            match = CHUNK.match(path.name)
+            if match:
+                spans.append((int(match.group(1)), int(match.group(2)), path))
+        return sorted(spans)
+
+    def count(self) -> int:
+        """Number of distinct simulations in the chunks, see `chunks`."""
+        total = covered = 0
+        for first, count, _ in self.spans():
+            total += max(first + count - max(first, covered), 0)
+            covered = max(covered, first + count)
+        return total
+
+    def contiguous(self, start: int = 0) -> int:
+        """
+        Number of consecutive simulations stored from a first one.
+
+        Parameters
+        ----------
+        start : int, optional
+            Index of the first simulation, by default 0.
+
+        Returns
+        -------
+        int
+        """
+        end = start
+        for first, count, _ in self.spans():
+            if first <= end < first + count:
+                end = first + count
+        return end - start
+
+    def read(self, path: Path) -> np.ndarray:
+        """
+        Maxima of a chunk, memory-mapped unless compressed.
+
+        Parameters
+        ----------
+        path : Path
+
+        Returns
+        -------
+        np.ndarray
+            Shape (count, columns).
+        """
+        if path.suffix == ".npz":
+            with np.load(path) as arrays:
+                return arrays["values"]
+        return np.load(path, mmap_mode="r")
+
+    def chunks(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Maxima of the chunks within a range of simulations.
+
+        A chunk may overlap those before it, e.g. when a job resumes with
+        another chunk size, in which case it holds the same maxima for the
+        same simulations, and only the simulations not yielded yet are.
+
+        Parameters
+        ----------
+        start : int, optional
+            Index of the first simulation, by default 0.
+        stop : Optional[int], optional
+            Index past the last simulation, by default every simulation.
+
+        Yields
+        ------
+        Iterator[np.ndarray]
+            Maxima of each chunk, shape (count, columns), trimmed to the
+            range.
+        """
+        covered = start
+        for first, count, path in self.spans():
+            low = max(covered, first) - first
+            high = count if stop is None else min(stop - first, count)
+            if low < high:
+                yield self.read(path)[low:high]
+                covered = first + high
+
+    def stream(self, column: int = 0, size: int = BUFFER) -> Iterator[np.ndarray]:
+        """
+        Stream a column of the maxima.
+
+        Parameters
+        ----------
+        column : int, optional
+            Column of the maxima, e.g. -1 for Z^2_n, by default 0, Z^2_1.
+        size : int, optional
+            Number of values per yielded slice, by default `BUFFER`.
+
+        Yields
+        ------
+        Iterator[np.ndarray]
+            Consecutive slices of the column, in float64.
+        """
+        for values in self.chunks():
+            for first in range(0, len(values), size):
+                stop = first + size
+                yield np.array(values[first:stop, column], dtype=np.float64)
+
+    def load(self) -> np.ndarray:
+        """Every maximum, shape (simulations, columns), in float64."""
+        chunks = [np.asarray(values) for values in self.chunks()]
+        if not chunks:
+            return np.zeros((0, self.columns))
+        return np.concatenate(chunks).astype(np.float64)
@@ -0,0 +1,204 @@
+"""Per-stage timing, peak memory and throughput metrics of a run."""
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, Optional
+
+# Default number of seconds between progress records.
+EVERY: float = 10.0
+
+
+def peak_rss() -> float:
+    """Peak resident memory of the process so far in MB."""
+    # ru_maxrss is in kB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class Metrics:
+    """Wall time, CPU time and peak memory of each stage of a run.
+
+    Stages are timed with `stage`, and accumulated over repeated calls, e.g.
+    once per chunk of simulations. The `peak_rss` of a stage is the peak
+    resident memory of the whole process when the stage last ended, which
+    includes every earlier stage, not the memory used by the stage itself.
+    Progress, with the running simulations per second and the estimated time
+    remaining, and a final summary are emitted as JSON lines, to a stream and
+    optionally to a file.
+
+    Example
+    -------
+    >>> from subpulse.utilities.metrics import Metrics
+    >>> metrics = Metrics(total=1000, path=Path("mc.metrics.jsonl"))
+    >>> with metrics.stage("simulate"):
+    ...     toas_mc = simulate(...)
+    >>> metrics.progress(1000)
+    >>> metrics.close()
+    """
+
+    def __init__(
+        self,
+        total: int,
+        completed: int = 0,
+        path: Optional[Path] = None,
+        stream: Optional[IO[str]] = sys.stderr,
+        every: float = EVERY,
+    ):
+        """Initialization.
+
+        Parameters
+        ----------
+        total : int
+            Total number of simulations of the run.
+        completed : int, optional
+            Simulations already completed, e.g. when resuming, by default 0.
+        path : Optional[Path], optional
+            File to append the records to, by default None.
+        stream : Optional[IO[str]], optional
+            Stream to write the records to, by default stderr, None to
+            disable.
+        every : float, optional
+            Seconds between progress records, by default `EVERY`.
+        """
+        self.total = int(total)
+        self.initial = int(completed)
+        self.completed = int(completed)
+        self.stream = stream
+        self.every = float(every)
+        self.handle = open(path, "a") if path else None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.created = self.start = time.monotonic()
+        self.cpu = time.process_time()
+        self.reported = -float("inf")
+
+    def emit(self, event: str, **fields: Any) -> Dict[str, Any]:
+        """Write a record as a JSON line.
+
+        Parameters
+        ----------
+        event : str
+            Kind of record.
+        **fields
+            Contents of the record.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The record.
+        """
+        record = dict(event=event, time=time.time(), **fields)
+        line = json.dumps(record, default=float)
+        for handle in (self.stream, self.handle):
+            if handle:
+                handle.write(line + "\n")
+                handle.flush()
+        return record
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage of the run.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, e.g. "simulate".
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(
+                name, dict(calls=0, wall=0.0, cpu=0.0, peak_rss=0.0)
+            )
+            totals["calls"] += 1
+            totals["wall"] += time.perf_counter() - wall
+            totals["cpu"] += time.process_time() - cpu
+            totals["peak_rss"] = max(totals["peak_rss"], peak_rss())
+
+    def resume(self, completed: int) -> None:
+        """Count throughput from simulations completed by an earlier run.
+
+        Parameters
+        ----------
+        completed : int
+            Simulations already completed.
+        """
+        self.initial = self.completed = int(completed)
+        self.start = time.monotonic()
+
+    def rate(self) -> float:
+        """Simulations per second since the start of the run."""
+        elapsed = time.monotonic() - self.start
+        return (self.completed - self.initial) / elapsed if elapsed > 0 else 0.0
+
+    def progress(
+        self, completed: int, force: bool = False, **fields: Any
+    ) -> Optional[Dict]:
+        """Record the simulations completed so far.
+
+        A progress record is emitted at most every `every` seconds.
+
+        Parameters
+        ----------
+        completed : int
+            Total simulations completed.
+        force : bool, optional
+            Emit a record regardless of the time since the last one, by
+            default False.
+        **fields
+            Additional contents of the record, e.g. the running false alarm
+            probability.
+
+        Returns
+        -------
+        Optional[Dict]
+            The record, if one was emitted.
+        """
+        self.completed = int(completed)
+        now = time.monotonic()
+        if not force and now - self.reported < self.every:
+            return None
+        self.reported = now
+        rate = self.rate()
+        remaining = self.total - self.completed
+        return self.emit(
+            "progress",
+            completed=self.completed,
+            total=self.total,
+            rate=rate,
+            eta=remaining / rate if rate > 0 else None,
+            elapsed=now - self.start,
+            peak_rss=peak_rss(),
+            **fields,
+        )
+
+    def close(self, **fields: Any) -> Dict[str, Any]:
+        """Emit the summary of the run and close the metrics file.
+
+        Parameters
+        ----------
+        **fields
+            Additional contents of the summary, e.g. the output path.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The summary record.
+        """
+        record = self.emit(
+            "summary",
+            completed=self.completed,
+            total=self.total,
+            rate=self.rate(),
+            wall=time.monotonic() - self.created,
+            cpu=time.process_time() - self.cpu,
+            peak_rss=peak_rss(),
+            stages=self.stages,
+            **fields,
+        )
+        if self.handle:
+            self.handle.close()
+            self.handle = None
+        return record
@@ -1,6 +1,10 @@
 """Monitor jobs."""
+from pathlib import Path
+from typing import Optional
+
 import click
-from chime_frb_api import frb_master
+
+from subpulse.pipelines import executors
 
 
 @click.command()
@@ -10,10 +14,29 @@ from chime_frb_api import frb_master
     help="Regex pattern for jobs to monitor.",
     default="subpulse-toa",
 )
-def monitor(job_name: str):
+@click.option(
+    "--executor",
+    help="Backend the jobs were spawned with.",
+    default="swarm",
+    show_default=True,
+    type=click.Choice(list(executors.EXECUTORS)),
+)
+@click.option(
+    "-d",
+    "--directory",
+    help="Fingerprint directory of local jobs.",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+)
+def monitor(job_name: str, executor: str = "swarm", directory: Optional[str] = None):
     """Monitor jobs."""
-    master = frb_master.FRBMaster()
-    master.swarm.monitor_jobs("subpulse-toa")
+    if executor == "local":
+        if directory is None:
+            raise click.UsageError("--executor local requires --directory")
+        backend = executors.LocalExecutor(Path(directory) / "logs")
+    else:
+        backend = executors.SwarmExecutor()
+    backend.monitor(job_name)
 
 
 if __name__ == "__main__":
@@ -19,6 +19,9 @@ class PythonLiteralOption(click.Option):
 
     def type_cast_value(self, ctx, value):
         """Cast value to a literal."""
+        if value is None:
+            # An optional literal that was not given.
+            return None
         try:
             return ast.literal_eval(value)
         except Exception as error:
@@ -4,6 +4,11 @@ import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.ticker import AutoMinorLocator
 
+# Detection of the original analysis, for outputs saved without the periodogram
+# of their arrivals.
+DETECTION: float = 17.96141909472610009857
+PERIOD: float = 217.3
+
 
 @click.command()
 @click.option("-f", "--filename", type=str, required=True)
@@ -38,13 +43,23 @@ def plot(filename: str):
         edgecolor="k",
     )
 
-    detection_bar = 17.96141909472610009857
+    detection_bar, period = DETECTION, PERIOD
+    if "periodogram" in data:
+        # The best Z^2_1 of the observed arrivals, saved by `toa.execute`.
+        z12_power = data["periodogram"][:, 0]
+        index = np.argmax(z12_power)
+        detection_bar = float(z12_power[index])
+        period = 1e3 / float(data["frequencies"][index])
+    chi = float(data["chi"]) if "chi" in data else 0.2
     ax.axvline(detection_bar, color="k", linestyle="--", linewidth=2.5)
 
     ax.set_yscale("log")
 
     ax.set_title(
-        r"$\mathcal{N}_{\mathregular{sim}}$ = 10$^{\mathregular{6}}$ simultations ($\chi$ = 0.20)",  # noqa: E501
+        r"$\mathcal{N}_{\mathregular{sim}}$ = "
+        + f"{len(max_z12_power):.0e} simulations "
+        + r"($\chi$ = "
+        + f"{chi:.2f})",
         fontsize=12.0,
         fontname="Helvetica",
     )
@@ -58,7 +73,8 @@ def plot(filename: str):
     ax.text(
         detection_bar - 0.65,
         0.12,
-        r"$\mathregular{Z}_{\mathregular{1}}^{\mathregular{2}}$ = 17.96 @ 217.3 ms",
+        r"$\mathregular{Z}_{\mathregular{1}}^{\mathregular{2}}$ = "
+        + f"{detection_bar:.2f} @ {period:.1f} ms",
         fontsize=12.0,
         color="k",
         rotation=90.0,
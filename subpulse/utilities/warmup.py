@@ -0,0 +1,23 @@
+"""Compile the search kernels ahead of the jobs of a subpulse analysis."""
+import time
+
+import click
+from numba import config
+
+
+@click.command()
+def warmup() -> None:
+    """Compile, or load from the cache, every kernel and report the timings."""
+    click.echo(f"Cache Directory: {config.CACHE_DIR or 'next to the sources'}")
+    # Kernels with explicit signatures are compiled, or loaded, on import.
+    begin = time.perf_counter()
+    from subpulse.analysis import toa
+
+    click.echo(f"Import: {time.perf_counter() - begin:.3f}s")
+    click.echo(f"{'kernel':<20} {'first (s)':>10} {'run (s)':>10} {'compile (s)':>12}")
+    for name, (first, second) in toa.warmup().items():
+        click.echo(f"{name:<20} {first:>10.3f} {second:>10.3f} {first - second:>12.3f}")
+
+
+if __name__ == "__main__":
+    warmup()
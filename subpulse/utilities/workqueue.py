@@ -0,0 +1,234 @@
+"""File-based queue of chunks of simulations shared by the jobs of a run."""
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Default number of simulations per chunk, a multiple of `toa.BLOCK`.
+CHUNK: int = 2**20
+# Default seconds after which the claim of a chunk that was not refreshed is
+# presumed lost, see `WorkQueue.touch`.
+TIMEOUT: float = 3600.0
+# Longest wait in seconds between passes over the chunks claimed by others.
+POLL: float = 60.0
+
+
+class WorkQueue:
+    """Chunks of a run claimed by workers on a shared filesystem.
+
+    The simulations of a run are split into chunks of `size`, which every
+    worker derives from the same arguments, so the queue needs no setup. A
+    worker claims a chunk by creating its claim file with O_CREAT | O_EXCL,
+    which succeeds for exactly one worker, and marks it done once its output
+    is saved. Workers keep claiming chunks until none are left, so a slow
+    node delays the run by at most one chunk.
+
+    A worker refreshes its claim with `touch` as the chunk progresses. A
+    claim not refreshed for `timeout` seconds that is not done is presumed
+    lost with its worker, and is taken over by renaming it, which also
+    succeeds for exactly one worker. Another worker may have taken the claim
+    over and claimed the chunk afresh in the meantime, so the renamed claim is
+    checked against the expired one, and given back when it is not the same.
+    With a `timeout`, workers wait for the chunks claimed by others until
+    they are done, so a lost claim is taken over even once every chunk has
+    been claimed.
+
+    Example
+    -------
+    >>> from subpulse.utilities.workqueue import WorkQueue
+    >>> queue = WorkQueue(Path("queue"), simulations=10**8)
+    >>> for index, start, count in queue.claims():
+    ...     run(start, count, heartbeat=lambda: queue.touch(index))
+    ...     queue.complete(index)
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        simulations: int,
+        size: int = CHUNK,
+        timeout: Optional[float] = None,
+        worker: Optional[str] = None,
+    ):
+        """Initialization.
+
+        Parameters
+        ----------
+        directory : Path
+            Directory of the queue, shared by every worker.
+        simulations : int
+            Total number of simulations of the run.
+        size : int, optional
+            Simulations per chunk, by default `CHUNK`.
+        timeout : Optional[float], optional
+            Seconds after which an unfinished claim may be taken over, by
+            default None, never.
+        worker : Optional[str], optional
+            Name of this worker, recorded in its claims, by default the host
+            name and process id.
+
+        Raises
+        ------
+        ValueError
+            When the chunk size is less than one.
+        """
+        if size < 1:
+            raise ValueError(f"size must be at least 1, got {size}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.simulations = int(simulations)
+        self.size = int(size)
+        self.timeout = timeout
+        self.worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+        self.chunks = -(-self.simulations // self.size)
+
+    def span(self, index: int) -> Tuple[int, int]:
+        """First simulation and number of simulations of a chunk.
+
+        Parameters
+        ----------
+        index : int
+
+        Returns
+        -------
+        Tuple[int, int]
+        """
+        start = index * self.size
+        return start, min(self.size, self.simulations - start)
+
+    def path(self, index: int, state: str) -> Path:
+        """Path of the claim or done marker of a chunk."""
+        return self.directory / f"chunk_{index:08d}.{state}"
+
+    def claim(self, index: int) -> bool:
+        """Try to claim a chunk.
+
+        Parameters
+        ----------
+        index : int
+
+        Returns
+        -------
+        bool
+            Whether this worker now holds the chunk.
+        """
+        if self.path(index, "done").exists():
+            return False
+        claim = self.path(index, "claim")
+        try:
+            handle = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            expired = self.stamp(claim)
+            if expired is None or not self.expired(index, expired[0]):
+                return False
+            stale = claim.with_name(f"{claim.name}.{self.worker}.stale")
+            try:
+                # Only one worker can rename the expired claim away.
+                os.rename(claim, stale)
+            except FileNotFoundError:
+                return False
+            if self.stamp(stale) != expired:
+                # A fresh claim was renamed, give it back unless the chunk has
+                # been claimed again since.
+                try:
+                    os.link(stale, claim)
+                except FileExistsError:
+                    pass
+                stale.unlink()
+                return False
+            stale.unlink()
+            return self.claim(index)
+        with os.fdopen(handle, "w") as claimed:
+            claimed.write(f"{self.worker} {time.time()}\n")
+        return True
+
+    @staticmethod
+    def stamp(claim: Path) -> Optional[Tuple[float, str]]:
+        """Modification time and owner of a claim, None when there is none."""
+        try:
+            return claim.stat().st_mtime, claim.read_text()
+        except FileNotFoundError:
+            return None
+
+    def expired(self, index: int, modified: float) -> bool:
+        """Whether the claim of a chunk, modified at a time, is too old.
+
+        Parameters
+        ----------
+        index : int
+        modified : float
+            Modification time of the claim, see `stamp`.
+
+        Returns
+        -------
+        bool
+        """
+        if self.timeout is None or self.path(index, "done").exists():
+            return False
+        return time.time() - modified > self.timeout
+
+    def touch(self, index: int) -> None:
+        """Refresh the claim of a chunk, so that it is not taken over.
+
+        Parameters
+        ----------
+        index : int
+        """
+        try:
+            os.utime(self.path(index, "claim"))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, index: int) -> None:
+        """Mark a claimed chunk as done.
+
+        Parameters
+        ----------
+        index : int
+        """
+        self.path(index, "done").write_text(f"{self.worker} {time.time()}\n")
+
+    def claims(self) -> Iterator[Tuple[int, int, int]]:
+        """Claim chunks until every chunk is claimed or done.
+
+        With a `timeout`, keep claiming until every chunk is done or claimed
+        by this worker, waiting at most `POLL` seconds between passes for the
+        claims of other workers to complete or expire.
+
+        Yields
+        ------
+        Iterator[Tuple[int, int, int]]
+            Index, first simulation and number of simulations of each chunk
+            claimed by this worker.
+        """
+        held = set()
+        pending = range(self.chunks)
+        while True:
+            for index in pending:
+                if self.claim(index):
+                    held.add(index)
+                    yield (index, *self.span(index))
+            if self.timeout is None:
+                return
+            pending = [index for index in self.unfinished() if index not in held]
+            if not pending:
+                return
+            time.sleep(min(POLL, self.timeout))
+
+    def unfinished(self) -> List[int]:
+        """Indices of the chunks that are not done."""
+        return [
+            index
+            for index in range(self.chunks)
+            if not self.path(index, "done").exists()
+        ]
+
+    def status(self) -> Dict[str, int]:
+        """Number of chunks in total, claimed and done."""
+        names = [path.name for path in self.directory.glob("chunk_*")]
+        return dict(
+            chunks=self.chunks,
+            claimed=sum(name.endswith(".claim") for name in names),
+            done=sum(name.endswith(".done") for name in names),
+        )
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Tests for aggregating job outputs."""
+import numpy as np
+from click.testing import CliRunner
+
+from subpulse.analysis import summary
+from subpulse.utilities import aggregate
+
+
+def test_aggregate(tmp_path):
+    """Check the streamed aggregate matches the concatenated outputs."""
+    rng = np.random.default_rng(0)
+    values = [rng.exponential(4.0, size) for size in (1000, 2500, 10)]
+    for job, data in enumerate(values):
+        np.savez(
+            tmp_path / f"mc_1_nsim{data.size}_chi0.20_{job}.npz", max_z12_power=data
+        )
+    np.savez(tmp_path / "mc_1_nsim10_chi0.20_9.checkpoint.npz", max_z12_power=[1.0])
+    everything = np.concatenate(values)
+
+    chunks = list(aggregate.stream(tmp_path / "mc_1_nsim2500_chi0.20_1.npz", size=999))
+    assert [chunk.size for chunk in chunks] == [999, 999, 502]
+
+    result = CliRunner().invoke(
+        aggregate.aggregate,
+        ["-d", str(tmp_path), "--bins", "20", "--observed", "12.0"],
+    )
+    assert result.exit_code == 0, result.output
+    merged = np.load(tmp_path / "aggregate.npz")
+    assert merged["simulations"] == everything.size
+    expected, _ = np.histogram(everything, bins=merged["edges"])
+    np.testing.assert_array_equal(merged["counts"], expected)
+    assert merged["cdf"][-1] == 1.0
+    assert merged["exceedances"] == np.count_nonzero(everything >= 12.0)
+    lower, upper = merged["interval"]
+    assert lower <= merged["fap"] <= upper
+
+
+def test_aggregate_summaries(tmp_path):
+    """Check summaries merge with full outputs."""
+    rng = np.random.default_rng(1)
+    values = rng.exponential(2.0, 3000).clip(0, 12)
+    stats = summary.Summary(upper=12.0)
+    stats.update(values[:2000])
+    stats.save(tmp_path / "mc_1_nsim2000_chi0.20_0.npz")
+    np.savez(tmp_path / "mc_1_nsim1000_chi0.20_1.npz", max_z12_power=values[2000:])
+
+    result = CliRunner().invoke(
+        aggregate.aggregate,
+        ["-d", str(tmp_path), "--observed", "9.0", "--model", "gpd"],
+    )
+    assert result.exit_code == 0, result.output
+    merged = np.load(tmp_path / "aggregate.npz")
+    assert merged["simulations"] == values.size
+    assert merged["exceedances"] == np.count_nonzero(values >= 9.0)
+    assert merged["tail_values"].size == summary.TOP
+    assert "tail_fap" in merged.files
+
+
+def test_aggregate_harmonics(tmp_path):
+    """Check outputs with several harmonics are aggregated on Z^2_n."""
+    rng = np.random.default_rng(2)
+    max_z2n_power = np.cumsum(rng.exponential(2.0, (1500, 3)), axis=1)
+    np.savez(
+        tmp_path / "mc_1_nsim1500_chi0.20_0.npz",
+        max_z12_power=max_z2n_power[:, 0],
+        max_z2n_power=max_z2n_power,
+    )
+    path = tmp_path / "mc_1_nsim1500_chi0.20_0.npz"
+    chunks = list(aggregate.stream(path, size=700))
+    assert [chunk.size for chunk in chunks] == [700, 700, 100]
+    np.testing.assert_array_equal(np.concatenate(chunks), max_z2n_power[:, -1])
+
+    result = CliRunner().invoke(
+        aggregate.aggregate, ["-d", str(tmp_path), "--observed", "12.0"]
+    )
+    assert result.exit_code == 0, result.output
+    merged = np.load(tmp_path / "aggregate.npz")
+    assert merged["exceedances"] == np.count_nonzero(max_z2n_power[:, -1] >= 12.0)
+
+
+def test_aggregate_sweep(tmp_path):
+    """Check the outputs of each chi of a sweep are aggregated separately."""
+    rng = np.random.default_rng(3)
+    values = {
+        chi: rng.exponential(chi * 10, (job + 1) * 100)
+        for job, chi in enumerate((0.1, 0.2))
+    }
+    for chi, data in values.items():
+        for job, part in enumerate(np.array_split(data, 2)):
+            np.savez(
+                tmp_path / f"mc_1_nsim{part.size}_chi{chi:.2f}_{job}.npz",
+                max_z12_power=part,
+                chi=chi,
+            )
+    result = CliRunner().invoke(aggregate.aggregate, ["-d", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert not (tmp_path / "aggregate.npz").exists()
+    for chi, data in values.items():
+        merged = np.load(tmp_path / f"aggregate_chi{chi:.2f}.npz")
+        assert merged["chi"] == chi and merged["simulations"] == data.size
+
+    # Outputs that did not save their chi cannot be told apart.
+    np.savez(tmp_path / "mc_1_nsim10_chi0.30_0.npz", max_z12_power=np.ones(10))
+    result = CliRunner().invoke(aggregate.aggregate, ["-d", str(tmp_path)])
+    assert result.exit_code == 1 and "mc_1_nsim10_chi0.30_0.npz" in result.output
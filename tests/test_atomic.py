@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+"""Tests for the atomic writes of files."""
+import pytest
+
+from subpulse.utilities.atomic import atomic
+
+
+def test_atomic(tmp_path):
+    """Check files only appear once written, with their permissions."""
+    path = tmp_path / "file.txt"
+    with atomic(path, mode=0o100644) as temporary:
+        temporary.write_text("first")
+        assert not path.exists()
+    assert path.read_text() == "first"
+    assert path.stat().st_mode == 0o100644
+    # An exclusive write keeps the existing file.
+    with atomic(path, exclusive=True) as temporary:
+        temporary.write_text("second")
+    assert path.read_text() == "first"
+    # A failed write leaves neither the file nor the temporary file changed.
+    with pytest.raises(RuntimeError):
+        with atomic(path) as temporary:
+            temporary.write_text("third")
+            raise RuntimeError
+    assert path.read_text() == "first"
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Tests for the content-addressed cache of results."""
+import os
+
+import numpy as np
+import pytest
+
+from subpulse.analysis import toa
+from subpulse.utilities.cache import Cache, digest
+
+ARRIVALS = [0.000, 439.018, 653.038, 1080.966, 1304.422, 1517.858]
+
+
+def test_digest():
+    """Check keys depend on the inputs, but not on their order."""
+    grid = toa.frequency_grid()
+    key = digest(arrivals=ARRIVALS, chi=0.2, grid=grid)
+    assert key == digest(grid=grid, chi=0.2, arrivals=ARRIVALS)
+    assert key != digest(arrivals=ARRIVALS, chi=0.3, grid=grid)
+    assert key != digest(arrivals=ARRIVALS, chi=0.2, grid=grid[1:])
+
+
+def test_evict(tmp_path):
+    """Check the least recently used entries are evicted first."""
+    cache = Cache(tmp_path / "cache", budget=3.5)
+    for index, key in enumerate("abc"):
+        source = tmp_path / f"{key}.npz"
+        np.savez(source, data=np.zeros(2**17))
+        cache.store(key, source)
+        os.utime(cache.path(key), (index, index))
+    assert cache.load("a") is not None
+    np.savez(tmp_path / "d.npz", data=np.zeros(2**17))
+    cache.store("d", tmp_path / "d.npz")
+    assert sorted(path.stem for path in cache.entries()) == ["a", "c", "d"]
+    assert cache.size() <= 3.5
+
+
+def test_execute_cache(tmp_path, monkeypatch):
+    """Check cached runs are reused, and topped up like a single run."""
+    reference = tmp_path / "reference.npz"
+    toa.execute(ARRIVALS, 0.2, 300, reference, seed=6, memory=0.001)
+    max_z12_power = np.load(reference)["max_z12_power"]
+
+    cache = tmp_path / "cache"
+    toa.execute(ARRIVALS, 0.2, 100, tmp_path / "small.npz", cache=cache, seed=6)
+    toa.execute(ARRIVALS, 0.2, 300, tmp_path / "large.npz", cache=cache)
+    data = np.load(tmp_path / "large.npz")
+    assert data["seed"] == 6
+    np.testing.assert_array_equal(data["max_z12_power"], max_z12_power)
+
+    def search(*args):
+        raise AssertionError("cached simulations were searched again")
+
+    monkeypatch.setattr(toa, "search", search)
+    toa.execute(ARRIVALS, 0.2, 200, tmp_path / "hit.npz", cache=cache, metrics=True)
+    data = np.load(tmp_path / "hit.npz")
+    np.testing.assert_array_equal(data["max_z12_power"], max_z12_power[:200])
+    with pytest.raises(AssertionError):
+        toa.execute(ARRIVALS, 0.3, 200, tmp_path / "miss.npz", cache=cache)
+
+
+def test_resume_cache(tmp_path, monkeypatch):
+    """Check a resumed run is cached under the digest of its inputs."""
+    reference = tmp_path / "reference.npz"
+    toa.execute(ARRIVALS, 0.2, 100, reference, seed=3, memory=0.001, observed=5.0)
+    max_z12_power = np.load(reference)["max_z12_power"]
+
+    savepath = tmp_path / "resumed.npz"
+    metadata = dict(
+        arrivals=ARRIVALS,
+        chi=0.2,
+        simulations=100,
+        start=0,
+        harmonics=1,
+        dtype="float64",
+        summarize=False,
+        observed=5.0,
+        uncertainties=[],
+        jitter=False,
+        weighted=False,
+    )
+    results = dict(max_z12_power=max_z12_power[:48])
+    toa.save_checkpoint(toa.checkpoint_path(savepath), results, 48, 3, **metadata)
+    cache = tmp_path / "cache"
+    options = dict(memory=0.001, cache=cache, observed=5.0)
+    toa.execute(ARRIVALS, 0.2, 100, savepath, resume=True, **options)
+    assert "max_z12_power" not in [path.stem for path in Cache(cache).entries()]
+
+    def search(*args):
+        raise AssertionError("cached simulations were searched again")
+
+    monkeypatch.setattr(toa, "search", search)
+    toa.execute(ARRIVALS, 0.2, 100, tmp_path / "hit.npz", **options)
+    np.testing.assert_array_equal(
+        np.load(tmp_path / "hit.npz")["max_z12_power"], max_z12_power
+    )
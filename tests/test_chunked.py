@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Tests for the chunked directory format of the maxima."""
+import json
+
+import numpy as np
+import pytest
+
+from subpulse.analysis import toa
+from subpulse.utilities import aggregate
+from subpulse.utilities.chunked import Chunked
+
+ARRIVALS = [0.000, 439.018, 653.038, 1080.966, 1304.422, 1517.858]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_chunked(tmp_path, compress):
+    """Check chunks written by several writers read back in order."""
+    values = np.random.default_rng(0).exponential(4.0, (1000, 2))
+    writers = [
+        Chunked.create(tmp_path, 2, "float32", compress, seed=1) for _ in range(2)
+    ]
+    for start, stop in ((600, 900), (0, 300), (300, 600)):
+        writers[start % 2].append(start, values[start:stop])
+    with pytest.raises(ValueError):
+        Chunked.create(tmp_path, 2, "float32", compress, seed=2)
+
+    store = Chunked(tmp_path)
+    assert store.inputs == dict(seed=1)
+    assert store.count() == 900 and store.contiguous() == 900
+    assert store.contiguous(300) == 600 and store.contiguous(950) == 0
+    np.testing.assert_allclose(store.load(), values[:900], rtol=1e-7)
+    assert store.load().dtype == np.float64
+    streamed = np.concatenate(list(store.stream(column=-1, size=128)))
+    np.testing.assert_array_equal(streamed, store.load()[:, -1])
+    trimmed = np.concatenate(list(store.chunks(100, 500)))
+    np.testing.assert_array_equal(trimmed, store.load()[100:500])
+    if not compress:
+        assert isinstance(store.read(store.spans()[0][2]), np.memmap)
+
+
+def test_execute_chunked(tmp_path):
+    """Check jobs appending to a directory match a single run."""
+    reference = tmp_path / "reference.npz"
+    toa.execute(ARRIVALS, 0.2, 300, reference, seed=8, memory=0.001)
+    max_z12_power = np.load(reference)["max_z12_power"]
+
+    savepath = tmp_path / "mc_1_chi0.20"
+    options = dict(chunked=True, memory=0.001, observed=5.0, metrics=True)
+    toa.execute(ARRIVALS, 0.2, 200, savepath, seed=8, **options)
+    # A job without a seed joins the seed of the directory.
+    toa.execute(ARRIVALS, 0.2, 100, savepath, start=200, **options)
+    store = Chunked(savepath)
+    assert store.inputs["seed"] == 8 and store.inputs["chi"] == 0.2
+    np.testing.assert_array_equal(store.load()[:, 0], max_z12_power)
+    assert (savepath / "run_000000000200.json").exists()
+    assert (savepath / "run_000000000200.metrics.jsonl").exists()
+
+    # A resumed job only runs the simulations after its chunks.
+    for path in store.spans()[-2:]:
+        path[2].unlink()
+    toa.execute(ARRIVALS, 0.2, 100, savepath, start=200, resume=True, **options)
+    np.testing.assert_array_equal(store.load()[:, 0], max_z12_power)
+    with pytest.raises(ValueError):
+        toa.execute(ARRIVALS, 0.3, 100, savepath, chunked=True)
+
+    # A job run again with another chunk size overlaps the chunks, which
+    # hold the same maxima and are counted once, also when resuming.
+    spans = len(store.spans())
+    options.update(memory=0.002)
+    toa.execute(ARRIVALS, 0.2, 200, savepath, seed=8, **options)
+    assert len(store.spans()) > spans and store.count() == 300
+    np.testing.assert_array_equal(store.load()[:, 0], max_z12_power)
+    toa.execute(ARRIVALS, 0.2, 200, savepath, seed=8, resume=True, **options)
+    record = json.loads((savepath / "run_000000000000.json").read_text())
+    assert record["exceedances"] == np.count_nonzero(max_z12_power[:200] >= 5.0)
+
+    assert aggregate.outputs(tmp_path) == [savepath]
+    np.testing.assert_array_equal(
+        np.concatenate(list(aggregate.stream(savepath))), max_z12_power
+    )
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Tests for the backends of distributed runs."""
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from subpulse.pipelines import cluster, executors
+from subpulse.utilities import aggregate, monitor
+
+
+def test_local_executor(tmp_path, monkeypatch):
+    """Check a local fan-out runs every simulation and reports its jobs."""
+    monkeypatch.chdir(tmp_path)
+    arguments = ["--event", "1", "--arrivals", "[0.0, 439.018, 653.038, 1080.966]"]
+    arguments += ["--chi", "0.2", "--simulations", "101", "--jobs", "2"]
+    arguments += ["--executor", "local", "--cores", "2"]
+    result = CliRunner().invoke(cluster.run, arguments)
+    assert result.exit_code == 0, result.output
+    assert result.output.count(": done, ") == 2
+    directory = next((tmp_path / "1").iterdir())
+
+    result = CliRunner().invoke(aggregate.aggregate, ["-d", str(directory)])
+    assert result.exit_code == 0, result.output
+    merged = np.load(directory / "aggregate.npz")
+    assert merged["simulations"] == 101
+
+    options = ["--executor", "local", "-d", str(directory), "-j", "toa-1-1"]
+    result = CliRunner().invoke(monitor.monitor, options)
+    assert result.output.startswith("subpulse-toa-1-1: done, 50/50 simulations")
+
+
+def test_executor_abstract():
+    """Check a backend must implement spawn and monitor."""
+    with pytest.raises(TypeError):
+        executors.Executor()
+
+
+def test_cluster_sweep_chunked(tmp_path, monkeypatch):
+    """Check a chunked sweep is refused before any job is spawned."""
+    monkeypatch.chdir(tmp_path)
+    arguments = ["--event", "1", "--arrivals", "[0.0, 439.018, 653.038]"]
+    arguments += ["--chi", "0.1", "--chi", "0.2", "--jobs", "2"]
+    arguments += ["--executor", "local", "--chunked", "True"]
+    result = CliRunner().invoke(cluster.run, arguments)
+    assert result.exit_code == 2
+    assert "--chunked" in result.output
+    assert not (tmp_path / "1").exists()
+
+
+def test_cluster_queue_timeout(monkeypatch):
+    """Check the queued jobs are given the timeout of their claims."""
+    spawned = []
+
+    class Backend:
+        cluster = True
+
+        def spawn(self, name, arguments, cpus):
+            spawned.append(arguments)
+
+        def wait(self):
+            pass
+
+    monkeypatch.setattr(executors, "SwarmExecutor", Backend)
+    arguments = ["--event", "1", "--arrivals", "[0.0, 439.018, 653.038]"]
+    arguments += ["--jobs", "2", "--scheduler", "queue", "--timeout", "120"]
+    result = CliRunner().invoke(cluster.run, arguments)
+    assert result.exit_code == 0, result.output
+    assert len(spawned) == 2
+    for options in spawned:
+        assert options[options.index("--timeout") + 1] == "120.0"
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""Tests for the analyses run in the background for the backend."""
+import time
+
+import pytest
+
+from subpulse.routines.jobs import Full, Jobs
+
+ARRIVALS = [0.000, 439.018, 653.038, 1080.966, 1304.422, 1517.858]
+
+
+def test_jobs(tmp_path):
+    """Check an analysis runs in the background and the queue is bounded."""
+    jobs = Jobs(tmp_path, workers=1, queue=2)
+    with pytest.raises(ValueError):
+        jobs.submit(ARRIVALS, 0.2, 100, memory=1.0)
+    with pytest.raises(ValueError):
+        jobs.submit(ARRIVALS[:1], 0.2, 100)
+    identifier = jobs.submit(ARRIVALS, 0.2, 200, seed=1, observed=5.0)
+    other = jobs.submit(ARRIVALS, 0.2, 200, seed=2)
+    with pytest.raises(Full):
+        jobs.submit(ARRIVALS, 0.2, 200)
+    assert jobs.status(identifier)["state"] in ("pending", "running", "done")
+    with pytest.raises(KeyError):
+        jobs.status("unknown")
+    deadline = time.monotonic() + 120
+    while jobs.active() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    jobs.shutdown()
+    status = jobs.status(identifier)
+    assert status["state"] == "done"
+    assert status["progress"]["completed"] == 200
+    result = jobs.result(identifier)
+    assert result["simulations"] == 200 and result["seed"] == 1
+    assert 0 <= result["fap"] <= 1
+    assert jobs.result(other)["seed"] == 2
+    # Finished analyses are forgotten, but their state is kept on disk.
+    assert identifier not in jobs.futures
+    assert jobs.status(identifier)["state"] == "done"
+    assert jobs.result(identifier) == result
+    failed = jobs.submit(ARRIVALS, 0.2, 100, jitter=True)
+    deadline = time.monotonic() + 120
+    while jobs.active() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    jobs.shutdown()
+    jobs.prune()
+    assert jobs.futures == {}
+    status = jobs.status(failed)
+    assert status["state"] == "failed" and "uncertainties" in status["error"]
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+"""Tests for the run metrics."""
+import io
+import json
+
+from subpulse.utilities.metrics import Metrics
+
+
+def test_metrics(tmp_path):
+    """Check stages accumulate and records are written as JSON lines."""
+    stream, path = io.StringIO(), tmp_path / "mc.metrics.jsonl"
+    metrics = Metrics(total=100, path=path, stream=stream, every=3600.0)
+    for completed in (50, 100):
+        with metrics.stage("simulate"):
+            sum(range(1000))
+        metrics.progress(completed)
+    summary = metrics.close(kernel="direct")
+    assert summary["stages"]["simulate"]["calls"] == 2
+    assert summary["stages"]["simulate"]["peak_rss"] <= summary["peak_rss"]
+    assert summary["completed"] == 100
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["event"] for record in records] == ["progress", "summary"]
+    assert records[0]["completed"] == 50
+    assert records[-1]["kernel"] == "direct"
+    assert stream.getvalue().splitlines() == path.read_text().splitlines()
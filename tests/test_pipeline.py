@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""Tests for the pipeline of a single job."""
+import dataclasses
+
+from click.testing import CliRunner
+
+from subpulse.analysis import toa
+from subpulse.pipelines import pipeline
+
+ARGUMENTS = ["--event", "1", "--arrivals", "[0.0, 439.018, 653.038, 1080.966]"]
+
+
+def test_pipeline_options(tmp_path, monkeypatch):
+    """Check the pipeline forwards its options to the analysis."""
+    calls = []
+
+    def execute(arrivals, chi, simulations, savepath, options, **settings):
+        calls.append(dataclasses.replace(options, **settings))
+
+    monkeypatch.setattr(toa, "execute", execute)
+    monkeypatch.chdir(tmp_path)
+    options = ["--seed", "5", "--start", "20"]
+    options += ["--interval", "30", "--resume", "True", "--summarize", "True"]
+    options += ["--observed", "9", "--precision", "0.1", "--threshold", "0.01"]
+    options += ["--confidence", "0.9", "--harmonics", "2"]
+    result = CliRunner().invoke(pipeline.run, ARGUMENTS + options)
+    assert result.exit_code == 0, result.output
+    expected = dict(seed=5, start=20, interval=30.0, resume=True, summarize=True)
+    expected.update(observed=9.0, precision=0.1, threshold=0.01, confidence=0.9)
+    expected.update(harmonics=2)
+    assert {name: getattr(calls[0], name) for name in expected} == expected
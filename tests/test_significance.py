@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""Tests for the significance of an observed statistic."""
+import pytest
+
+from subpulse.analysis import significance
+
+
+def test_normal_quantile():
+    """Check the quantile against known values."""
+    assert significance.normal_quantile(0.95) == pytest.approx(1.959964, abs=1e-6)
+    assert significance.normal_quantile(0.6827) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_false_alarm_probability():
+    """Check the interval brackets the estimate, including zero exceedances."""
+    fap, lower, upper = significance.false_alarm_probability(50, 1000)
+    assert fap == 0.05
+    assert lower < fap < upper
+    fap, lower, upper = significance.false_alarm_probability(0, 1000)
+    assert fap == 0.0
+    assert lower == pytest.approx(0.0, abs=1e-12)
+    assert upper == pytest.approx(0.0038, abs=1e-4)
+    with pytest.raises(ValueError):
+        significance.false_alarm_probability(2, 1)
+
+
+def test_converged():
+    """Check both stopping criteria."""
+    assert not significance.converged(0, 0, precision=0.1)
+    assert not significance.converged(0, 10**6, precision=0.1)
+    assert not significance.converged(10, 1000, precision=0.1)
+    assert significance.converged(1000, 10000, precision=0.1)
+    assert significance.converged(500, 1000, threshold=0.01)
+    assert not significance.converged(5, 1000, threshold=0.01)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""Tests for the constant-memory summary of simulated maxima."""
+import numpy as np
+import pytest
+
+from subpulse.analysis.summary import Summary, is_summary
+
+
+def test_summary(tmp_path):
+    """Check the summary against the exact statistics of its values."""
+    rng = np.random.default_rng(0)
+    values = rng.gamma(2.0, 2.0, 50000).clip(0, 30)
+    first, second = Summary(upper=30.0, top=100), Summary(upper=30.0, top=100)
+    for chunk in np.array_split(values[:20000], 7):
+        first.update(chunk)
+    second.update(values[20000:])
+    first.merge(second)
+
+    assert first.count == values.size
+    np.testing.assert_array_equal(
+        first.counts, np.histogram(values, bins=first.edges)[0]
+    )
+    np.testing.assert_array_equal(first.tail, np.sort(values)[::-1][:100])
+    for q in (0.1, 0.5, 0.9, 0.999):
+        exact = np.quantile(values, q)
+        assert first.quantile(q) == pytest.approx(exact, rel=2 * first.accuracy)
+    assert first.exceedances(first.tail[50]) == 51
+    assert first.exceedances(5.0) == pytest.approx(np.sum(values >= 5.0), rel=1e-2)
+
+    savepath = tmp_path / "summary.npz"
+    first.save(savepath, seed=1)
+    assert is_summary(savepath)
+    loaded = Summary.load(savepath)
+    np.testing.assert_array_equal(loaded.sketch, first.sketch)
+    assert loaded.count == first.count
+    with pytest.raises(ValueError):
+        loaded.merge(Summary(upper=12.0))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""Tests for the extreme-value modelling of the tail."""
+import numpy as np
+import pytest
+
+from subpulse.analysis import tail
+
+
+def pareto(size: int, shape: float, seed: int = 0) -> np.ndarray:
+    """Draw from a generalized Pareto distribution with unit scale."""
+    uniform = np.random.default_rng(seed).random(size)
+    return ((1.0 - uniform) ** (-shape) - 1.0) / shape
+
+
+def test_fit():
+    """Check the fitted shape and the extrapolated false alarm probability."""
+    values = pareto(10**6, shape=-0.1)
+    largest = tail.largest(values, fraction=0.01)
+    result = tail.fit(largest, values.size)
+    assert result.shape == pytest.approx(-0.1, abs=0.03)
+    assert result.exceedances == largest.size - 1
+
+    # Extrapolate to a probability the tail alone cannot resolve.
+    observed = np.quantile(values, 1 - 1e-5)
+    fap, lower, upper = tail.extrapolate(largest, values.size, observed, seed=1)
+    assert lower < 1e-5 < upper
+    assert fap == pytest.approx(1e-5, rel=0.5)
+
+    check = tail.diagnostic(result, largest)
+    assert check["empirical"][0] == 1 / values.size
+    assert check["modelled"][-1] == result.exceedances / values.size
+
+
+def test_gumbel():
+    """Check the gumbel model fits exponential excesses."""
+    values = np.random.default_rng(2).exponential(2.0, 10**5)
+    result = tail.fit(tail.largest(values), values.size, "gumbel")
+    assert result.shape == 0.0
+    assert result.scale == pytest.approx(2.0, rel=0.1)
+    with pytest.raises(ValueError):
+        tail.fit(values, values.size, "weibull")
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+"""Tests for the time of arrival analysis."""
+import json
+
+import numpy as np
+import pytest
+
+from subpulse.analysis import nufft, summary, toa
+
+ARRIVALS = [0.000, 439.018, 653.038, 1080.966, 1304.422, 1517.858]
+
+
+def realizations(simulations: int = 64) -> np.ndarray:
+    """Simulated times of arrival for the example arrivals."""
+    _, _, differences, minimum, maximum = toa.parameters(ARRIVALS, 0.2)
+    return toa.simulate(simulations, differences, minimum, maximum, seed=2021)
+
+
+def test_z2search_batch():
+    """Check the batched search against the per-realization search."""
+    grid = toa.frequency_grid()
+    toas_mc = realizations()
+    errors = np.zeros(toas_mc.shape[1])
+    max_power, max_index = toa.z2search_batch(toas_mc, grid, False)
+    assert max_power.shape == max_index.shape == (toas_mc.shape[0], 1)
+    for row, toas in enumerate(toas_mc):
+        z1 = toa.z2search(toas, errors, grid)
+        assert max_index[row, 0] == np.argmax(z1)
+        assert max_power[row, 0] == z1[np.argmax(z1)]
+
+
+def test_z2search_recurrence():
+    """Check the trigonometric recurrence against the direct search."""
+    grid = toa.frequency_grid()
+    toas_mc = realizations(8)
+    errors = np.zeros(toas_mc.shape[1])
+    for toas in toas_mc:
+        np.testing.assert_allclose(
+            toa.z2search_recurrence(toas, errors, grid),
+            toa.z2search(toas, errors, grid),
+            atol=1e-9,
+        )
+    direct, _ = toa.z2search_batch(toas_mc, grid, False)
+    recurrence, _ = toa.z2search_batch(toas_mc, grid, True)
+    np.testing.assert_allclose(recurrence, direct, atol=1e-9)
+
+
+def test_chunks():
+    """Check the chunks cover every simulation exactly once."""
+    size = toa.chunksize(toas=6, memory=0.001)
+    assert size == 1048 // (8 * 12 + 8)
+    spans = list(toa.chunks(100, size))
+    assert spans[0] == (0, size)
+    assert sum(count for _, count in spans) == 100
+    assert spans[-1][0] + spans[-1][1] == 100
+
+
+def test_execute(tmp_path):
+    """Check a small end-to-end run in several chunks."""
+    savepath = tmp_path / "mc.npz"
+    toa.execute(ARRIVALS, 0.2, 100, savepath, memory=0.001, seed=1, metrics=True)
+    data = np.load(savepath)
+    lines = toa.metrics_path(savepath).read_text().splitlines()
+    stages = json.loads(lines[-1])["stages"]
+    assert stages["simulate"]["calls"] == stages["search"]["calls"] > 1
+    assert data["max_z12_power"].shape == (100,)
+    assert np.all(data["max_z12_power"] > 0)
+    assert data["seed"] == 1
+    # The second half of the run, as a separate job sharing the seed.
+    half = tmp_path / "half.npz"
+    toa.execute(ARRIVALS, 0.2, 50, half, seed=1, start=50)
+    np.testing.assert_array_equal(
+        np.load(half)["max_z12_power"], data["max_z12_power"][50:]
+    )
+
+
+def test_warmup():
+    """Check every kernel is warmed up and timed."""
+    timings = toa.warmup()
+    assert set(timings) >= set(toa.KERNELS[1:])
+    assert all(first >= 0 and second >= 0 for first, second in timings.values())
+
+
+def test_threads():
+    """Check the thread count is validated and capped."""
+    assert toa.threads(1) == 1
+    assert toa.threads(10**6) == toa.config.NUMBA_NUM_THREADS
+    with pytest.raises(ValueError):
+        toa.threads(0)
+    toa.threads(1)
+
+
+def test_simulate_streams():
+    """Check simulations are reproducible however the run is split."""
+    _, _, differences, minimum, maximum = toa.parameters(ARRIVALS, 0.2)
+    total = 2 * toa.BLOCK + 100
+    whole = toa.simulate(total, differences, minimum, maximum, seed=7)
+    parts = [
+        toa.simulate(count, differences, minimum, maximum, seed=7, start=start)
+        for start, count in toa.chunks(total, 3000)
+    ]
+    np.testing.assert_array_equal(whole, np.concatenate(parts))
+    other = toa.simulate(100, differences, minimum, maximum, seed=8)
+    assert not np.array_equal(whole[:100], other)
+    spacing = np.diff(whole, axis=1)
+    assert np.all((spacing >= minimum) & (spacing <= maximum))
+
+
+def test_single_precision():
+    """Check single precision shares the random streams and stays accurate."""
+    _, _, differences, minimum, maximum = toa.parameters(ARRIVALS, 0.2)
+    double = toa.simulate(100, differences, minimum, maximum, seed=7)
+    single = toa.simulate(100, differences, minimum, maximum, seed=7, dtype="float32")
+    assert single.dtype == np.float32
+    np.testing.assert_array_equal(single, double.astype(np.float32))
+    report = toa.accuracy(ARRIVALS, 0.2, 500, kernel="recurrence", harmonics=2)
+    assert report["absolute"] < 0.1 * report["bin"]
+    assert report["relative"] < 1e-4
+    # The harmonics of single precision TOAs are scaled in double precision.
+    grid = toa.frequency_grid()
+    power, index = nufft.z2search_batch(single[:8], grid, 3)
+    expected, expected_index = nufft.z2search_batch(single[:8].astype(float), grid, 3)
+    np.testing.assert_array_equal(power, expected)
+    np.testing.assert_array_equal(index, expected_index)
+
+
+def test_resume(tmp_path):
+    """Check a resumed run matches an uninterrupted one."""
+    reference = tmp_path / "reference.npz"
+    toa.execute(ARRIVALS, 0.2, 100, reference, seed=3, memory=0.001, observed=5.0)
+    max_z12_power = np.load(reference)["max_z12_power"]
+
+    savepath = tmp_path / "resumed.npz"
+    checkpoint = toa.checkpoint_path(savepath)
+    metadata = dict(
+        arrivals=ARRIVALS,
+        chi=0.2,
+        simulations=100,
+        start=0,
+        harmonics=1,
+        dtype="float64",
+        summarize=False,
+        observed=5.0,
+        uncertainties=[],
+        jitter=False,
+        weighted=False,
+    )
+    results = dict(max_z12_power=max_z12_power[:48])
+    options = dict(memory=0.001, observed=5.0, resume=True)
+    errors = dict(uncertainties=[1.0] * len(ARRIVALS), weighted=True)
+    # Settings missing from the checkpoint, or from the run, are refused.
+    del metadata["weighted"]
+    toa.save_checkpoint(checkpoint, results, 48, 3, **metadata)
+    with pytest.raises(ValueError, match="weighted"):
+        toa.execute(ARRIVALS, 0.2, 100, savepath, **options)
+    metadata["weighted"] = False
+    toa.save_checkpoint(checkpoint, results, 48, 3, **metadata)
+    for changes in (dict(chi=0.3), dict(summarize=True), errors):
+        settings = {**options, "chi": 0.2, **changes}
+        with pytest.raises(ValueError):
+            toa.execute(ARRIVALS, simulations=100, savepath=savepath, **settings)
+    toa.execute(ARRIVALS, 0.2, 100, savepath, **options)
+    np.testing.assert_array_equal(np.load(savepath)["max_z12_power"], max_z12_power)
+    assert not checkpoint.exists()
+
+
+def test_execute_summarize(tmp_path):
+    """Check a summarized run against the full maxima of the same run."""
+    full, summarized = tmp_path / "full.npz", tmp_path / "summary.npz"
+    toa.execute(ARRIVALS, 0.2, 200, full, seed=4)
+    toa.execute(ARRIVALS, 0.2, 200, summarized, seed=4, summarize=True)
+    max_z12_power = np.load(full)["max_z12_power"]
+    stats = summary.Summary.load(summarized)
+    assert stats.count == 200
+    np.testing.assert_array_equal(stats.tail, np.sort(max_z12_power)[::-1][:200])
+
+
+def test_execute_empty(tmp_path):
+    """Check a job without simulations saves no false alarm probability."""
+    savepath = tmp_path / "mc.npz"
+    toa.execute(ARRIVALS, 0.2, 0, savepath, observed=9.0, metrics=True)
+    data = np.load(savepath)
+    assert data["max_z12_power"].size == 0 and data["exceedances"] == 0
+    assert "fap" not in data.files
+
+
+def test_execute_early_stopping(tmp_path):
+    """Check an insignificant observation stops the run early."""
+    savepath = tmp_path / "mc.npz"
+    simulations = 4 * toa.CHECK
+    toa.execute(
+        ARRIVALS, 0.2, simulations, savepath, seed=5, observed=1.0, threshold=0.01
+    )
+    data = np.load(savepath)
+    assert data["max_z12_power"].size == toa.CHECK
+    assert data["exceedances"] == np.count_nonzero(data["max_z12_power"] >= 1.0)
+    assert data["interval"][0] > 0.01
+
+
+def test_execute_observe(tmp_path):
+    """Check the periodogram of the arrivals is saved with its FAP."""
+    savepath = tmp_path / "mc.npz"
+    toa.execute(ARRIVALS, 0.2, 100, savepath, seed=6, harmonics=2, metrics=True)
+    data = np.load(savepath)
+    grid = toa.frequency_grid()
+    toas = toa.parameters(ARRIVALS, 0.2)[0]
+    z1 = toa.z2search(toas, np.zeros(toas.size), grid)
+    np.testing.assert_allclose(data["periodogram"][:, 0], z1, atol=1e-9)
+    np.testing.assert_array_equal(data["frequencies"], grid)
+    index = np.argmax(data["periodogram"][:, -1])
+    assert data["statistic"] == data["observed"] == data["periodogram"][index, -1]
+    assert data["period"] == 1e3 / grid[index]
+    power = data["max_z2n_power"][:, -1]
+    assert data["exceedances"] == np.count_nonzero(power >= data["statistic"])
+    assert data["fap"] == data["exceedances"] / 100
+    lines = toa.metrics_path(savepath).read_text().splitlines()
+    progress = [json.loads(line) for line in lines]
+    progress = [record for record in progress if record["event"] == "progress"]
+    assert progress[-1]["fap"] == data["fap"]
+
+
+def test_search_nufft():
+    """Check the NUFFT kernel against the direct search."""
+    grid = toa.frequency_grid()
+    toas_mc = realizations(300)
+    errors = np.zeros(toas_mc.shape[1])
+    np.testing.assert_allclose(
+        nufft.z2search(toas_mc[0], errors, grid),
+        toa.z2search(toas_mc[0], errors, grid),
+        atol=1e-8,
+    )
+    direct, direct_index = toa.search(toas_mc, grid, "direct")
+    power, index = toa.search(toas_mc, grid, "nufft")
+    np.testing.assert_allclose(power, direct, atol=1e-8)
+    np.testing.assert_array_equal(index, direct_index)
+    assert nufft.select(len(ARRIVALS), grid.size) == "recurrence"
+    assert nufft.select(1000, grid.size) == "nufft"
+
+
+def test_search_pruned():
+    """Check pruning finds exactly the maximum of the exhaustive search."""
+    grid = toa.frequency_grid()
+    toas_mc = realizations(500)
+    direct, direct_index = toa.z2search_batch(toas_mc, grid, False)
+    for stride in (2, toa.STRIDE, 16):
+        power, index, evaluated = toa.z2search_pruned(toas_mc, grid, stride)
+        np.testing.assert_array_equal(power, direct)
+        np.testing.assert_array_equal(index, direct_index)
+        assert np.all(evaluated <= grid.size)
+    assert evaluated.mean() < grid.size
+
+
+def test_search_harmonics():
+    """Check Z^2_n from the harmonic recurrence against `z_n`."""
+    grid = toa.frequency_grid()
+    toas_mc = realizations(300)
+    harmonics = 3
+    powers = np.zeros((grid.size, harmonics))
+    best, best_index = np.zeros(harmonics), np.zeros(harmonics, dtype=np.int64)
+    toa.direct_search(toas_mc[0], grid, np.empty(0), powers, best, best_index)
+    for index in (0, 1000, grid.size - 1):
+        phase = toa.pulse_phase(toas_mc[0], grid[index])
+        for n in range(1, harmonics + 1):
+            assert powers[index, n - 1] == pytest.approx(toa.z_n(phase, n=n))
+    np.testing.assert_array_equal(best, powers.max(axis=0))
+
+    direct, direct_index = toa.search(toas_mc, grid, "direct", harmonics)
+    for kernel in ("recurrence", "nufft", "pruned"):
+        power, index = toa.search(toas_mc, grid, kernel, harmonics)
+        np.testing.assert_allclose(power, direct, atol=1e-8)
+        if kernel != "nufft":
+            np.testing.assert_array_equal(index, direct_index)
+    assert np.all(np.diff(direct, axis=1) >= 0)
+
+
+def test_execute_harmonics(tmp_path):
+    """Check the maxima per number of harmonics are saved."""
+    single, multiple = tmp_path / "single.npz", tmp_path / "multiple.npz"
+    toa.execute(ARRIVALS, 0.2, 50, single, seed=6)
+    toa.execute(ARRIVALS, 0.2, 50, multiple, seed=6, harmonics=2)
+    data = np.load(multiple)
+    assert data["max_z2n_power"].shape == (50, 2)
+    np.testing.assert_allclose(
+        data["max_z12_power"], np.load(single)["max_z12_power"], atol=1e-9
+    )
+    np.testing.assert_array_equal(data["max_z2n_power"][:, 0], data["max_z12_power"])
+
+
+def test_sweep(tmp_path):
+    """Check a sweep over chi matches separate runs with the same seed."""
+    chis = [0.0, 0.2, 0.5]
+    savepaths = [tmp_path / f"sweep_{chi}.npz" for chi in chis]
+    toa.sweep(
+        ARRIVALS, chis, 300, savepaths, seed=9, start=100, memory=0.001, observed=5.0
+    )
+    for chi, savepath in zip(chis, savepaths):
+        reference = tmp_path / f"execute_{chi}.npz"
+        toa.execute(ARRIVALS, chi, 300, reference, seed=9, start=100, observed=5.0)
+        swept, expected = np.load(savepath), np.load(reference)
+        np.testing.assert_array_equal(swept["max_z12_power"], expected["max_z12_power"])
+        assert swept["chi"] == chi and swept["exceedances"] == expected["exceedances"]
+    with pytest.raises(ValueError):
+        toa.sweep(ARRIVALS, chis, 10, savepaths[:2])
+    with pytest.raises(ValueError):
+        toa.sweep(ARRIVALS, chis, 10, savepaths, interval=0)
+
+
+def test_options(tmp_path):
+    """Check settings are given as options, overridden by keywords."""
+    options = toa.Options(seed=4, observed=5.0, harmonics=2)
+    assert options.changed() == ["seed", "observed", "harmonics"]
+    toa.execute(ARRIVALS, 0.2, 50, tmp_path / "options.npz", options, seed=3)
+    toa.execute(
+        ARRIVALS, 0.2, 50, tmp_path / "keywords.npz", **dict(vars(options), seed=3)
+    )
+    given, expected = np.load(tmp_path / "options.npz"), np.load(
+        tmp_path / "keywords.npz"
+    )
+    assert given["seed"] == 3 and options.seed == 4
+    np.testing.assert_array_equal(given["max_z2n_power"], expected["max_z2n_power"])
+    with pytest.raises(TypeError):
+        toa.execute(ARRIVALS, 0.2, 50, tmp_path / "unknown.npz", chunk=10)
+
+
+def test_weights():
+    """Check every kernel agrees on the weighted Z^2_n."""
+    grid = toa.frequency_grid()
+    toas_mc = realizations(8)
+    errors = np.linspace(1.0, 3.0, toas_mc.shape[1]) * 1e-3
+    weights = toa.weights(errors)
+    phases = 2 * np.pi * np.outer(grid, toas_mc[0])
+    sums = np.exp(1j * phases) @ weights
+    expected = 2.0 / np.sum(weights**2) * np.abs(sums) ** 2
+    for function in (toa.z2search, toa.z2search_recurrence, nufft.z2search):
+        np.testing.assert_allclose(function(toas_mc[0], errors, grid), expected)
+    # Equal uncertainties leave Z^2_n unchanged.
+    np.testing.assert_allclose(
+        toa.z2search_recurrence(toas_mc[0], np.full(errors.size, 1e-3), grid),
+        toa.z2search_recurrence(toas_mc[0], np.zeros(errors.size), grid),
+    )
+    direct, direct_index = toa.search(toas_mc, grid, "direct", 3, weights)
+    for kernel in ("recurrence", "nufft"):
+        power, index = toa.search(toas_mc, grid, kernel, 3, weights)
+        np.testing.assert_allclose(power, direct, atol=1e-9)
+        np.testing.assert_array_equal(index, direct_index)
+    with pytest.raises(ValueError):
+        toa.search(toas_mc, grid, "pruned", 1, weights)
+    # Some, but not all, zero uncertainties are refused by every search.
+    errors[0] = 0.0
+    for function in (toa.z2search, toa.z2search_recurrence, nufft.z2search):
+        with pytest.raises(ValueError):
+            function(toas_mc[0], errors, grid)
+
+
+def test_perturb():
+    """Check the jitter is reproduced however the simulations are split."""
+    errors = np.linspace(1.0, 3.0, len(ARRIVALS)) * 1e-3
+    _, _, differences, minimum, maximum = toa.parameters(ARRIVALS, 0.2)
+    toas_mc = toa.simulate(3 * toa.BLOCK, differences, minimum, maximum, seed=8)
+    jittered = toa.perturb(toas_mc.copy(), errors, seed=8)
+    deviates = (jittered - toas_mc) / errors
+    assert abs(deviates.mean()) < 0.05 and abs(deviates.std() - 1) < 0.05
+    first = toa.BLOCK + 7
+    part = toa.perturb(toas_mc[first:].copy(), errors, seed=8, start=first)
+    np.testing.assert_array_equal(part, jittered[first:])
+
+
+def test_execute_uncertainties(tmp_path):
+    """Check a jittered, weighted run matches its batched search."""
+    savepath = tmp_path / "mc.npz"
+    errors = [1.0, 2.0, 1.0, 3.0, 1.0, 2.0]
+    toa.execute(
+        ARRIVALS,
+        0.2,
+        100,
+        savepath,
+        seed=9,
+        uncertainties=errors,
+        jitter=True,
+        weighted=True,
+    )
+    data = np.load(savepath)
+    np.testing.assert_array_equal(data["uncertainties"], errors)
+    assert data["jitter"] and data["weighted"]
+    toas, uncertainties, differences, minimum, maximum = toa.parameters(
+        ARRIVALS, 0.2, 100, errors
+    )
+    weights = toa.weights(uncertainties)
+    toas_mc = toa.simulate(100, differences, minimum, maximum, seed=9)
+    toa.perturb(toas_mc, uncertainties, seed=9)
+    powers, _ = toa.search(toas_mc, toa.frequency_grid(), "recurrence", 1, weights)
+    np.testing.assert_array_equal(data["max_z12_power"], powers[:, 0])
+    with pytest.raises(ValueError):
+        toa.execute(ARRIVALS, 0.2, 100, savepath, jitter=True)
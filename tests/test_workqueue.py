@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Tests for the queue of chunks shared by the jobs of a run."""
+import os
+import time
+
+import numpy as np
+from click.testing import CliRunner
+
+from subpulse.analysis import toa
+from subpulse.pipelines import pipeline
+from subpulse.utilities.workqueue import WorkQueue
+
+
+def test_workqueue(tmp_path):
+    """Check interleaved workers claim every chunk exactly once."""
+    workers = [WorkQueue(tmp_path, 1000, 64, worker=f"{job}") for job in range(3)]
+    claims = [worker.claims() for worker in workers]
+    spans, active = [], list(claims)
+    while active:
+        for claim in list(active):
+            try:
+                spans.append(next(claim)[1:])
+            except StopIteration:
+                active.remove(claim)
+    assert sorted(spans) == [workers[0].span(index) for index in range(16)]
+    assert sum(count for _, count in spans) == 1000
+    assert workers[0].status() == dict(chunks=16, claimed=16, done=0)
+
+
+def test_workqueue_timeout(tmp_path):
+    """Check an expired claim is taken over, and a done chunk never is."""
+    lost = WorkQueue(tmp_path, 100, 50, worker="lost")
+    assert lost.claim(0) and lost.claim(1)
+    lost.complete(1)
+    old = os.path.getmtime(lost.path(0, "claim")) - 60
+    for index in (0, 1):
+        os.utime(lost.path(index, "claim"), (old, old))
+    spare = WorkQueue(tmp_path, 100, 50, timeout=30, worker="spare")
+    assert [index for index, _, _ in spare.claims()] == [0]
+    assert lost.path(0, "claim").read_text().startswith("spare")
+
+
+def test_pipeline_queue(tmp_path, monkeypatch):
+    """Check a queued run reproduces a single run."""
+    monkeypatch.chdir(tmp_path)
+    arguments = ["--event", "1", "--arrivals", "[0.0, 439.018, 653.038, 1080.966]"]
+    arguments += ["--chi", "0.2", "--simulations", "100", "--seed", "9"]
+    options = ["--fingerprint", "queued", "--queue", "True", "--chunk", "40"]
+    for extra in (options, ["--fingerprint", "single"]):
+        result = CliRunner().invoke(pipeline.run, arguments + extra)
+        assert result.exit_code == 0, result.output
+    single = np.load(tmp_path / "1/single/mc_1_nsim100_chi0.20_0.npz")
+    queued = [
+        np.load(tmp_path / f"1/queued/mc_1_nsim{count}_chi0.20_{index}.npz")
+        for index, count in enumerate((40, 40, 20))
+    ]
+    np.testing.assert_array_equal(
+        np.concatenate([data["max_z12_power"] for data in queued]),
+        single["max_z12_power"],
+    )
+    assert all(data["block"] == toa.BLOCK for data in queued)
+
+
+def test_workqueue_takeover_race(tmp_path, monkeypatch):
+    """Check a fresh claim renamed by a late takeover is given back."""
+    lost = WorkQueue(tmp_path, 100, 50, worker="lost")
+    assert lost.claim(0)
+    old = os.path.getmtime(lost.path(0, "claim")) - 60
+    os.utime(lost.path(0, "claim"), (old, old))
+    late = WorkQueue(tmp_path, 100, 50, timeout=30, worker="late")
+    first = WorkQueue(tmp_path, 100, 50, timeout=30, worker="first")
+    rename = os.rename
+
+    def overtaken(source, destination):
+        # The first worker takes the expired claim over before the late one.
+        monkeypatch.setattr(os, "rename", rename)
+        assert first.claim(0)
+        rename(source, destination)
+
+    monkeypatch.setattr(os, "rename", overtaken)
+    assert not late.claim(0)
+    assert lost.path(0, "claim").read_text().startswith("first")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["chunk_00000000.claim"]
+
+
+def test_workqueue_wait(tmp_path, monkeypatch):
+    """Check a worker waits for a claim that stops being refreshed."""
+    lost = WorkQueue(tmp_path, 100, 50, worker="lost")
+    assert lost.claim(0)
+    spare = WorkQueue(tmp_path, 100, 50, timeout=30, worker="spare")
+    waits = []
+
+    def sleep(seconds):
+        # The lost worker refreshes its claim once, then stops.
+        if waits:
+            old = os.path.getmtime(lost.path(0, "claim")) - 60
+            os.utime(lost.path(0, "claim"), (old, old))
+        else:
+            lost.touch(0)
+        waits.append(seconds)
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    claimed = []
+    for index, _, _ in spare.claims():
+        claimed.append(index)
+        spare.complete(index)
+    assert claimed == [1, 0] and waits == [30, 30]
+    assert spare.unfinished() == []